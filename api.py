@@ -1,16 +1,24 @@
 # api.py (The Server)
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 import sqlite3
-import os
 import logging
+import json
+import csv
+import io
+import time
+import argparse
 
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
 
-from scraper import scrape_gecko_terminal_pool
+from scraper import get_scraper
+from scraper import http_client
 
-# Import the scraper logic from  main.py file
-from main import main as run_scraper_job 
+from pool_scheduler import run_tick, TICK_SECONDS as POOL_SCHEDULER_TICK_SECONDS
+from jobs import JobManager
+from metrics import instrument_app, register_response_cache
+from pool_import import import_pools
+from leader import make_lock
 
 from flask_cors import CORS 
 
@@ -20,6 +28,9 @@ app = Flask(__name__)
 
 CORS(app) 
 
+# Request latency per route, and the /metrics endpoint (see metrics.py)
+instrument_app(app)
+
 # --- Logging Setup ---
 # craper output in the API terminal
 logging.basicConfig(
@@ -33,27 +44,65 @@ logging.basicConfig(
 # Explicitly tell the Scheduler to be noisy so we can see it working
 logging.getLogger('apscheduler').setLevel(logging.DEBUG)
 # --- Database Setup ---
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(SCRIPT_DIR, 'prices.db')
+# Connections come from db.py so readers get the same WAL/cache tuning as the writer
+from db import DB_PATH, connect, get_data_generation, wait_for_commit, build_stream_query, LATEST_PRICE_QUERY, LATEST_PRICES_QUERY, DATA_COLUMNS, build_data_query, parse_cursor, to_epoch_ms, build_downsample_query, build_downsample_count_query, DOWNSAMPLED_ROWS_QUERY, HISTORY_SPAN_QUERY, DEX_NAMES_QUERY, build_rollup_downsample_query
+from downsample import downsample_ids, downsample_series, fetch_records, MIN_POINTS
+from rollups import INTERVALS, OHLC_QUERY, finest_interval
+from datetime import datetime
+from response_cache import ResponseCache
+
+# Rows fetched from the database per chunk when streaming /data
+STREAM_CHUNK_SIZE = 1000
+
+# Most pools one /add_scrap_pools request may import
+MAX_IMPORT_POOLS = 1000
+
+# Upper bound of /data?max_points (per series), so a downsampled response stays small
+MAX_POINTS = 5000
+# Most raw rows /data?max_points reads (32 bytes each once in NumPy); longer ranges are drawn from the OHLC rollups
+MAX_DOWNSAMPLE_ROWS = 200000
+# Rows fetched per round trip while reading them
+DOWNSAMPLE_CHUNK_SIZE = 50000
+# The rollup interval used is the finest with at most this many buckets per point kept, so LTTB still has a choice
+ROLLUP_OVERSAMPLE = 4
+
+# /stream re-checks the database this often when the scraper runs in another process
+STREAM_POLL_SECONDS = 2
+# A comment line is sent after this much silence, so proxies keep the connection open
+STREAM_HEARTBEAT_SECONDS = 15
 
 def get_db_connection():
     """Creates a connection to the SQLite database."""
-    conn = sqlite3.connect('prices.db')
+    conn = connect(DB_PATH)
     conn.row_factory = sqlite3.Row # This lets us access columns by name
     return conn
 
+def get_current_generation():
+    """Reads the data generation for the response cache (None if the database is not migrated yet)."""
+    conn = get_db_connection()
+    try:
+        return get_data_generation(conn)
+    except sqlite3.Error as e:
+        app.logger.error(f"Could not read the data generation: {e}")
+        return None
+    finally:
+        conn.close()
+
+# Responses are reused until the scraper commits new prices (see response_cache.py)
+response_cache = ResponseCache(get_current_generation)
+register_response_cache(response_cache)
+
+# Manual /run_scraper jobs are queued in scrape_jobs for the scheduler leader to run (see jobs.py)
+job_manager = JobManager()
+
 @app.route('/lastest_data', methods=['GET'])
+@response_cache.cached
 def get_latest_data():
     """API endpoint to fetch the latest price data entry."""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT timestamp, dex_name, token_pair, buy_price, sell_price
-                FROM hype_prices
-                ORDER BY timestamp DESC
-                LIMIT 1
-            ''')
+            cursor.execute(LATEST_PRICE_QUERY)
             row = cursor.fetchone()
             if row:
                 data = dict(row)
@@ -66,55 +115,341 @@ def get_latest_data():
     
     return jsonify(data)
 
+@app.route('/latest_prices', methods=['GET'])
+@response_cache.cached
+def get_latest_prices():
+    """API endpoint to fetch the current price of every DEX / token pair (one row each)."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # latest_prices is kept current by the writer, so this never touches the history table
+            cursor.execute(LATEST_PRICES_QUERY)
+            data = [dict(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        app.logger.error(f"Database error: {e}")
+        return jsonify({"error": "A database error occurred"}), 500
+
+    return jsonify(data)
+
 @app.route('/data', methods=['GET'])
+@response_cache.cached
 def get_all_data():
-    """API endpoint to fetch all stored price data."""
+    """
+    API endpoint to fetch stored price data, newest first.
+
+    Query args:
+        limit: the most rows to return.
+        dex_name: only these DEXes (repeat the arg for several).
+        from / to: ISO timestamps bounding the rows (inclusive, optional).
+        max_points: thin every DEX / token pair series down to at most this
+                many rows with LTTB (see downsample.py), for charts over long
+                ranges. JSON only, and not combined with limit or before.
+        before: '<ts>,<id>' cursor; returns only rows older than it.
+                When a page is full, the cursor for the next page is sent in
+                the X-Next-Cursor header.
+        format: 'json' (default), or 'ndjson' / 'csv' to stream the rows
+                straight from the database cursor in chunks. Streamed rows
+                also carry id and ts, the parts of their '<ts>,<id>' cursor.
+    """
 
     limit = request.args.get('limit', type=int)
-    dex_name = request.args.get('dex_name', type=str)
-    # Start with a base query
-    query = 'SELECT timestamp, dex_name, token_pair, spot_price,fee_percentage,buy_price,sell_price FROM hype_prices'
-    params = []
+    dex_names = request.args.getlist('dex_name')
+    output_format = request.args.get('format', default='json', type=str)
+
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start = to_epoch_ms(start) if start else None
+        end = to_epoch_ms(end) if end else None
+    except ValueError:
+        return jsonify({"error": "from / to must be ISO timestamps, e.g. 2025-01-31T12:00:00"}), 400
 
-    if dex_name:
-        query += ' WHERE dex_name = ?'
-        params.append(dex_name)
+    before = request.args.get('before', type=str)
+    if before:
+        try:
+            before = parse_cursor(before)
+        except ValueError:
+            return jsonify({"error": "before must look like '<ts>,<id>'"}), 400
 
-    query += ' ORDER BY timestamp DESC'
+    if output_format not in ('json', 'ndjson', 'csv'):
+        return jsonify({"error": "format must be one of: json, ndjson, csv"}), 400
 
-    if limit:
-        query += ' LIMIT ?'
-        params.append(limit)
+    if 'max_points' in request.args:
+        max_points = request.args.get('max_points', type=int)
+        if max_points is None or not MIN_POINTS <= max_points <= MAX_POINTS:
+            return jsonify({"error": f"max_points must be an integer from {MIN_POINTS} to {MAX_POINTS}"}), 400
+        if output_format != 'json' or limit or before:
+            return jsonify({"error": "max_points cannot be combined with format, limit or before"}), 400
+        return get_downsampled_data(dex_names, start, end, max_points)
 
+    query, params = build_data_query(dex_names=dex_names, limit=limit, before=before, start=start, end=end)
+
+    if output_format != 'json':
+        return stream_rows(query, params, output_format)
 
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             rows = cursor.fetchall()
-            # Convert the database rows to a list of dictionaries
-            data = [dict(row) for row in rows]
+            # Convert the database rows to a list of dictionaries (id and ts are only used for the cursor)
+            data = [dict(zip(DATA_COLUMNS, row)) for row in rows]
     except sqlite3.Error as e:
         # Log the error and return an appropriate error response
         app.logger.error(f"Database error: {e}")
         return jsonify({"error": "A database error occurred"}), 500
     
+    response = jsonify(data)
+    if limit and len(rows) == limit:
+        last = rows[-1]
+        response.headers['X-Next-Cursor'] = f"{last['ts']},{last['id']}"
+    return response
+
+def get_downsampled_data(dex_names, start, end, max_points):
+    """
+    /data?max_points: keeps the LTTB points of every series in the range and returns those rows, newest first.
+
+    A range of up to MAX_DOWNSAMPLE_ROWS rows is read (id, ts and spot only) in
+    chunks into a NumPy array. A longer range is drawn from the closes of the
+    price_ohlc rollups instead, at the finest interval that still leaves
+    ROLLUP_OVERSAMPLE buckets per point, so time and memory stay bounded however
+    long the range is. The X-Downsample-Source header says which was used:
+    'raw', or 'ohlc-<interval>'.
+    """
+    try:
+        with get_db_connection() as conn:
+            query, params = build_downsample_count_query(dex_names, start, end, cap=MAX_DOWNSAMPLE_ROWS + 1)
+            count = conn.execute(query, params).fetchone()[0]
+            if count > MAX_DOWNSAMPLE_ROWS:
+                return get_rollup_downsampled_data(conn, dex_names, start, end, max_points)
+
+            # LIMIT: rows stored since the count must not overrun the array
+            query, params = build_downsample_query(dex_names, start, end, limit=count)
+            cursor = conn.cursor()
+            # Plain tuples: sqlite3.Row objects make reading a long range several times slower
+            cursor.row_factory = None
+            records = fetch_records(cursor.execute(query, params), count, DOWNSAMPLE_CHUNK_SIZE)
+            kept_ids = downsample_ids(records, max_points)
+            rows = conn.execute(DOWNSAMPLED_ROWS_QUERY, (json.dumps(kept_ids),)).fetchall()
+    except sqlite3.Error as e:
+        app.logger.error(f"Database error: {e}")
+        return jsonify({"error": "A database error occurred"}), 500
+
+    rows.sort(key=lambda row: (row['ts'], row['id']), reverse=True)
+    response = jsonify([dict(zip(DATA_COLUMNS, row)) for row in rows])
+    response.headers['X-Downsample-Source'] = 'raw'
+    return response
+
+def get_rollup_downsampled_data(conn, dex_names, start, end, max_points):
+    """The long-range half of get_downsampled_data(): LTTB over one closing price per rollup bucket."""
+    import numpy as np
+
+    first_ts, last_ts = conn.execute(HISTORY_SPAN_QUERY).fetchone()
+    start = max(start, first_ts) if start is not None else first_ts
+    end = min(end, last_ts) if end is not None else last_ts
+    interval = finest_interval((end - start) / 60000, ROLLUP_OVERSAMPLE * max_points)
+    dex_names = dex_names or [row[0] for row in conn.execute(DEX_NAMES_QUERY)]
+
+    query, params = build_rollup_downsample_query(interval, dex_names, start, end)
+    rows = conn.execute(query, params).fetchall()
+    if not rows:
+        return jsonify({
+            "error": f"The range holds more than {MAX_DOWNSAMPLE_ROWS} rows and has no OHLC rollups "
+                     f"(run `python rollups.py backfill`); narrow from / to instead."
+        }), 400
+
+    series_ids = {}
+    series = np.fromiter((series_ids.setdefault((row['dex_name'], row['token_pair']), len(series_ids)) for row in rows),
+                         dtype=np.int64, count=len(rows))
+    ts = np.fromiter((row['ts'] for row in rows), dtype=np.int64, count=len(rows))
+    spot = np.fromiter((row['spot_price'] for row in rows), dtype=np.float64, count=len(rows))
+    kept = [rows[i] for i in downsample_series(series, ts, spot, max_points).tolist()]
+
+    kept.sort(key=lambda row: (row['ts'], row['dex_name'], row['token_pair']), reverse=True)
+    response = jsonify([dict(zip(DATA_COLUMNS, row)) for row in kept])
+    response.headers['X-Downsample-Source'] = f'ohlc-{interval}'
+    return response
+
+def stream_rows(query, params, output_format):
+    """Streams query results as NDJSON or CSV, STREAM_CHUNK_SIZE rows at a time, so memory stays flat."""
+    # The trailing id and ts columns let a client resume an interrupted export with before='<ts>,<id>'
+    columns = DATA_COLUMNS + ['id', 'ts']
+
+    def generate():
+        conn = get_db_connection()
+        try:
+            cursor = conn.execute(query, params)
+            if output_format == 'csv':
+                yield _csv_line(columns)
+            while True:
+                rows = cursor.fetchmany(STREAM_CHUNK_SIZE)
+                if not rows:
+                    break
+                if output_format == 'csv':
+                    yield ''.join(_csv_line(tuple(row)[:len(columns)]) for row in rows)
+                else:
+                    yield ''.join(json.dumps({column: row[column] for column in columns}) + '\n' for row in rows)
+        except sqlite3.Error as e:
+            # Headers are already sent, so the best we can do is log and end the stream
+            app.logger.error(f"Database error while streaming: {e}")
+        finally:
+            conn.close()
+
+    mimetype = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+    return Response(generate(), mimetype=mimetype)
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+@app.route('/ohlc', methods=['GET'])
+@response_cache.cached
+def get_ohlc():
+    """
+    API endpoint for OHLC candles of one DEX, read from the price_ohlc rollups.
+    Query args: dex_name (required), interval (1m, 5m, 1h or 1d), from / to (ISO timestamps, optional).
+    """
+    dex_name = request.args.get('dex_name', type=str)
+    interval = request.args.get('interval', default='1h', type=str)
+
+    if not dex_name:
+        return jsonify({"error": "dex_name is required."}), 400
+    if interval not in INTERVALS:
+        return jsonify({"error": f"interval must be one of: {', '.join(INTERVALS)}"}), 400
+
+    # Normalise the bounds to the 'YYYY-MM-DD HH:MM:SS' text the rollups are keyed by
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start = datetime.fromisoformat(start).strftime('%Y-%m-%d %H:%M:%S') if start else '0000-01-01 00:00:00'
+        end = datetime.fromisoformat(end).strftime('%Y-%m-%d %H:%M:%S') if end else '9999-12-31 23:59:59'
+    except ValueError:
+        return jsonify({"error": "from / to must be ISO timestamps, e.g. 2025-01-31T12:00:00"}), 400
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(OHLC_QUERY, (interval, dex_name, start, end))
+            data = [dict(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        app.logger.error(f"Database error: {e}")
+        return jsonify({"error": "A database error occurred"}), 500
+
     return jsonify(data)
 
+@app.route('/stream', methods=['GET'])
+def stream_prices():
+    """
+    Server-sent events feed of newly stored prices (one 'price' event per row, the row id as event id).
+
+    Query args:
+        dex_name: only send these DEXes (repeat the arg for several).
+    Resuming: a reconnecting EventSource sends the Last-Event-ID header (or pass
+    ?last_event_id=) and gets every row stored since then before live rows.
+    Without it the feed starts with the next row to be stored.
+
+    Each subscriber holds a connection open, so run the API with a threaded or
+    async server (e.g. gunicorn --worker-class gthread) when using this.
+    """
+    dex_names = request.args.getlist('dex_name')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+    try:
+        if last_event_id:
+            after_id = int(last_event_id)
+        else:
+            with get_db_connection() as conn:
+                after_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM price_history").fetchone()[0]
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be a row id."}), 400
+    except sqlite3.Error as e:
+        app.logger.error(f"Database error: {e}")
+        return jsonify({"error": "A database error occurred"}), 500
+
+    def generate(after_id):
+        conn = get_db_connection()
+        last_sent = time.monotonic()
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield f"retry: {STREAM_POLL_SECONDS * 1000}\n\n"
+            while True:
+                query, params = build_stream_query(after_id, dex_names)
+                rows = conn.execute(query, params).fetchall()
+                for row in rows:
+                    after_id = row['id']
+                    yield f"id: {row['id']}\nevent: price\ndata: {json.dumps(dict(row))}\n\n"
+                if rows:
+                    last_sent = time.monotonic()
+                    continue
+
+                if time.monotonic() - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+
+                # Wakes up right away if the scraper runs in this process, otherwise polls
+                wait_for_commit(STREAM_POLL_SECONDS)
+        except sqlite3.Error as e:
+            app.logger.error(f"Database error while streaming: {e}")
+        finally:
+            conn.close()
+
+    return Response(generate(after_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # stop nginx from buffering the events
+    })
+
 @app.route('/', methods=['GET'])
 def index():
     return "Welcome to the HYPE Price API! Try accessing the /data endpoint."
 
+@app.route('/upstreams', methods=['GET'])
+def get_upstreams():
+    """Rate limiter, circuit breaker and connection counters of every upstream host."""
+    limiter_state = http_client.get_limiter_state()
+    connection_stats = http_client.get_connection_stats()
+    return jsonify({
+        host: dict(limiter_state.get(host, {}), connections=connection_stats.get(host))
+        for host in sorted(set(limiter_state) | set(connection_stats))
+    })
+
 @app.route('/run_scraper', methods=['POST'])
 def run_scraper_endpoint():
-    """API endpoint to manually trigger the scraper job."""
+    """
+    API endpoint to manually trigger the scraper job.
+    The job is queued for the scheduler leader (worker.py), which runs it on its
+    next tick; poll /jobs/<job_id> for its outcome.
+    """
     try:
-        run_scraper_job()
-        return jsonify({"status": "Scraper job executed successfully."})
-    except Exception as e:
-        app.logger.error(f"Error running scraper job: {e}")
-        return jsonify({"error": "Failed to run scraper job."}), 500
+        job, created = job_manager.submit()
+    except sqlite3.Error as e:
+        app.logger.error(f"Database error: {e}")
+        return jsonify({"error": "A database error occurred"}), 500
+    response = jsonify({
+        "job_id": job['id'],
+        "status": job['status'],
+        # False when a job was already queued or running and that one is returned instead
+        "created": created,
+        "status_url": f"/jobs/{job['id']}",
+    })
+    response.headers['Location'] = f"/jobs/{job['id']}"
+    return response, 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, timings and per-pool outcomes of a job started through /run_scraper."""
+    try:
+        job = job_manager.get(job_id)
+    except sqlite3.Error as e:
+        app.logger.error(f"Database error: {e}")
+        return jsonify({"error": "A database error occurred"}), 500
+    if job is None:
+        return jsonify({"error": "Unknown job id."}), 404
+    return jsonify(job)
+
 scheduler = BackgroundScheduler()
+# Set by start_scheduler(), to the same kind of leader lock worker.py uses
+scheduler_lock = None
 
 @app.route('/add_scrap_pool', methods=['POST'])
 def add_scrape_pool():
@@ -136,8 +471,8 @@ def add_scrape_pool():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Check if this pool address already exists in the database
-        cursor.execute("SELECT id FROM monitored_pools WHERE pool_address = ?", (data['pool_address'],))
+        # Check if this pool address already exists in the database, in any case (like pool_import.py)
+        cursor.execute("SELECT id FROM monitored_pools WHERE lower(pool_address) = lower(?)", (data['pool_address'],))
         if cursor.fetchone():
             conn.close()
             return jsonify({"error": "This pool is already being monitored."}), 409 # 409 Conflict
@@ -150,13 +485,15 @@ def add_scrape_pool():
     # If the scraper returns None, the data is bad (wrong network, wrong address, or token not found).
     print(f"Validating new pool: {data['pool_address']}...")
     
-    test_result = None
-    if data['scraper_function'] == 'geckoterminal':
-        test_result = scrape_gecko_terminal_pool(
-            network=data['network'],
-            pool_address=data['pool_address'],
-            target_token_address=data['target_token_address']
-        )
+    # The dry run goes through the same batch scraper as the scrape job, which also
+    # resolves the pool's static metadata and saves it to pool_metadata for the first real poll
+    try:
+        batch_scraper, _ = get_scraper(data['scraper_function'])
+    except KeyError:
+        conn.close()
+        return jsonify({"error": f"Unknown scraper_function '{data['scraper_function']}'."}), 400
+
+    test_result = batch_scraper([data]).get(data['pool_address'].lower())
     
     if not test_result:
         conn.close()
@@ -186,26 +523,80 @@ def add_scrape_pool():
             "initial_data": test_result
         }), 201
         
+    except sqlite3.IntegrityError:
+        # The unique index on lower(pool_address) catches a duplicate added while we were validating
+        conn.close()
+        return jsonify({"error": "This pool is already being monitored."}), 409
+    except sqlite3.Error as e:
+        app.logger.error(f"Database error: {e}")
+        return jsonify({"error": "A database error occurred during insertion"}), 500
+
+
+@app.route('/add_scrap_pools', methods=['POST'])
+def add_scrape_pools():
+    """
+    API endpoint to add or update many pools at once (see pool_import.py).
+
+    Body: a JSON list of pools (the fields of /add_scrap_pool), or
+    {"pools": [...], "validate": true, "dry_run": false}.
+    Pools are validated with concurrent, batched scrapes, and the valid ones are
+    upserted on pool_address in one transaction. The response reports every pool.
+    """
+    data = request.get_json(silent=True)
+    options = data if isinstance(data, dict) else {}
+    pools = options.get('pools') if isinstance(data, dict) else data
+
+    if not isinstance(pools, list) or not pools:
+        return jsonify({"error": "Send a non-empty JSON list of pools, or {\"pools\": [...]}."}), 400
+    if len(pools) > MAX_IMPORT_POOLS:
+        return jsonify({"error": f"At most {MAX_IMPORT_POOLS} pools per request."}), 400
+
+    try:
+        report = import_pools(pools, validate=bool(options.get('validate', True)), dry_run=bool(options.get('dry_run', False)))
     except sqlite3.Error as e:
         app.logger.error(f"Database error: {e}")
         return jsonify({"error": "A database error occurred during insertion"}), 500
+    return jsonify(report)
+
 
+def scheduler_tick():
+    """One tick of the in-process scheduler: only runs while this process is the leader."""
+    # acquire() also renews a lock this process already holds (the SQLite lease must not expire)
+    if not scheduler_lock.acquire():
+        logging.info("Another process is the scheduler leader; skipping this tick.")
+        return
+    run_tick(job_manager)
 
-def start_scheduler():          
-    """Starts the background scheduler to run scraping jobs periodically."""
+def start_scheduler(lock_kind='file'):
+    """
+    Starts the in-process scheduler, for running everything in one process during development.
+
+    In production the scheduler runs in worker.py and the API only serves reads. Pass the
+    same lock_kind ('file' or 'sqlite') as the worker's --lock: then they share one leader
+    lock, so a worker and any number of API processes started with the scheduler never
+    scrape the same pools twice, and whichever is the leader runs the queued /run_scraper jobs.
+    """
+    global scheduler_lock
 
     if not scheduler.running:
+        scheduler_lock = make_lock(lock_kind)
         # Add the job. 
-        scheduler.add_job(func=run_scraper_job, trigger="interval", minutes=1, max_instances=1)
+        # Each tick runs the queued manual job and the pools that are due (see pool_scheduler.py)
+        scheduler.add_job(func=scheduler_tick, trigger="interval", seconds=POOL_SCHEDULER_TICK_SECONDS, max_instances=1, coalesce=True)
         
         scheduler.start()
-        print("--- Internal Scraper Scheduler Started ---")
+        print(f"--- Internal Scraper Scheduler Started ({lock_kind} leader lock) ---")
         
-        atexit.register(lambda: scheduler.shutdown())    
+        atexit.register(lambda: (scheduler.shutdown(), scheduler_lock.release()))    
     
 
 if __name__ == "__main__":
-    # This is for local testing only. For production, we use Gunicorn.
+    # This is for local testing only. For production, we use Gunicorn plus worker.py.
+    parser = argparse.ArgumentParser(description="Run the API development server.")
+    parser.add_argument('--with-scheduler', action='store_true', help="also scrape in this process instead of running worker.py")
+    parser.add_argument('--lock', choices=['file', 'sqlite'], default='file', help="leader lock of the scheduler, as passed to worker.py (default: %(default)s)")
+    args = parser.parse_args()
 
-    start_scheduler()
-    app.run(debug=True, port=5000, use_reloader=False)
\ No newline at end of file
+    if args.with_scheduler:
+        start_scheduler(args.lock)
+    app.run(debug=True, port=5000, use_reloader=False)
@@ -0,0 +1,147 @@
+# benchmarks/generate_history.py
+"""
+Fills a database with synthetic price history, to see how the API behaves
+with a year of minute data across dozens of DEXes.
+
+Every DEX quotes the same assets, so their prices move together: each pair
+follows one shared random walk (in log price), and every DEX adds its own
+small mean-reverting deviation from it plus its fee. About 1% of samples are
+skipped, like scrapes that failed. Rows are written in time order, in large
+transactions, the same shape PriceWriter produces.
+
+Usage:
+    python benchmarks/generate_history.py --db /tmp/big.db --rows 10000000 --dexes 40
+    PRICES_DB_PATH=/tmp/big.db python api.py      # then point the API (and load_test.py) at it
+"""
+import os
+import sys
+import math
+import time
+import random
+import logging
+import argparse
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAIRS = [('HYPE / USDC', 38.0), ('HYPE / USDT0', 38.0), ('BTC / USDC', 95000.0), ('ETH / USDC', 3400.0), ('PURR / USDC', 0.18)]
+FEES = [0.01, 0.05, 0.25, 0.3, 1.0]
+
+# Share of samples dropped to mimic failed scrapes
+MISSING_SAMPLE_RATE = 0.01
+
+
+def build_series(dexes, pairs_per_dex, rng):
+    """Returns one (dex_name, token_pair, pair index, fee) per series."""
+    series = []
+    for d in range(dexes):
+        for p in range(pairs_per_dex):
+            token_pair, _ = PAIRS[(d + p) % len(PAIRS)]
+            series.append((f"DEX {d:02d}", token_pair, (d + p) % len(PAIRS), rng.choice(FEES)))
+    return series
+
+
+def generate_rows(series, steps, end, interval_seconds, volatility, rng):
+    """Yields (epoch ms, dex_name, token_pair, spot, fee, buy, sell) rows in time order."""
+    log_prices = [math.log(start) for _, start in PAIRS]
+    deviations = [0.0] * len(series)
+    end_ms = round(end.timestamp() * 1000)
+    start_ms = end_ms - steps * interval_seconds * 1000
+
+    for step in range(steps):
+        ts = start_ms + step * interval_seconds * 1000
+        log_prices = [price + rng.gauss(0, volatility) for price in log_prices]
+        for i, (dex_name, token_pair, pair_index, fee) in enumerate(series):
+            # Each DEX drifts a little around the shared price and is pulled back to it
+            deviations[i] = deviations[i] * 0.95 + rng.gauss(0, volatility / 4)
+            if rng.random() < MISSING_SAMPLE_RATE:
+                continue
+            spot = math.exp(log_prices[pair_index] + deviations[i])
+            multiplier = fee / 100
+            yield (ts, dex_name, token_pair, spot, fee, spot / (1 - multiplier), spot * (1 - multiplier))
+
+
+def fill(db_path, rows, dexes, pairs_per_dex, interval_seconds, volatility, seed, chunk_size, rollups):
+    sys.path.insert(0, PROJECT_DIR)
+    import migrations
+    from db import connect
+    from rollups import backfill
+
+    migrations.migrate(db_path)
+    rng = random.Random(seed)
+    series = build_series(dexes, pairs_per_dex, rng)
+    # A few extra steps make up for the skipped samples
+    steps = math.ceil(rows / len(series) / (1 - MISSING_SAMPLE_RATE)) + 1
+    logging.info(f"Generating {rows} rows: {len(series)} series x {steps} steps of {interval_seconds}s")
+
+    conn = connect(db_path)
+    # The file is scratch data: skip the fsyncs, a crash only means generating it again
+    conn.execute("PRAGMA synchronous=OFF")
+    started = time.monotonic()
+    written = 0
+    chunk = []
+    insert_sql = '''
+        INSERT INTO price_history (ts, dex_id, pair_id, spot_price, fee_percentage, buy_price, sell_price)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    try:
+        # The compact schema (migration 9) stores each name once and refers to it by id
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO dex (name) VALUES (?)", sorted({(s[0],) for s in series}))
+            conn.executemany("INSERT OR IGNORE INTO pair (name) VALUES (?)", sorted({(s[1],) for s in series}))
+        dex_ids = dict(conn.execute("SELECT name, id FROM dex"))
+        pair_ids = dict(conn.execute("SELECT name, id FROM pair"))
+
+        for ts, dex_name, token_pair, *prices in generate_rows(series, steps, datetime.now().replace(second=0, microsecond=0), interval_seconds, volatility, rng):
+            chunk.append((ts, dex_ids[dex_name], pair_ids[token_pair], *prices))
+            if len(chunk) >= chunk_size or written + len(chunk) >= rows:
+                with conn:
+                    conn.executemany(insert_sql, chunk)
+                written += len(chunk)
+                chunk = []
+                elapsed = time.monotonic() - started
+                logging.info(f"-> {written}/{rows} rows ({written / elapsed:,.0f} rows/s)")
+                if written >= rows:
+                    break
+
+        with conn:
+            # Same as migration 3: the newest row of every pair
+            conn.execute('''
+                INSERT OR REPLACE INTO latest_prices
+                    (dex_name, token_pair, price_id, ts, spot_price, fee_percentage, buy_price, sell_price)
+                SELECT dex_name, token_pair, id, ts, spot_price, fee_percentage, buy_price, sell_price
+                FROM hype_prices
+                WHERE id IN (SELECT MAX(id) FROM price_history GROUP BY dex_id, pair_id)
+            ''')
+            conn.execute("UPDATE data_generation SET generation = generation + 1, updated_at = ? WHERE id = 1", (time.time(),))
+        if rollups:
+            logging.info("Rebuilding the OHLC rollups...")
+            backfill(conn)
+        # Fresh statistics so the planner sees the real table sizes
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return written, time.monotonic() - started
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic multi-DEX price history.")
+    parser.add_argument('--db', default=os.environ.get('PRICES_DB_PATH'), required=not os.environ.get('PRICES_DB_PATH'),
+                        help="database to fill (default: $PRICES_DB_PATH); refuses the project's own prices.db")
+    parser.add_argument('--rows', type=int, default=10_000_000, help="rows to generate (default: %(default)s)")
+    parser.add_argument('--dexes', type=int, default=30, help="number of DEXes (default: %(default)s)")
+    parser.add_argument('--pairs-per-dex', type=int, default=1, help="token pairs quoted by each DEX (default: %(default)s)")
+    parser.add_argument('--interval-seconds', type=int, default=60, help="seconds between samples (default: %(default)s)")
+    parser.add_argument('--volatility', type=float, default=0.001, help="std dev of each log-price step (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="rows per transaction (default: %(default)s)")
+    parser.add_argument('--rollups', action='store_true', help="also rebuild price_ohlc (slow for large runs)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.abspath(args.db) == os.path.join(PROJECT_DIR, 'prices.db'):
+        parser.error("refusing to fill the project's own prices.db with synthetic data")
+
+    written, elapsed = fill(args.db, args.rows, args.dexes, args.pairs_per_dex, args.interval_seconds,
+                            args.volatility, args.seed, args.chunk_size, args.rollups)
+    print(f"Wrote {written} rows to {args.db} in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
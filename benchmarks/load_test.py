@@ -0,0 +1,180 @@
+# benchmarks/load_test.py
+"""
+Load driver for the read API.
+
+Keeps `--concurrency` clients busy for `--duration` seconds, each picking the
+next endpoint from the list in turn, and reports throughput and
+p50/p95/p99 latency per endpoint. The report is saved as JSON so runs against
+different code (or different database sizes) can be compared.
+
+Endpoint paths may contain {dex}, replaced on every request by a random DEX
+taken from /latest_prices. Add endpoints with --endpoint NAME=PATH.
+
+Usage:
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --concurrency 16 --duration 30
+    python benchmarks/load_test.py --bust-cache      # measure the database, not the response cache
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import threading
+import subprocess
+from datetime import datetime, timedelta
+
+import requests
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_DIR, 'benchmarks', 'results')
+
+_week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+DEFAULT_ENDPOINTS = {
+    'lastest_data': '/lastest_data',
+    'latest_prices': '/latest_prices',
+    'data': '/data?limit=100',
+    'data_by_dex': '/data?limit=100&dex_name={dex}',
+    'data_page': '/data?limit=1000',
+    'ohlc_1h_week': f'/ohlc?dex_name={{dex}}&interval=1h&from={_week_ago}',
+}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def discover_dexes(base_url):
+    try:
+        response = requests.get(f"{base_url}/latest_prices", timeout=10)
+        response.raise_for_status()
+        return sorted({row['dex_name'] for row in response.json()}) or ['Unknown']
+    except (requests.exceptions.RequestException, ValueError, KeyError):
+        return ['Unknown']
+
+
+def worker(base_url, endpoints, dexes, deadline, bust_cache, samples, errors, lock, seed):
+    rng = random.Random(seed)
+    session = requests.Session()
+    names = list(endpoints)
+    position = rng.randrange(len(names))
+    while time.monotonic() < deadline:
+        name = names[position % len(names)]
+        position += 1
+        path = endpoints[name].replace('{dex}', rng.choice(dexes))
+        if bust_cache:
+            # An argument the endpoint ignores, so the response cache never has a match
+            path += ('&' if '?' in path else '?') + f"_={rng.getrandbits(48)}"
+
+        started = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=30)
+            # Read the whole body, streamed exports included
+            size = len(response.content)
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            status, size = type(e).__name__, 0
+        elapsed = time.perf_counter() - started
+
+        with lock:
+            if status == 200:
+                samples[name].append((elapsed, size))
+            else:
+                errors[name][str(status)] = errors[name].get(str(status), 0) + 1
+
+
+def run(args):
+    endpoints = dict(DEFAULT_ENDPOINTS)
+    for extra in args.endpoint:
+        name, _, path = extra.partition('=')
+        endpoints[name] = path
+    if args.only:
+        endpoints = {name: path for name, path in endpoints.items() if name in args.only}
+
+    base_url = args.url.rstrip('/')
+    dexes = discover_dexes(base_url)
+    samples = {name: [] for name in endpoints}
+    errors = {name: {} for name in endpoints}
+    lock = threading.Lock()
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, endpoints, dexes, deadline, args.bust_cache, samples, errors, lock, args.seed + i))
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+
+    results = {}
+    for name, path in endpoints.items():
+        latencies = sorted(elapsed for elapsed, _ in samples[name])
+        results[name] = {
+            'path': path,
+            'requests': len(latencies),
+            'errors': errors[name],
+            'requests_per_second': round(len(latencies) / wall, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+            'mean_bytes': round(sum(size for _, size in samples[name]) / len(latencies)) if latencies else None,
+        }
+
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        'benchmark': 'load_test',
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'config': {'url': base_url, 'concurrency': args.concurrency, 'duration': args.duration,
+                   'bust_cache': args.bust_cache, 'dexes_found': len(dexes), 'label': args.label},
+        'wall_seconds': round(wall, 2),
+        'total_requests_per_second': round(sum(r['requests'] for r in results.values()) / wall, 1),
+        'endpoints': results,
+    }
+
+
+def print_report(report):
+    print(f"\n{'endpoint':16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  errors")
+    for name, r in report['endpoints'].items():
+        print(f"{name:16} {r['requests_per_second']:>8} {r['p50_ms']!s:>8} {r['p95_ms']!s:>8} "
+              f"{r['p99_ms']!s:>8} {r['max_ms']!s:>8}  {r['errors'] or ''}")
+    print(f"\nTotal: {report['total_requests_per_second']} req/s over {report['wall_seconds']}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure read API throughput and latency per endpoint.")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="API base URL (default: %(default)s)")
+    parser.add_argument('--concurrency', type=int, default=16, help="parallel clients (default: %(default)s)")
+    parser.add_argument('--duration', type=float, default=30, help="seconds to run (default: %(default)s)")
+    parser.add_argument('--endpoint', action='append', default=[], metavar='NAME=PATH', help="extra endpoint to include")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="run only these endpoints")
+    parser.add_argument('--bust-cache', action='store_true', help="make every request miss the response cache")
+    parser.add_argument('--label', help="free text stored in the report, e.g. the database size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="report path (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {output}")
+    if any(r['requests'] == 0 for r in report['endpoints'].values()):
+        sys.exit(1)
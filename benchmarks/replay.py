@@ -0,0 +1,194 @@
+# benchmarks/replay.py
+"""
+Offline benchmark of the scrape pipeline.
+
+Creates a scratch database with N synthetic pools, points the GeckoTerminal,
+Hyperliquid and on-chain scrapers at a local stub server (stub_upstreams.py)
+that replays recorded responses, and runs main.main a few times. For every
+job it reports the wall time, the upstream requests sent, the rows inserted
+per second and the peak Python memory; the whole run is saved as JSON so it
+can be compared with a run from before a change.
+
+Usage:
+    python benchmarks/replay.py --pools 300 --jobs 5 --latency-ms 80
+    python benchmarks/replay.py --error-rate 0.1 --error-status 429 --retry-after 1
+    python benchmarks/replay.py --baseline benchmarks/results/replay-before.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_DIR, 'benchmarks', 'results')
+
+# Share of the synthetic pools per scraper_function
+DEFAULT_MIX = 'geckoterminal=0.6,hyperliquid_native=0.2,v3_rpc=0.2'
+
+# Numbers compared against a --baseline run
+SUMMARY_KEYS = ['wall_seconds', 'requests_per_job', 'rows_per_second', 'peak_traced_mb']
+
+
+def parse_mix(mix, pools):
+    """'geckoterminal=0.6,v3_rpc=0.4' -> {'geckoterminal': 0.6 * pools, ...}"""
+    shares = {}
+    for part in mix.split(','):
+        name, _, share = part.partition('=')
+        shares[name.strip()] = float(share)
+    total = sum(shares.values())
+    counts = {name: int(pools * share / total) for name, share in shares.items()}
+    # Rounding leftovers go to the first scraper
+    counts[next(iter(counts))] += pools - sum(counts.values())
+    return counts
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    # Everything below must see the scratch database, so set it before importing the project
+    scratch = tempfile.mkdtemp(prefix='replay-')
+    os.environ['PRICES_DB_PATH'] = os.path.join(scratch, 'prices.db')
+    sys.path.insert(0, PROJECT_DIR)
+
+    import main
+    import migrations
+    from db import DB_PATH, connect
+    from scraper import http_client, rate_limit, geckoterminal_api, hyperliquid_native, v3_pool_reader
+    from stub_upstreams import UpstreamStub
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    stub = UpstreamStub(
+        parse_mix(args.mix, args.pools), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, error_status=args.error_status, retry_after=args.retry_after, seed=args.seed,
+    ).start()
+
+    # Point every scraper at the stub
+    geckoterminal_api.API_BASE_URL = f"{stub.base_url}/gecko"
+    hyperliquid_native.INFO_URL = f"{stub.base_url}/hyperliquid/info"
+    v3_pool_reader.RPC_URLS['replay'] = f"{stub.base_url}/rpc"
+    # The stub has no quota unless one is asked for
+    rate_limit.HOST_LIMITS['127.0.0.1'] = (args.rate_limit, args.rate_limit) if args.rate_limit else (1e6, 1e6)
+    rate_limit.reset()
+
+    migrations.migrate(DB_PATH)
+    conn = connect(DB_PATH)
+    with conn:
+        conn.executemany('''
+            INSERT INTO monitored_pools (dex_name, scraper_function, network, pool_address, target_token_address)
+            VALUES (:dex_name, :scraper_function, :network, :pool_address, :target_token_address)
+        ''', stub.pools())
+
+    jobs = []
+    tracemalloc.start()
+    try:
+        for job_number in range(1, args.jobs + 1):
+            stub.reset_counts()
+            http_client.reset_connection_stats()
+            tracemalloc.reset_peak()
+            rows_before = conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+
+            started = time.perf_counter()
+            # The scrapers print a line per pool; keep the report readable
+            with redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+                results = main.main(max_workers=args.workers)
+            wall = time.perf_counter() - started
+
+            rows = conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0] - rows_before
+            statuses = {}
+            for result in results:
+                statuses[result['status']] = statuses.get(result['status'], 0) + 1
+            counts = dict(stub.counts)
+            job = {
+                'job': job_number,
+                'wall_seconds': round(wall, 4),
+                'requests': {name: count for name, count in counts.items() if name != 'errors'},
+                'requests_per_job': sum(count for name, count in counts.items() if name != 'errors'),
+                'injected_errors': counts.get('errors', 0),
+                'new_connections': sum(stats['new_connections'] for stats in http_client.get_connection_stats().values()),
+                'rows_inserted': rows,
+                'rows_per_second': round(rows / wall, 1) if wall else None,
+                'pool_statuses': statuses,
+                'peak_traced_mb': round(tracemalloc.get_traced_memory()[1] / 2**20, 2),
+            }
+            jobs.append(job)
+            print(f"job {job_number}: {job['wall_seconds']:.3f}s, {job['requests_per_job']} requests, "
+                  f"{rows} rows ({job['rows_per_second']}/s), {job['peak_traced_mb']} MB peak, {statuses}")
+    finally:
+        tracemalloc.stop()
+        conn.close()
+        stub.stop()
+
+    # The first job resolves pool metadata and opens connections; later jobs show the steady state
+    steady = jobs[1:] or jobs
+    summary = {key: round(statistics.median(job[key] for job in steady), 4) for key in SUMMARY_KEYS}
+    summary['first_job_wall_seconds'] = jobs[0]['wall_seconds']
+    # ru_maxrss is KiB on Linux (bytes on macOS)
+    summary['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+    return {
+        'benchmark': 'replay',
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline', 'verbose')},
+        'summary': summary,
+        'jobs': jobs,
+    }
+
+
+def compare(report, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline.get('git_revision')}):")
+    for key in SUMMARY_KEYS:
+        before, after = baseline['summary'].get(key), report['summary'][key]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {key:20} {before!s:>12} -> {after!s:>12}  ({change})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark main.main against recorded upstream responses.")
+    parser.add_argument('--pools', type=int, default=300, help="synthetic pools (default: %(default)s)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="share of pools per scraper_function (default: %(default)s)")
+    parser.add_argument('--jobs', type=int, default=5, help="scrape jobs to run (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=8, help="main.main max_workers (default: %(default)s)")
+    parser.add_argument('--latency-ms', type=float, default=50, help="stub response delay (default: %(default)s)")
+    parser.add_argument('--jitter-ms', type=float, default=20, help="+/- random delay (default: %(default)s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with an error")
+    parser.add_argument('--error-status', type=int, default=503, help="status of injected errors (default: %(default)s)")
+    parser.add_argument('--retry-after', type=float, default=None, help="Retry-After seconds sent with injected errors")
+    parser.add_argument('--rate-limit', type=float, default=None, help="requests/second allowed to the stub (default: unlimited)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="report path (default: benchmarks/results/replay-<time>.json)")
+    parser.add_argument('--baseline', help="earlier report to compare against")
+    parser.add_argument('--verbose', action='store_true', help="show the scrapers' own output")
+    args = parser.parse_args()
+
+    report = run(args)
+    output = args.output or os.path.join(RESULTS_DIR, f"replay-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nSteady state: {json.dumps(report['summary'])}")
+    print(f"Report saved to {output}")
+    if args.baseline:
+        compare(report, args.baseline)
@@ -0,0 +1,83 @@
+# benchmarks/startup.py
+"""
+Cold-start report for the API and the worker.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point and prints the total import time, the slowest imports, and
+whether any heavy optional dependency (web3, eth_abi, ...) was loaded even
+though nothing used it.
+
+Usage:
+    python benchmarks/startup.py                   # report on main, api and worker
+    python benchmarks/startup.py --max-ms 800      # also fail if a cold start is slower
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ['main', 'api', 'worker']
+
+# Packages only the scrapers that need them should load
+HEAVY_PACKAGES = ['web3', 'eth_abi', 'eth_utils', 'eth_account', 'aiohttp', 'numpy']
+
+
+def measure(module):
+    """Imports `module` in a fresh interpreter and returns the parsed -X importtime report."""
+    code = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+    # Run from a scratch directory so importing api.py does not leave its log file in the project
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    with tempfile.TemporaryDirectory() as scratch:
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=scratch, env=env, capture_output=True, text=True, check=True
+        )
+
+    imports = []
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append({'module': name.strip(), 'self_us': int(self_us), 'cumulative_us': int(cumulative_us)})
+
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        'module': module,
+        'total_ms': sum(entry['self_us'] for entry in imports) / 1000,
+        'slowest': sorted(imports, key=lambda entry: entry['cumulative_us'], reverse=True)[:10],
+        'heavy_loaded': [name for name in HEAVY_PACKAGES if name in loaded],
+    }
+
+
+def print_report(report):
+    print(f"\n=== import {report['module']}: {report['total_ms']:.1f} ms ===")
+    for entry in report['slowest']:
+        print(f"  {entry['cumulative_us'] / 1000:8.1f} ms  {entry['module'].strip()}")
+    if report['heavy_loaded']:
+        print(f"  !! heavy packages loaded at startup: {', '.join(report['heavy_loaded'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the API and worker.")
+    parser.add_argument('--max-ms', type=float, help="fail if any entry point takes longer than this to import")
+    parser.add_argument('--json', help="also write the full report to this file")
+    args = parser.parse_args()
+
+    reports = [measure(module) for module in ENTRY_POINTS]
+    for report in reports:
+        print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+    failed = [r['module'] for r in reports if r['heavy_loaded'] or (args.max_ms and r['total_ms'] > args.max_ms)]
+    if failed:
+        print(f"\nCold start check failed for: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nCold start check passed.")
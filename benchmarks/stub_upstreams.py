@@ -0,0 +1,262 @@
+# benchmarks/stub_upstreams.py
+"""
+Local stand-in for GeckoTerminal, the Hyperliquid info API and an EVM JSON-RPC
+node, for benchmarking the scrape pipeline offline.
+
+Responses are built from the recorded payloads in benchmarks/fixtures (one
+GeckoTerminal pool resource and one spotMetaAndAssetCtxs answer), cloned for
+as many synthetic pools as requested. Every pool's price follows its own
+random walk, so consecutive jobs see moving prices. JSON-RPC `eth_call`s to
+Multicall3's aggregate3 are decoded and answered per sub-call, for Uniswap V3
+and Algebra pools alike.
+
+Every response can be delayed (latency_ms +/- jitter_ms) and a share of them
+replaced by an error status (error_rate), to see how retries, rate limits and
+deadlines behave.
+"""
+import copy
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Quote tokens of the synthetic pools
+GECKO_QUOTE_TOKEN = '0x' + 'b8ce59fc3717ada4c02eadf9682a9e934f625ebb'
+RPC_TOKEN0 = ('0x' + '55' * 20, 18, 'WHYPE')
+RPC_TOKEN1 = ('0x' + 'b8' * 20, 6, 'USDT0')
+
+
+def _load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _address(prefix, index):
+    return f"0x{prefix:08x}{index:032x}"
+
+
+class UpstreamStub:
+    """
+    The stub server and the synthetic pools it serves.
+
+    Args:
+        pool_counts (dict): scraper_function -> number of synthetic pools
+                            ('geckoterminal', 'hyperliquid_native', 'v3_rpc').
+        latency_ms / jitter_ms: Delay added to every response.
+        error_rate (float): Share of requests answered with error_status instead.
+        retry_after (float): Retry-After seconds sent with error responses (None = no header).
+        algebra_fee (int): Fee the Algebra pools report in globalState(), in hundredths
+                           of a bip; can be changed while the stub runs, like a dynamic fee.
+    """
+
+    def __init__(self, pool_counts, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503,
+                 retry_after=None, seed=0, network='hyperevm', algebra_fee=500):
+        self.pool_counts = pool_counts
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.network = network
+        self.algebra_fee = algebra_fee
+        self._random = random.Random(seed)
+        self._prices = {}
+        self._lock = threading.Lock()
+        self._gecko_template = _load_fixture('geckoterminal_pool.json')
+        self._spot_template = _load_fixture('hyperliquid_spot_meta_and_asset_ctxs.json')
+        self.counts = {}
+        self._server = None
+
+    # --- Synthetic pools ---
+
+    def pools(self):
+        """The monitored_pools rows of every synthetic pool."""
+        rows = []
+        for i in range(self.pool_counts.get('geckoterminal', 0)):
+            rows.append(('Gecko ' + str(i), 'geckoterminal', self.network, _address(0xa0, i), _address(0xb0, i)))
+        for i in range(self.pool_counts.get('hyperliquid_native', 0)):
+            rows.append(('Hyperliquid ' + str(i), 'hyperliquid_native', 'hyperliquid', f"hl-{i}", f"0x{i + 1:032x}"))
+        for i in range(self.pool_counts.get('v3_rpc', 0)):
+            rows.append(('Onchain ' + str(i), 'v3_rpc', 'replay', _address(0xc0, i), RPC_TOKEN0[0]))
+        return [
+            dict(zip(('dex_name', 'scraper_function', 'network', 'pool_address', 'target_token_address'), row))
+            for row in rows
+        ]
+
+    def _next_price(self, key, start):
+        """Random walk: each read moves the price by up to ~0.2%."""
+        with self._lock:
+            price = self._prices.get(key, start) * (1 + self._random.gauss(0, 0.001))
+            self._prices[key] = price
+            return price
+
+    # --- GeckoTerminal ---
+
+    def _gecko_pool(self, address):
+        address = address.lower()
+        if not address.startswith(_address(0xa0, 0)[:10]):
+            return None
+        index = int(address[10:], 16)
+        pool = copy.deepcopy(self._gecko_template)
+        attributes = pool['attributes']
+        attributes['address'] = address
+        attributes['name'] = f"TKN{index} / USDT0 0.3%"
+        attributes['base_token_price_usd'] = f"{self._next_price(address, 10 + index % 90):.10f}"
+        pool['id'] = f"{self.network}_{address}"
+        pool['relationships']['base_token']['data']['id'] = f"{self.network}_{_address(0xb0, index)}"
+        pool['relationships']['quote_token']['data']['id'] = f"{self.network}_{GECKO_QUOTE_TOKEN}"
+        return pool
+
+    def _gecko(self, path):
+        # /gecko/networks/<network>/pools/<address> or /gecko/networks/<network>/pools/multi/<a>,<b>,...
+        parts = path.strip('/').split('/')
+        if len(parts) == 5 and parts[3] == 'multi':
+            pools = [self._gecko_pool(address) for address in parts[4].split(',')]
+            return 200, {'data': [pool for pool in pools if pool]}
+        if len(parts) == 4:
+            pool = self._gecko_pool(parts[3])
+            return (200, {'data': pool}) if pool else (404, {'errors': [{'status': '404', 'title': 'Not Found'}]})
+        return 404, {'errors': [{'status': '404', 'title': 'Not Found'}]}
+
+    # --- Hyperliquid ---
+
+    def _hyperliquid(self, body):
+        if body.get('type') != 'spotMetaAndAssetCtxs':
+            return 400, {'error': 'unsupported request type'}
+        meta, ctxs = copy.deepcopy(self._spot_template)
+        token_template, market_template, ctx_template = meta['tokens'][1], meta['universe'][0], ctxs[0]
+        meta['tokens'], meta['universe'], ctxs = meta['tokens'][:1], [], []
+        for i in range(1, self.pool_counts.get('hyperliquid_native', 0) + 1):
+            price = self._next_price(f"hl-{i}", 1 + i % 50)
+            meta['tokens'].append(dict(token_template, name=f"TKN{i}", index=i, tokenId=f"0x{i:032x}"))
+            meta['universe'].append(dict(market_template, tokens=[i, 0], name=f"@{i}", index=i))
+            ctxs.append(dict(ctx_template, coin=f"@{i}", midPx=f"{price:.6f}", markPx=f"{price:.6f}"))
+        return 200, [meta, ctxs]
+
+    # --- EVM JSON-RPC ---
+
+    def _rpc(self, body):
+        from eth_abi import encode, decode
+        from eth_utils import keccak
+
+        if body.get('method') != 'eth_call':
+            return 200, {'jsonrpc': '2.0', 'id': body.get('id'), 'error': {'code': -32601, 'message': 'method not found'}}
+        data = bytes.fromhex(body['params'][0]['data'][2:])
+        calls = decode(['(address,bool,bytes)[]'], data[4:])[0]
+
+        selectors = {keccak(text=signature)[:4]: signature for signature in (
+            'token0()', 'token1()', 'fee()', 'slot0()', 'globalState()', 'liquidity()', 'decimals()', 'symbol()')}
+        tokens = {RPC_TOKEN0[0]: RPC_TOKEN0, RPC_TOKEN1[0]: RPC_TOKEN1}
+        results = []
+        for target, _, calldata in calls:
+            target = target.lower()
+            signature = selectors.get(calldata[:4])
+            result = None
+            if target in tokens:
+                _, decimals, symbol = tokens[target]
+                if signature == 'decimals()':
+                    result = encode(['uint8'], [decimals])
+                elif signature == 'symbol()':
+                    result = encode(['string'], [symbol])
+            elif target.startswith(_address(0xc0, 0)[:10]):
+                index = int(target[10:], 16)
+                # Every other pool is an Algebra pool
+                algebra = index % 2 == 1
+                if signature == 'token0()':
+                    result = encode(['address'], [RPC_TOKEN0[0]])
+                elif signature == 'token1()':
+                    result = encode(['address'], [RPC_TOKEN1[0]])
+                elif signature == 'fee()' and not algebra:
+                    result = encode(['uint24'], [3000])
+                elif signature == 'liquidity()':
+                    result = encode(['uint128'], [10 ** 21])
+                elif signature in ('slot0()', 'globalState()'):
+                    price = self._next_price(target, 30 + index % 20)
+                    sqrt_price_x96 = int((price * 10 ** (RPC_TOKEN1[1] - RPC_TOKEN0[1])) ** 0.5 * 2 ** 96)
+                    if signature == 'slot0()' and not algebra:
+                        result = encode(['uint160', 'int24', 'uint16', 'uint16', 'uint16', 'uint8', 'bool'], [sqrt_price_x96, 0, 0, 1, 1, 0, True])
+                    elif signature == 'globalState()' and algebra:
+                        result = encode(['uint160', 'int24', 'uint16', 'uint16', 'uint8', 'bool'], [sqrt_price_x96, 0, self.algebra_fee, 0, 0, True])
+            results.append((result is not None, result or b''))
+        encoded = '0x' + encode(['(bool,bytes)[]'], [results]).hex()
+        return 200, {'jsonrpc': '2.0', 'id': body.get('id'), 'result': encoded}
+
+    # --- Server ---
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {}
+
+    def handle(self, method, path, body):
+        """Returns (status, headers, payload) for one request."""
+        upstream = path.strip('/').split('/')[0]
+        self._count(upstream)
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self._count('errors')
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else {}
+            return self.error_status, headers, {'error': 'injected'}
+
+        if upstream == 'gecko' and method == 'GET':
+            status, payload = self._gecko(path[len('/gecko'):])
+        elif upstream == 'hyperliquid' and method == 'POST':
+            status, payload = self._hyperliquid(body)
+        elif upstream == 'rpc' and method == 'POST':
+            status, payload = self._rpc(body)
+        else:
+            status, payload = 404, {'error': 'unknown endpoint'}
+        return status, {}, payload
+
+    def start(self, host='127.0.0.1', port=0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real upstreams
+
+            def _respond(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                status, headers, payload = stub.handle(method, urlsplit(self.path).path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -1,17 +1,43 @@
 # dashboard.py
 
+import argparse
+import json
 import requests
 import time
+from collections import deque
 from rich.console import Console
 from rich.table import Table
 from rich.live import Live
 
 # The URL of running API server
 API_URL = "http://127.0.0.1:5000/data"
+# Server-sent events feed used by --stream mode
+STREAM_URL = "http://127.0.0.1:5000/stream"
+# Seconds to wait before reconnecting to the feed after the connection drops
+STREAM_RETRY_SECONDS = 3
+# Number of rows shown in the table
+TABLE_ROWS = 30
 
-def generate_table() -> Table:
-    """Fetches data from the API and generates a Rich table."""
-    
+# The last response we got, so an unchanged poll (HTTP 304) can be redrawn without a download
+_last_etag = None
+_last_data = None
+
+def fetch_data():
+    """Fetches the latest entries, sending the last ETag so the API can answer 304 if nothing changed."""
+    global _last_etag, _last_data
+
+    headers = {"If-None-Match": _last_etag} if _last_etag else {}
+    response = requests.get(f"{API_URL}?limit=30", headers=headers)
+    if response.status_code == 304:
+        return _last_data
+
+    response.raise_for_status() # Raise an exception for bad status codes
+    _last_etag = response.headers.get("ETag")
+    _last_data = response.json()
+    return _last_data
+
+def new_table() -> Table:
+    """Creates the empty Rich table with the dashboard's columns."""
     table = Table(title="HYPE Live Price Dashboard")
     table.add_column("Timestamp", style="cyan", no_wrap=True)
     table.add_column("DEX Name", style="magenta")
@@ -20,35 +46,42 @@ def generate_table() -> Table:
     table.add_column("Fee %", justify="right", style="blue")
     table.add_column("Effective Buy Price", justify="right", style="bold green")
     table.add_column("Effective sell Price", justify="right", style="bold red")
+    return table
 
+def add_entries(table: Table, data):
+    """Adds one table row per price entry."""
+    for entry in data:
+        # Safely get data and provide defaults
+        timestamp = entry.get('timestamp', 'N/A')
+        dex = entry.get('dex_name', 'N/A')
+        pair = entry.get('token_pair', 'N/A')
+        spot = entry.get('spot_price')
+        fee = entry.get('fee_percentage')
+        buy_price = entry.get('buy_price')
+        sell_price = entry.get('sell_price')
+
+        # Format the numbers for display
+        spot_str = f"${spot:.4f}" if spot is not None else "N/A"
+        fee_str = f"{fee:.3f}%" if fee is not None else "N/A"
+        buy_price_str = f"${buy_price:.4f}" if buy_price is not None else "N/A"
+        sell_price_str = f"${sell_price:.4f}" if sell_price is not None else "N/A"
+        
+        table.add_row(timestamp, dex, pair, spot_str, fee_str, buy_price_str, sell_price_str)
+
+def generate_table() -> Table:
+    """Fetches data from the API and generates a Rich table."""
+    
+    table = new_table()
     
     try:
-        # Make a request to your API to get the latest 20 entries
-        response = requests.get(f"{API_URL}?limit=30")
-        response.raise_for_status() # Raise an exception for bad status codes
-        data = response.json()
+        # Make a request to your API to get the latest 30 entries
+        data = fetch_data()
         
         if not data:
             table.add_row("No data found in the database yet...")
             return table
 
-        for entry in data:
-            # Safely get data and provide defaults
-            timestamp = entry.get('timestamp', 'N/A')
-            dex = entry.get('dex_name', 'N/A')
-            pair = entry.get('token_pair', 'N/A')
-            spot = entry.get('spot_price')
-            fee = entry.get('fee_percentage')
-            buy_price = entry.get('buy_price')
-            sell_price = entry.get('sell_price')
-
-            # Format the numbers for display
-            spot_str = f"${spot:.4f}" if spot is not None else "N/A"
-            fee_str = f"{fee:.3f}%" if fee is not None else "N/A"
-            buy_price_str = f"${buy_price:.4f}" if buy_price is not None else "N/A"
-            sell_price_str = f"${sell_price:.4f}" if sell_price is not None else "N/A"
-            
-            table.add_row(timestamp, dex, pair, spot_str, fee_str, buy_price_str, sell_price_str)
+        add_entries(table, data)
             
     except requests.exceptions.ConnectionError:
         table.add_row("[bold red]Error: Could not connect to the API server.[/bold red]")
@@ -58,9 +91,62 @@ def generate_table() -> Table:
 
     return table
 
+def stream_entries():
+    """
+    Yields price entries from the API's /stream feed as they are stored.
+    Yields None while the connection is down; reconnects resume from the last event id.
+    """
+    last_event_id = None
+    while True:
+        headers = {"Accept": "text/event-stream"}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+        try:
+            # The read timeout only has to outlast the server's keep-alive comments
+            with requests.get(STREAM_URL, headers=headers, stream=True, timeout=(5, 60)) as response:
+                response.raise_for_status()
+                event = {}
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("id:"):
+                        event["id"] = line[3:].strip()
+                    elif line.startswith("data:"):
+                        event["data"] = line[5:].strip()
+                    elif line == "":
+                        # A blank line ends an event
+                        if "data" in event:
+                            last_event_id = event.get("id", last_event_id)
+                            yield json.loads(event["data"])
+                        event = {}
+        except requests.exceptions.RequestException:
+            pass
+        yield None
+        time.sleep(STREAM_RETRY_SECONDS)
+
+def run_stream_mode(live: Live):
+    """Keeps the table current from the /stream feed instead of polling."""
+    try:
+        initial = fetch_data() or []
+    except requests.exceptions.RequestException:
+        initial = []
+    entries = deque(initial, maxlen=TABLE_ROWS)
+    for entry in stream_entries():
+        table = new_table()
+        if entry is None:
+            table.add_row("[bold red]Error: Lost the connection to the API stream, reconnecting...[/bold red]")
+        else:
+            entries.appendleft(entry)
+        add_entries(table, entries)
+        live.update(table)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Terminal dashboard for the HYPE price API.")
+    parser.add_argument("--stream", action="store_true", help="subscribe to the API's /stream feed instead of polling every 15 seconds")
+    args = parser.parse_args()
+
     # Use Rich's "Live" feature to create a display that updates automatically
     with Live(generate_table(), screen=True, refresh_per_second=4) as live:
+        if args.stream:
+            run_stream_mode(live)
         while True:
             # This loop will re-generate and update the table every 15 seconds
             time.sleep(15)
@@ -1,36 +1,7 @@
 # database_setup.py (Upgraded Version)
-import sqlite3
+# The schema now lives in migrations.py; this script stays as the familiar entry point.
+from migrations import migrate
 
-conn = sqlite3.connect('prices.db')
-cursor = conn.cursor()
+version = migrate()
 
-# We are adding new columns for the spot price, fee, and effective buy/sell prices
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS hype_prices (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    timestamp DATETIME NOT NULL,
-    dex_name TEXT NOT NULL,
-    token_pair TEXT NOT NULL,
-    spot_price REAL NOT NULL,
-    fee_percentage REAL,
-    buy_price REAL,
-    sell_price REAL
-)
-
-''')
-
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS monitored_pools (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    dex_name TEXT NOT NULL,
-    scraper_function TEXT NOT NULL,
-    network TEXT NOT NULL,
-    pool_address TEXT NOT NULL,
-    target_token_address TEXT NOT NULL
-)
-''')
-
-print("table created successfully.")
-
-conn.commit()
-conn.close()
\ No newline at end of file
+print(f"table created successfully (schema version {version}).")
@@ -0,0 +1,415 @@
+# db.py (Shared SQLite access for the worker and the API)
+import os
+import sqlite3
+import time
+import threading
+import logging
+from datetime import datetime
+
+from rollups import OHLC_QUERY, update_rollups, bucket_start
+from metrics import track_flush
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# PRICES_DB_PATH points the worker, the API and the tools at another database (e.g. for benchmarks)
+DB_PATH = os.environ.get('PRICES_DB_PATH') or os.path.join(SCRIPT_DIR, 'prices.db')
+
+# --- Connection Tuning ---
+# WAL lets the API read while the scraper writes, without either blocking the other.
+# synchronous=NORMAL is safe in WAL mode (a crash can only lose the last commit, never corrupt the file)
+# and only fsyncs at checkpoints instead of on every commit.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",  # negative = KiB, so ~20 MB of page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+# --- API Queries ---
+# Kept here so migrations.py can check their query plans against the indexes.
+# The history is stored in price_history with epoch-millisecond timestamps and
+# integer DEX / pair ids (migration 9); the hype_prices view joins the names back
+# in and renders `timestamp` as local-time text, so responses keep their old shape.
+# Filter and sort on the view's `ts`, never on `timestamp`, or the indexes go unused.
+
+# Local-time 'YYYY-MM-DD HH:MM:SS.SSS' text of an epoch-millisecond column, as the API returns it
+TIMESTAMP_TEXT_SQL = "strftime('%Y-%m-%d %H:%M:%f', {column} / 1000.0, 'unixepoch', 'localtime')"
+
+LATEST_PRICE_QUERY = '''
+    SELECT timestamp, dex_name, token_pair, buy_price, sell_price
+    FROM hype_prices
+    ORDER BY ts DESC
+    LIMIT 1
+'''
+
+
+# One row per (dex_name, token_pair), kept current by PriceWriter
+LATEST_PRICES_QUERY = f'''
+    SELECT {TIMESTAMP_TEXT_SQL.format(column='ts')} AS timestamp,
+           dex_name, token_pair, spot_price, fee_percentage, buy_price, sell_price
+    FROM latest_prices
+    ORDER BY dex_name, token_pair
+'''
+
+
+def build_stream_query(after_id, dex_names=None, limit=500):
+    """Builds the /stream query: rows stored after `after_id`, oldest first, optionally for some DEXes only."""
+    query = 'SELECT id, timestamp, dex_name, token_pair, spot_price, fee_percentage, buy_price, sell_price FROM hype_prices WHERE id > ?'
+    params = [after_id]
+    if dex_names:
+        # The unary + keeps SQLite walking the rowid range instead of the dex index (which would need a sort)
+        query += f" AND +dex_name IN ({', '.join('?' for _ in dex_names)})"
+        params.extend(dex_names)
+    query += ' ORDER BY id LIMIT ?'
+    params.append(limit)
+    return query, params
+
+
+# Columns returned by /data, in order (also the CSV header of the streaming export)
+DATA_COLUMNS = ['timestamp', 'dex_name', 'token_pair', 'spot_price', 'fee_percentage', 'buy_price', 'sell_price']
+
+
+def build_data_query(dex_names=None, limit=None, before=None, start=None, end=None):
+    """
+    Builds the /data query and its parameters.
+
+    Rows come newest first, ordered by (ts, id) so every row has a unique
+    position. `before` is a (ts, id) cursor: only rows strictly older than it
+    are returned, which keeps deep pages as cheap as the first. `start` / `end`
+    are inclusive epoch-millisecond bounds. The row id and ts are selected
+    after DATA_COLUMNS so the caller can build the next cursor.
+    """
+    query = 'SELECT timestamp, dex_name, token_pair, spot_price,fee_percentage,buy_price,sell_price, id, ts FROM hype_prices'
+    conditions = []
+    params = []
+
+    if dex_names and len(dex_names) == 1:
+        conditions.append('dex_name = ?')
+        params.append(dex_names[0])
+    elif dex_names:
+        # Several DEXes: walk the ts index and filter, rather than merge-sorting every DEX's rows.
+        # The unary + keeps SQLite off the dex index (see build_stream_query)
+        conditions.append(f"+dex_name IN ({', '.join('?' for _ in dex_names)})")
+        params.extend(dex_names)
+
+    if start is not None:
+        conditions.append('ts >= ?')
+        params.append(start)
+    if end is not None:
+        conditions.append('ts <= ?')
+        params.append(end)
+
+    if before:
+        conditions.append('(ts, id) < (?, ?)')
+        params.extend(before)
+
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+
+    query += ' ORDER BY ts DESC, id DESC'
+
+    if limit:
+        query += ' LIMIT ?'
+        params.append(limit)
+    return query, params
+
+
+def _downsample_filter(dex_names, start, end):
+    """The WHERE clause and parameters shared by the /data?max_points queries on price_history."""
+    where = 'ts >= ? AND ts <= ?'
+    params = [start if start is not None else 0, end if end is not None else 2 ** 63 - 1]
+    if dex_names:
+        where += f" AND dex_id IN (SELECT id FROM dex WHERE name IN ({', '.join('?' for _ in dex_names)}))"
+        params.extend(dex_names)
+    return where, params
+
+
+def build_downsample_query(dex_names=None, start=None, end=None, limit=None):
+    """
+    Builds the query /data?max_points reads before downsampling (see downsample.py).
+
+    Only what LTTB needs is read, straight from price_history, so no names are
+    joined and no timestamps formatted for the rows that get thrown away.
+    Rows come in index order; downsample_ids() sorts them per series.
+    """
+    where, params = _downsample_filter(dex_names, start, end)
+    query = f'SELECT id, ts, dex_id, pair_id, spot_price FROM price_history WHERE {where}'
+    if limit:
+        query += ' LIMIT ?'
+        params.append(limit)
+    return query, params
+
+
+def build_downsample_count_query(dex_names=None, start=None, end=None, cap=None):
+    """
+    Builds a count of the rows build_downsample_query() would read, stopping at `cap`
+    so a huge range costs no more than `cap` index entries to size up.
+    """
+    where, params = _downsample_filter(dex_names, start, end)
+    params.append(cap if cap is not None else -1)
+    return f'SELECT COUNT(*) FROM (SELECT 1 FROM price_history WHERE {where} LIMIT ?)', params
+
+
+# Bounds of the stored history; each subquery is a single lookup at one end of the ts index
+HISTORY_SPAN_QUERY = 'SELECT (SELECT MIN(ts) FROM price_history), (SELECT MAX(ts) FROM price_history)'
+
+DEX_NAMES_QUERY = 'SELECT name FROM dex'
+
+
+def build_rollup_downsample_query(interval, dex_names, start, end):
+    """
+    Builds the query /data?max_points falls back to for ranges too long to read row by row:
+    one point per price_ohlc bucket, with the bucket's closing prices.
+
+    Each point is placed at the bucket's last sample (last_timestamp, converted to epoch
+    ms here, like migration 9 converted the history) and carries the pair's current fee
+    from latest_prices, since the rollups do not keep fees. The rows have the DATA_COLUMNS
+    and ts, in no particular order.
+
+    Args:
+        interval (str): One of rollups.INTERVALS.
+        dex_names (list): The DEXes to read. Always given explicitly, so each one is a
+                          range of the primary key (interval, dex_name, bucket_start).
+        start / end (int): Inclusive epoch-millisecond bounds.
+    """
+    # bucket_start is local-time text; the bucket holding `start` begins up to one interval earlier
+    first_bucket = bucket_start(datetime.fromtimestamp(start / 1000), interval)
+    last_bucket = datetime.fromtimestamp(end / 1000).strftime('%Y-%m-%d %H:%M:%S')
+    query = f'''
+        SELECT {TIMESTAMP_TEXT_SQL.format(column='ts')} AS timestamp,
+               dex_name, token_pair, spot_price, fee_percentage, buy_price, sell_price, ts
+        FROM (
+            SELECT o.dex_name AS dex_name, o.token_pair AS token_pair,
+                   o.spot_close AS spot_price, l.fee_percentage AS fee_percentage,
+                   o.buy_close AS buy_price, o.sell_close AS sell_price,
+                   CAST(ROUND((julianday(o.last_timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER) AS ts
+            FROM price_ohlc o
+            LEFT JOIN latest_prices l ON l.dex_name = o.dex_name AND l.token_pair = o.token_pair
+            WHERE o.interval = ? AND o.dex_name IN ({', '.join('?' for _ in dex_names)})
+              AND o.bucket_start >= ? AND o.bucket_start <= ?
+        )
+        WHERE ts >= ? AND ts <= ?
+    '''
+    return query, [interval, *dex_names, first_bucket, last_bucket, start, end]
+
+
+# The full /data rows of the ids downsampling kept, passed as one JSON array parameter
+DOWNSAMPLED_ROWS_QUERY = '''
+    SELECT timestamp, dex_name, token_pair, spot_price, fee_percentage, buy_price, sell_price, id, ts
+    FROM hype_prices
+    WHERE id IN (SELECT value FROM json_each(?))
+'''
+
+
+def parse_cursor(value):
+    """
+    Parses a '<ts>,<id>' pagination cursor into (epoch ms, id). Raises ValueError if it is malformed.
+
+    Cursors handed out before migration 9 carry a timestamp text instead of ts and are still accepted.
+    """
+    timestamp, _, row_id = value.rpartition(',')
+    if not timestamp:
+        raise ValueError(f"Invalid cursor '{value}'")
+    ts = int(timestamp) if timestamp.isdigit() else to_epoch_ms(timestamp)
+    return ts, int(row_id)
+
+
+def to_epoch_ms(timestamp):
+    """
+    Converts a datetime or ISO text to the epoch milliseconds price_history stores.
+    Naive values are local time, like the datetime.now() the scrapers stamp rows with.
+    """
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return round(timestamp.timestamp() * 1000)
+
+
+# (name, sql, params) for every query the API runs, used by `python migrations.py --explain`
+API_QUERY_PLANS = [
+    ('/lastest_data', LATEST_PRICE_QUERY, []),
+    ('/latest_prices', LATEST_PRICES_QUERY, []),
+    ('/data', *build_data_query()),
+    ('/data?limit', *build_data_query(limit=30)),
+    ('/data?dex_name', *build_data_query(dex_names=['Upheaval'])),
+    ('/data?dex_name&limit', *build_data_query(dex_names=['Upheaval'], limit=30)),
+    ('/data?dex_name (several)&limit', *build_data_query(dex_names=['Upheaval', 'Project X'], limit=30)),
+    ('/data?from&to', *build_data_query(start=1735689600000, end=1736294400000)),
+    ('/data?dex_name&from&to', *build_data_query(dex_names=['Upheaval'], start=1735689600000, end=1736294400000)),
+    ('/data?dex_name (several)&from&to', *build_data_query(dex_names=['Upheaval', 'Project X'], start=1735689600000, end=1736294400000)),
+    ('/data?before', *build_data_query(limit=30, before=(1735689600000, 100))),
+    ('/data?dex_name&before', *build_data_query(dex_names=['Upheaval'], limit=30, before=(1735689600000, 100))),
+    ('/data?max_points', *build_downsample_query(start=1735689600000, end=1736294400000)),
+    ('/data?dex_name (several)&max_points', *build_downsample_query(['Upheaval', 'Project X'], 1735689600000, 1736294400000)),
+    ('/data?max_points count', *build_downsample_count_query(['Upheaval'], 1735689600000, 1736294400000, 200000)),
+    ('/data?max_points rows', DOWNSAMPLED_ROWS_QUERY, ['[1, 2, 3]']),
+    ('/data?max_points span', HISTORY_SPAN_QUERY, []),
+    ('/data?max_points (long range)', *build_rollup_downsample_query('1h', ['Upheaval', 'Project X'], 1735689600000, 1767225600000)),
+    ('/stream', *build_stream_query(100)),
+    ('/stream?dex_name', *build_stream_query(100, ['Upheaval', 'Project X'])),
+    ('/ohlc', OHLC_QUERY, ['1h', 'Upheaval', '2025-01-01 00:00:00', '2025-02-01 00:00:00']),
+    ('/add_scrap_pool duplicate check', "SELECT id FROM monitored_pools WHERE lower(pool_address) = lower(?)", ['0x0']),
+]
+
+
+def get_data_generation(conn):
+    """
+    Returns (generation, updated_at) of the price data.
+
+    The generation goes up by one every time PriceWriter commits new prices,
+    so anything derived from the data (like cached API responses) is still
+    valid as long as the generation has not changed. updated_at is a Unix time.
+    """
+    row = conn.execute("SELECT generation, updated_at FROM data_generation WHERE id = 1").fetchone()
+    return (row[0], row[1]) if row else (0, 0.0)
+
+
+# Notified after every PriceWriter commit, so in-process readers (the /stream feed) wake up immediately
+_commit_condition = threading.Condition()
+
+
+def wait_for_commit(timeout):
+    """Blocks until a PriceWriter in this process commits, or the timeout passes. Returns True on a commit."""
+    with _commit_condition:
+        return _commit_condition.wait(timeout)
+
+
+def connect(db_path=DB_PATH, check_same_thread=True):
+    """Opens a connection to the database with the tuning pragmas applied."""
+    conn = sqlite3.connect(db_path, timeout=5, check_same_thread=check_same_thread)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class PriceWriter:
+    """
+    Buffers scraped prices and writes them to price_history in one transaction.
+    The same transaction upserts latest_prices and the price_ohlc rollups, so
+    neither ever lags the history, and bumps the data generation.
+
+    The writer keeps one long-lived connection, so a scrape job costs a single
+    executemany + commit (one fsync) no matter how many pools it scraped.
+    It is safe to share between threads.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        # name -> id of the dex / pair dimension rows, so steady-state flushes skip the lookups
+        self._dimension_ids = {'dex': {}, 'pair': {}}
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = connect(self.db_path, check_same_thread=False)
+        return self._conn
+
+    def add(self, dex_name, token_pair, data, timestamp=None):
+        """Queues one price record. Nothing is written until flush()."""
+        row = (
+            timestamp or datetime.now(),
+            dex_name,
+            token_pair,
+            data.get('spot_price'),
+            data.get('fee_percentage'),
+            data.get('buy_price'),
+            data.get('sell_price')
+        )
+        with self._lock:
+            self._buffer.append(row)
+
+    def _resolve_ids(self, conn, table, names):
+        """
+        Returns {name: id} for the names, adding the ones the dex / pair table does not have yet.
+        New ids only reach the cache once the caller's transaction commits (see flush()).
+        """
+        ids = dict(self._dimension_ids[table])
+        missing = {name for name in names if name not in ids}
+        if missing:
+            conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(name,) for name in missing])
+            for name in missing:
+                ids[name] = conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+        return ids
+
+    @track_flush
+    def flush(self):
+        """
+        Writes every buffered record in one transaction and returns how many were written.
+        If the transaction fails (e.g. the database is locked), the records stay buffered.
+        """
+        with self._lock:
+            if not self._buffer:
+                return 0
+            rows, self._buffer = self._buffer, []
+            conn = self._connection()
+            try:
+                with conn:  # commits on success, rolls back on error
+                    dex_ids = self._resolve_ids(conn, 'dex', {row[1] for row in rows})
+                    pair_ids = self._resolve_ids(conn, 'pair', {row[2] for row in rows})
+                    stamps = [to_epoch_ms(row[0]) for row in rows]
+                    conn.executemany('''
+                    INSERT INTO price_history (ts, dex_id, pair_id, spot_price, fee_percentage, buy_price, sell_price)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', [
+                        (ts, dex_ids[dex_name], pair_ids[token_pair], spot, fee, buy, sell)
+                        for ts, (_, dex_name, token_pair, spot, fee, buy, sell) in zip(stamps, rows)
+                    ])
+                    # AUTOINCREMENT ids in one transaction are consecutive, so they can be derived from the last one
+                    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                    latest_rows = [
+                        (dex_name, token_pair, last_id - len(rows) + 1 + i, ts, spot, fee, buy, sell)
+                        for i, (ts, (_, dex_name, token_pair, spot, fee, buy, sell)) in enumerate(zip(stamps, rows))
+                    ]
+
+                    # Only move a pair forward in time, in case an older row is flushed late
+                    conn.executemany('''
+                    INSERT INTO latest_prices (dex_name, token_pair, price_id, ts, spot_price, fee_percentage, buy_price, sell_price)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (dex_name, token_pair) DO UPDATE SET
+                        price_id = excluded.price_id,
+                        ts = excluded.ts,
+                        spot_price = excluded.spot_price,
+                        fee_percentage = excluded.fee_percentage,
+                        buy_price = excluded.buy_price,
+                        sell_price = excluded.sell_price
+                    WHERE excluded.ts >= latest_prices.ts
+                    ''', latest_rows)
+
+                    update_rollups(conn, rows)
+
+                    # Readers (e.g. the API's response cache) watch this to know the data changed
+                    conn.execute(
+                        "UPDATE data_generation SET generation = generation + 1, updated_at = ? WHERE id = 1",
+                        (time.time(),)
+                    )
+                self._dimension_ids = {'dex': dex_ids, 'pair': pair_ids}
+            except sqlite3.Error as e:
+                # Nothing was written; put the rows back in front of anything queued since, so the next flush retries them
+                self._buffer = rows + self._buffer
+                logging.error(f"-> Error storing {len(rows)} price records (kept for the next flush): {e}")
+                raise
+
+        with _commit_condition:
+            _commit_condition.notify_all()
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Returns the process-wide PriceWriter, so its connection is reused across scrape jobs."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = PriceWriter()
+        return _writer
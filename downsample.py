@@ -0,0 +1,139 @@
+# downsample.py (Server-side thinning of price history for charts)
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling for /data?max_points=N.
+
+LTTB keeps the first and last point of a series and splits the rest into
+N - 2 buckets. From each bucket it keeps the point that forms the largest
+triangle with the point kept from the previous bucket and the average of the
+next bucket, so spikes and turning points survive while flat stretches are
+thinned out. A chart drawn from the result looks like one drawn from every row.
+
+The triangle areas of a bucket are computed in one NumPy operation; only the
+walk from bucket to bucket is a Python loop, because each bucket depends on the
+point chosen in the one before it. The rows are read straight into a
+preallocated structured array (fetch_records), so a range costs 32 bytes per
+row rather than a list of tuples. NumPy is imported on first use so the API
+starts without it.
+"""
+
+# Smallest useful max_points: the first point, the last point and one bucket in between
+MIN_POINTS = 3
+
+# One row of db.build_downsample_query(): 32 bytes, instead of ~200 for a tuple of Python objects
+RECORD_DTYPE = [('id', '<i8'), ('ts', '<i8'), ('dex_id', '<i4'), ('pair_id', '<i4'), ('spot', '<f8')]
+
+
+def lttb(x, y, threshold):
+    """
+    Picks the points of one series that LTTB keeps.
+
+    Args:
+        x (numpy.ndarray): The x values (timestamps), sorted ascending.
+        y (numpy.ndarray): The y values (prices), same length as x.
+        threshold (int): How many points to keep, at least MIN_POINTS.
+
+    Returns:
+        numpy.ndarray: The indices of the kept points, ascending.
+    """
+    import numpy as np
+
+    n = len(x)
+    if n <= threshold:
+        return np.arange(n)
+
+    # threshold - 2 buckets over the interior points 1 .. n-2; bucket i is edges[i]:edges[i+1]
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    interior = slice(1, n - 1)
+    # The average point of every bucket, all at once; a bucket's "next" is the following bucket's
+    # average, and the last bucket's is the final point itself
+    avg_x = np.add.reduceat(x[interior], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[interior], edges[:-1] - 1) / counts
+    next_x = np.append(avg_x[1:], x[n - 1])
+    next_y = np.append(avg_y[1:], y[n - 1])
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the triangle area (a, candidate, next average); the factor does not change the argmax
+        areas = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(areas))
+        kept[i + 1] = a
+    return kept
+
+
+def fetch_records(cursor, count, chunk_size=50000):
+    """
+    Reads the rows of an executed build_downsample_query() into a NumPy array.
+
+    The array is allocated once for `count` rows and filled chunk by chunk
+    with fetchmany(), so at most chunk_size rows exist as Python tuples at a time.
+
+    Returns:
+        numpy.ndarray: A structured array with RECORD_DTYPE, at most `count` long.
+    """
+    import numpy as np
+
+    records = np.empty(count, dtype=RECORD_DTYPE)
+    filled = 0
+    while filled < count:
+        chunk = cursor.fetchmany(min(chunk_size, count - filled))
+        if not chunk:
+            break
+        records[filled:filled + len(chunk)] = np.fromiter(chunk, dtype=records.dtype, count=len(chunk))
+        filled += len(chunk)
+    return records[:filled]
+
+
+def downsample_series(series, x, y, max_points, tiebreak=None):
+    """
+    Runs LTTB on every series in the arrays.
+
+    Args:
+        series (numpy.ndarray): An integer series key per point (e.g. the DEX / token pair).
+        x (numpy.ndarray): The timestamps, in any order.
+        y (numpy.ndarray): The prices.
+        max_points (int): The most points to keep per series.
+        tiebreak (numpy.ndarray): Orders points with the same timestamp (e.g. the row id).
+
+    Returns:
+        numpy.ndarray: The indices of the points to keep.
+    """
+    import numpy as np
+
+    if len(x) == 0:
+        return np.empty(0, dtype=np.int64)
+    # Group the points by series, each series in time order
+    keys = (x, series) if tiebreak is None else (tiebreak, x, series)
+    order = np.lexsort(keys)
+    starts = np.flatnonzero(np.diff(series[order]) != 0) + 1
+    bounds = np.concatenate(([0], starts, [len(order)]))
+
+    kept = []
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        points = order[start:end]
+        kept.append(points[lttb(x[points], y[points], max_points)])
+    return np.concatenate(kept)
+
+
+def downsample_ids(records, max_points):
+    """
+    Runs LTTB on the spot price of every (DEX, token pair) series in `records`.
+
+    Args:
+        records (numpy.ndarray): Rows from fetch_records(), in any order.
+        max_points (int): The most points to keep per series.
+
+    Returns:
+        list: The ids of the rows to return.
+    """
+    import numpy as np
+
+    series = (records['dex_id'].astype(np.int64) << 32) | records['pair_id']
+    # Ties broken by id, like /data
+    kept = downsample_series(series, records['ts'], records['spot'], max_points, tiebreak=records['id'])
+    return records['id'][kept].tolist()
@@ -0,0 +1,200 @@
+# jobs.py (Manual scrape jobs, run by the scheduler leader)
+"""
+Queues manually triggered scrape jobs for the scheduler leader and keeps their status.
+
+POST /run_scraper only enqueues a job and returns its id; GET /jobs/<id>
+reports its status, timings and the outcome of every pool. While a job is
+queued or running, another trigger gets that job's id back instead of
+starting a second one.
+
+Jobs live in the scrape_jobs table (migration 10), not in memory, so every
+API process (e.g. each gunicorn worker) sees the same jobs: a job started by
+one worker can be polled through any other, and the "one active job" check
+holds across processes. The check and the insert run in one IMMEDIATE
+transaction, and a unique index on the active job backs it up.
+
+The API never scrapes for a job itself. The process holding the scheduler's
+leader lock (worker.py, or api.py --with-scheduler) picks the queued job up
+on its next tick with run_next() and runs it before the due pools (see
+pool_scheduler.run_tick), so a manual job never overlaps a scheduled scrape,
+whichever process it was triggered from.
+"""
+import json
+import time
+import uuid
+import logging
+
+from db import DB_PATH, connect
+
+# Finished jobs kept for /jobs/<id>; the oldest are deleted first
+MAX_FINISHED_JOBS = 100
+
+# A job still queued or running this long after it was created was never picked up (no worker
+# is running) or its worker died. It is marked failed so it stops blocking new triggers
+# (well past main.JOB_TIMEOUT_SECONDS plus a scheduler tick).
+STALE_JOB_SECONDS = 300
+
+JOB_COLUMNS = ['id', 'status', 'created_at', 'started_at', 'finished_at', 'wall_seconds', 'error', 'summary', 'pools']
+
+_ACTIVE = "status IN ('queued', 'running')"
+
+# Conditional insert: a no-op while another job is queued or running
+_INSERT_IF_IDLE_SQL = f'''
+    INSERT INTO scrape_jobs (id, status, created_at)
+    SELECT ?, 'queued', ?
+    WHERE NOT EXISTS (SELECT 1 FROM scrape_jobs WHERE {_ACTIVE})
+'''
+
+_EXPIRE_STALE_SQL = f'''
+    UPDATE scrape_jobs SET status = 'failed', finished_at = ?, error = 'Abandoned: no scheduler leader ran the job to the end.'
+    WHERE {_ACTIVE} AND created_at < ?
+'''
+
+_DELETE_OLD_SQL = '''
+    DELETE FROM scrape_jobs
+    WHERE finished_at IS NOT NULL AND id NOT IN (
+        SELECT id FROM scrape_jobs WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?
+    )
+'''
+
+
+class JobManager:
+    """Queues jobs in scrape_jobs (any process) and runs the queued one (the scheduler leader)."""
+
+    def __init__(self, db_path=DB_PATH, max_finished=MAX_FINISHED_JOBS):
+        self.db_path = db_path
+        self._max_finished = max_finished
+
+    def submit(self):
+        """
+        Enqueues a job unless one is already queued or running (in any process).
+
+        Returns:
+            tuple: (job dict, created) where created is False if the job
+                   returned is the one that was already active.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = connect(self.db_path)
+        # BEGIN IMMEDIATE takes the write lock up front, so two processes cannot both see "no active job"
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(_EXPIRE_STALE_SQL, (now, now - STALE_JOB_SECONDS))
+                created = conn.execute(_INSERT_IF_IDLE_SQL, (job_id, now)).rowcount == 1
+                if created:
+                    conn.execute(_DELETE_OLD_SQL, (self._max_finished,))
+                job = _job_from_row(conn.execute(
+                    f"SELECT {', '.join(JOB_COLUMNS)} FROM scrape_jobs WHERE {_ACTIVE}").fetchone())
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        return job, created
+
+    def get(self, job_id):
+        """Returns the job, or None if it is unknown (or was deleted)."""
+        conn = connect(self.db_path)
+        try:
+            row = conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM scrape_jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return _job_from_row(row) if row else None
+
+    def _update(self, job_id, **fields):
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    f"UPDATE scrape_jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?",
+                    (*fields.values(), job_id))
+        finally:
+            conn.close()
+
+    def _claim_next(self):
+        """Marks the queued job as running and returns its id, or None if nothing is queued."""
+        conn = connect(self.db_path)
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT id FROM scrape_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+                if row:
+                    conn.execute("UPDATE scrape_jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row[0]))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def run_next(self, job_fn):
+        """
+        Runs the queued job, if there is one, and records its outcome.
+        Only the scheduler leader calls this, between its scheduled scrapes.
+
+        Args:
+            job_fn: Runs the scrape and returns main.run_scrape_job's per-pool results (main.main).
+
+        Returns:
+            str: The id of the job that ran, or None if nothing was queued.
+        """
+        job_id = self._claim_next()
+        if job_id is None:
+            return None
+
+        logging.info(f"--- Running manual scrape job {job_id} ---")
+        started = time.monotonic()
+        try:
+            results = job_fn()
+            pools, summary, error = _pool_outcomes(results), _summarize(results), None
+        except Exception as e:
+            logging.error(f"Scrape job {job_id} failed: {e}")
+            pools, summary, error = [], None, str(e)
+
+        try:
+            self._update(
+                job_id,
+                status='failed' if error else 'succeeded',
+                finished_at=time.time(),
+                wall_seconds=round(time.monotonic() - started, 3),
+                error=error,
+                summary=json.dumps(summary) if summary is not None else None,
+                pools=json.dumps(pools),
+            )
+        except Exception as e:
+            # The job stays 'running' until STALE_JOB_SECONDS expires it
+            logging.error(f"Could not record the outcome of scrape job {job_id}: {e}")
+        return job_id
+
+
+def _job_from_row(row):
+    job = dict(zip(JOB_COLUMNS, row))
+    job['summary'] = json.loads(job['summary']) if job['summary'] else None
+    job['pools'] = json.loads(job['pools']) if job['pools'] else []
+    return job
+
+
+def _pool_outcomes(results):
+    """The per-pool part of a job's status: what happened to each pool and how long it took."""
+    return [
+        {
+            'dex_name': result['pool']['dex_name'],
+            'pool_address': result['pool']['pool_address'],
+            'status': result['status'],
+            'error': result['error'],
+            'elapsed': round(result['elapsed'], 3) if result['elapsed'] is not None else None,
+        }
+        for result in results
+    ]
+
+
+def _summarize(results):
+    summary = {'pools': len(results), 'ok': 0, 'failed': 0, 'error': 0, 'timeout': 0}
+    for result in results:
+        summary[result['status']] += 1
+    return summary
@@ -0,0 +1,120 @@
+# leader.py (Leader election for the scheduler)
+"""
+Makes sure only one process runs the scrape scheduler.
+
+Two interchangeable locks:
+
+- FileLeaderLock: an exclusive flock() on a lock file next to the database.
+  The kernel drops it when the process exits, however it exits, so a crashed
+  leader never blocks a successor. POSIX only.
+- SqliteLeaderLease: a lease row in the scheduler_lease table (migration 8)
+  that the leader renews every tick. If the leader dies, another process
+  takes over once the lease expires (LEASE_SECONDS). Works wherever SQLite does.
+
+Both offer acquire() (non-blocking, True if we are the leader), renew() (True
+while we still are) and release().
+"""
+import os
+import time
+import uuid
+import socket
+import logging
+
+from db import DB_PATH, connect
+
+# Default lock file: one leader per database file on this host
+LOCK_PATH = DB_PATH + '.scheduler.lock'
+
+# A lease not renewed for this long is considered abandoned.
+# It is renewed between scheduler ticks, so it must outlast the longest job (main.JOB_TIMEOUT_SECONDS).
+LEASE_SECONDS = 120
+
+
+class FileLeaderLock:
+    def __init__(self, path=LOCK_PATH):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        import fcntl
+
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Record who holds it, for whoever is debugging a standby worker
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{socket.gethostname()} pid {os.getpid()}\n")
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def renew(self):
+        # flock() is held for as long as the file stays open
+        return self._file is not None
+
+    def release(self):
+        if self._file is not None:
+            import fcntl
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class SqliteLeaderLease:
+    def __init__(self, db_path=DB_PATH, lease_seconds=LEASE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._held = False
+
+    def _claim(self, only_if_held):
+        now = time.time()
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                if only_if_held:
+                    cursor = conn.execute(
+                        "UPDATE scheduler_lease SET expires_at = ? WHERE id = 1 AND holder = ?",
+                        (now + self.lease_seconds, self.holder))
+                else:
+                    cursor = conn.execute(
+                        "UPDATE scheduler_lease SET holder = ?, expires_at = ? WHERE id = 1 AND (holder = ? OR expires_at < ?)",
+                        (self.holder, now + self.lease_seconds, self.holder, now))
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def acquire(self):
+        self._held = self._claim(only_if_held=False)
+        return self._held
+
+    def renew(self):
+        try:
+            self._held = self._held and self._claim(only_if_held=True)
+        except Exception as e:
+            logging.error(f"Could not renew the scheduler lease: {e}")
+            self._held = False
+        return self._held
+
+    def release(self):
+        if self._held:
+            conn = connect(self.db_path)
+            try:
+                with conn:
+                    conn.execute("UPDATE scheduler_lease SET expires_at = 0 WHERE id = 1 AND holder = ?", (self.holder,))
+            finally:
+                conn.close()
+            self._held = False
+
+
+def make_lock(kind='file'):
+    """Returns the leader lock for --lock file|sqlite."""
+    if kind == 'sqlite':
+        return SqliteLeaderLease()
+    return FileLeaderLock()
@@ -1,53 +1,44 @@
 #run once and then exit
 
 # main.py (The Worker)
-import os
 import sqlite3
+import time
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-from scraper import scrape_gecko_terminal_pool, scrape_hyperliquid_native
+# Scrapers are looked up by the scraper_function column and only imported when first used
+from scraper import SCRAPER_REGISTRY, get_scraper
 from scraper.exceptions import ScrapingError
+from scraper import http_client
 
-# This gets the directory where the main.py script itself is located
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(SCRIPT_DIR, 'prices.db') # Joins the directory path and the filename
+# The database path and connection handling live in db.py (shared with the API)
+from db import DB_PATH, connect, get_writer
+from metrics import track_job, track_scraper
+
+# --- Concurrency Settings ---
+# How many pools are scraped at the same time
+MAX_WORKERS = 8
+# A single pool that takes longer than this is marked as timed out and its result is dropped
+POOL_TIMEOUT_SECONDS = 20
+# The whole job must finish within this, so it never overlaps the 1-minute scheduler interval
+JOB_TIMEOUT_SECONDS = 50
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def store_price_data(dex_name, token_pair, data):
-    """Inserts a new price record into the SQLite database using an absolute path."""
-    # Connect to the database using the absolute DB_PATH
-    conn = sqlite3.connect(DB_PATH) 
-    cursor = conn.cursor()
-    
-    timestamp = datetime.now()
-    
-    
+    """Inserts a single price record right away (the scrape job itself batches through the writer)."""
+    writer = get_writer()
     try:
-        cursor.execute('''
-        INSERT INTO hype_prices (timestamp, dex_name, token_pair, spot_price, fee_percentage, buy_price, sell_price)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            timestamp, 
-            dex_name, 
-            token_pair, 
-            data.get('spot_price'),
-            data.get('fee_percentage'),
-            data.get('buy_price'),
-            data.get('sell_price')
-        ))
-        
-        conn.commit()
+        writer.add(dex_name, token_pair, data)
+        writer.flush()
         logging.info(f"-> Successfully stored: {dex_name} | {token_pair} | Spot Price=${data.get('spot_price'):.4f}")
     except Exception as e:
         logging.error(f"-> Error storing data: {e}")
-    finally:
-        conn.close()
 
 def getting_pools_to_scrape():
     """Fetches the list of pools to scrape from the monitored_pools table."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     # This allows us to access columns by name (row['dex_name'])
     conn.row_factory = sqlite3.Row 
     cursor = conn.cursor()
@@ -64,48 +55,198 @@ def getting_pools_to_scrape():
     finally:
         conn.close()
 
-def main():
-    """Main function to run the scraping job."""
+def _scrape_batch(task_pools):
+    """Task function: runs the registered batch scraper for pools that share a scraper_function and network."""
+    scraper_function = task_pools[0]['scraper_function']
+    try:
+        batch_scraper, _ = get_scraper(scraper_function)
+    except KeyError:
+        raise ScrapingError(f"Unknown scraper_function '{scraper_function}'")
+    batch_scraper = track_scraper(scraper_function, batch_scraper)
+
+    if len(task_pools) > 1:
+        print(f"\n--- Scraping {', '.join(pool['dex_name'] for pool in task_pools)} ---")
+    by_address = batch_scraper(task_pools)
+    return [by_address.get(pool['pool_address'].lower()) for pool in task_pools]
+
+def plan_scrape_tasks(pools):
+    """
+    Splits the pools into units of work for the thread pool.
+
+    Pools are grouped by (scraper_function, network) and each group is cut into
+    chunks of the scraper's batch size from SCRAPER_REGISTRY, so e.g. a chunk of
+    GeckoTerminal pools costs one multi-pool request and a chunk of on-chain
+    V3/Algebra pools costs one Multicall eth_call.
+
+    Returns:
+        list: (indices into `pools`, task function) tuples.
+    """
+    groups = {}
+    for index, pool in enumerate(pools):
+        groups.setdefault((pool['scraper_function'], pool['network']), []).append(index)
+
+    tasks = []
+    for (scraper_function, _), indices in groups.items():
+        # Unknown scraper_functions still get a task, which then fails with a clear error
+        batch_size = SCRAPER_REGISTRY.get(scraper_function, (None, None, 1))[2]
+        for i in range(0, len(indices), batch_size):
+            tasks.append((indices[i:i + batch_size], _scrape_batch))
+    return tasks
+
+def _timed_task(task_fn, task_pools, task_index, started_at):
+    """Worker wrapper: runs one task and reports how long it took."""
+    started = time.monotonic()
+    # Published so the job loop can enforce the per-pool deadline while this is still running
+    started_at[task_index] = started
+    try:
+        price_data = task_fn(task_pools)
+        error = None
+    except Exception as e:
+        price_data = [None] * len(task_pools)
+        error = e
+    return price_data, error, time.monotonic() - started
+
+def run_scrape_job(pools, max_workers=MAX_WORKERS, pool_timeout=POOL_TIMEOUT_SECONDS, job_timeout=JOB_TIMEOUT_SECONDS):
+    """
+    Scrapes the given pools concurrently and collects one result per pool.
+
+    Every task (a single pool, or one batched GeckoTerminal request) gets its
+    own deadline (pool_timeout, counted from when it starts) and the job as a
+    whole has a deadline (job_timeout). Pools that miss a deadline are reported
+    as 'timeout' instead of holding up the others.
+
+    Returns:
+        list: One dict per pool, in the same order as `pools`, with the keys
+              'pool', 'status' ('ok', 'failed', 'error' or 'timeout'),
+              'data', 'error', 'error_class' (the exception's class name)
+              and 'elapsed' (seconds).
+    """
+    job_deadline = time.monotonic() + job_timeout
+    results = [None] * len(pools)
+    tasks = plan_scrape_tasks(pools)
+    started_at = {}
+
+    # The executor is shut down with wait=False so a hanging upstream call never blocks the job
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='scrape')
+    try:
+        futures = {}
+        for task_index, (indices, task_fn) in enumerate(tasks):
+            task_pools = [pools[index] for index in indices]
+            future = executor.submit(_timed_task, task_fn, task_pools, task_index, started_at)
+            futures[future] = task_index
+        pending = set(futures)
+
+        while pending:
+            now = time.monotonic()
+            if now >= job_deadline:
+                break
+
+            # Give up on tasks that have been running for longer than their own deadline
+            for future in list(pending):
+                task_index = futures[future]
+                if task_index in started_at and now - started_at[task_index] > pool_timeout:
+                    pending.discard(future)
+
+            # Wake up when a task finishes, or after a short while to re-check the deadlines
+            done, pending = wait(pending, timeout=min(job_deadline - now, 1.0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                indices, _ = tasks[futures[future]]
+                task_data, error, elapsed = future.result()
+                for index, price_data in zip(indices, task_data):
+                    if elapsed > pool_timeout:
+                        status = 'timeout'
+                    elif error is not None:
+                        status = 'error'
+                    elif price_data:
+                        status = 'ok'
+                    else:
+                        status = 'failed'
+                    results[index] = {
+                        'pool': pools[index],
+                        'status': status,
+                        'data': price_data if status == 'ok' else None,
+                        'error': str(error) if error is not None else None,
+                        'error_class': type(error).__name__ if error is not None else None,
+                        'elapsed': elapsed,
+                    }
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Anything still without a result missed a deadline
+    for task_index, (indices, _) in enumerate(tasks):
+        for index in indices:
+            if results[index] is None:
+                results[index] = {
+                    'pool': pools[index],
+                    'status': 'timeout',
+                    'data': None,
+                    'error': 'Deadline exceeded',
+                    'error_class': None,
+                    'elapsed': time.monotonic() - started_at[task_index] if task_index in started_at else None,
+                }
+    return results
+
+def store_results(results):
+    """Buffers every successful result and writes them all in one transaction. Returns the rows stored."""
+    writer = get_writer()
+    for result in results:
+        pool = result['pool']
+        price_data = result['data']
+        if price_data:
+            token_pair_name = price_data.get('pool_name', 'Unknown Pair')
+
+            writer.add(
+                dex_name=pool['dex_name'],
+                token_pair=token_pair_name,
+                data=price_data
+            )
+            logging.info(f"-> Queued: {pool['dex_name']} | {token_pair_name} | Spot Price=${price_data.get('spot_price'):.4f}")
+        elif result['status'] == 'timeout':
+            print(f"-> Skipping database insert for {pool['dex_name']}: deadline exceeded.")
+        elif result['status'] == 'error':
+            print(f"An error occurred during {pool['dex_name']} scrape: {result['error']}")
+        else:
+            print(f"-> Skipping database insert for {pool['dex_name']} due to scraping failure.")
+
+    try:
+        stored = writer.flush()
+        logging.info(f"-> Successfully stored {stored} price records in one transaction")
+        return stored
+    except Exception as e:
+        logging.error(f"-> Error storing data: {e}")
+        return 0
+
+@track_job
+def main(pools=None, max_workers=MAX_WORKERS, pool_timeout=POOL_TIMEOUT_SECONDS, job_timeout=JOB_TIMEOUT_SECONDS):
+    """
+    Main function to run the scraping job.
+
+    Args:
+        pools (list): monitored_pools rows to scrape. Defaults to every row;
+                      the adaptive scheduler passes only the pools that are due.
+    """
     logging.info(f"--- Running scrape job at {datetime.now()} ---")
+    job_started = time.monotonic()
 
-    pools_to_scrape = getting_pools_to_scrape()
+    pools_to_scrape = getting_pools_to_scrape() if pools is None else pools
     
     if not pools_to_scrape:
         logging.warning("No pools found in database to scrape.")
-        return
-
-    # --- Loop through the pools and scrape data ---
-    for pool in pools_to_scrape:
-        print(f"\n--- Scraping {pool['dex_name']} ---")
-        try:
-            if pool['scraper_function'] == 'geckoterminal':
-                price_data = scrape_gecko_terminal_pool(
-                network=pool['network'],
-                pool_address=pool['pool_address'],
-                target_token_address=pool['target_token_address'] 
-            )
-            
-            elif pool['scraper_function'] == 'hyperliquid_native':
-                # The native scraper only needs the symbol (e.g., "HYPE")
-                # We can re-use the 'target_token_address' column to store the symbol "HYPE"
-                # or just hardcode it since it's a specific scraper.
-                price_data = scrape_hyperliquid_native(target_token_symbol="HYPE")
-            
-            if price_data:
-                token_pair_name = price_data.get('pool_name', 'Unknown Pair')
-                
-                store_price_data(
-                    dex_name=pool['dex_name'],
-                    token_pair=token_pair_name,
-                    data=price_data
-                )
-            else:
-                print(f"-> Skipping database insert for {pool['dex_name']} due to scraping failure.")
-        except Exception as e:
-            print(f"An error occurred during {pool['dex_name']} scrape: {e}")
-
-    logging.info("--- Job finished ---")
+        return []
+
+    # --- Scrape all pools concurrently, then store the collected results ---
+    results = run_scrape_job(pools_to_scrape, max_workers=max_workers, pool_timeout=pool_timeout, job_timeout=job_timeout)
+    store_results(results)
+
+    # Shows how many upstream requests re-used a kept-alive connection instead of a new handshake
+    for host, stats in http_client.get_connection_stats().items():
+        logging.info(f"-> {host}: {stats['requests']} requests, {stats['new_connections']} new connections, {stats['reused_connections']} reused")
+
+    succeeded = sum(1 for result in results if result['status'] == 'ok')
+    logging.info(f"--- Job finished: {succeeded}/{len(results)} pools scraped in {time.monotonic() - job_started:.2f}s ---")
+    return results
 
 # Main execution block
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,168 @@
+# metrics.py (Prometheus metrics for the worker and the API)
+"""
+Prometheus metrics, served by the API at /metrics and by worker.py on its own
+port (--metrics-port, 9101 by default).
+
+Nothing outside this module creates metrics. The code being measured is
+hooked in once, at a single place per layer:
+
+- `track_job` decorates main.main: job wall time, plus per-pool latency and
+  outcome counters (by error class) from the results it returns;
+- `track_scraper` wraps every registered batch scraper where main resolves
+  it: latency per scraper_function and exceptions by class;
+- `track_flush` decorates db.PriceWriter.flush: insert latency and rows written;
+- `observe_scheduler_lag` is fed by pool_scheduler with how late each due pool ran;
+- `instrument_app` adds request latency per route to a Flask app and the
+  /metrics endpoint itself;
+- `register_response_cache` exports the API response cache's hit counters;
+- `start_metrics_server` serves a process without a web app (worker.py).
+
+Metrics live in the process that records them. The scrape, flush and
+scheduler series are recorded by worker.py, which runs the scrapes, so
+Prometheus has to scrape the worker's port as well as the API's /metrics
+(request latency and the response cache). With several gunicorn workers each
+worker reports its own (see prometheus_client's multiprocess mode).
+"""
+import time
+import functools
+
+from prometheus_client import Counter, Histogram, generate_latest, start_http_server, CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Scrapes range from a few ms (cached Hyperliquid snapshot) to the 20s per-pool deadline
+SCRAPE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+API_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+SCRAPER_REQUEST_SECONDS = Histogram(
+    'scraper_request_seconds', "Latency of one batch scraper call",
+    ['scraper_function'], buckets=SCRAPE_BUCKETS)
+SCRAPER_EXCEPTIONS = Counter(
+    'scraper_exceptions_total', "Batch scraper calls that raised, by exception class",
+    ['scraper_function', 'error_class'])
+POOL_SCRAPE_SECONDS = Histogram(
+    'pool_scrape_seconds', "Time taken to scrape one pool (its share of a batch task)",
+    ['scraper_function', 'dex_name'], buckets=SCRAPE_BUCKETS)
+POOL_SCRAPES = Counter(
+    'pool_scrapes_total', "Pool scrape outcomes; error_class is empty for successful scrapes",
+    ['scraper_function', 'dex_name', 'status', 'error_class'])
+JOB_SECONDS = Histogram(
+    'scrape_job_seconds', "Wall time of one scrape job (main.main)", buckets=SCRAPE_BUCKETS)
+DB_FLUSH_SECONDS = Histogram(
+    'db_flush_seconds', "Latency of one PriceWriter.flush transaction", buckets=DB_BUCKETS)
+ROWS_WRITTEN = Counter(
+    'db_rows_written_total', "Price rows committed to price_history")
+SCHEDULER_LAG_SECONDS = Histogram(
+    'scheduler_lag_seconds', "How long after its next_due_at a pool was actually scraped",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+API_REQUEST_SECONDS = Histogram(
+    'api_request_seconds', "API request latency per route",
+    ['method', 'route', 'status'], buckets=API_BUCKETS)
+
+# A pool's status, when it did not raise, mapped to its error class label
+_STATUS_ERROR_CLASS = {'ok': '', 'failed': 'NoPrice', 'timeout': 'DeadlineExceeded'}
+
+
+def track_job(job_fn):
+    """Decorator for main.main: records the job's wall time and the outcome of every pool."""
+    @functools.wraps(job_fn)
+    def wrapper(*args, **kwargs):
+        started = time.monotonic()
+        try:
+            results = job_fn(*args, **kwargs)
+        finally:
+            JOB_SECONDS.observe(time.monotonic() - started)
+        for result in results or []:
+            observe_pool_result(result)
+        return results
+    return wrapper
+
+
+def observe_pool_result(result):
+    """Records one entry of main.run_scrape_job's results."""
+    pool = result['pool']
+    labels = (pool.get('scraper_function', ''), pool.get('dex_name', ''))
+    error_class = result.get('error_class') or _STATUS_ERROR_CLASS.get(result['status'], '')
+    POOL_SCRAPES.labels(*labels, result['status'], error_class).inc()
+    if result['elapsed'] is not None:
+        POOL_SCRAPE_SECONDS.labels(*labels).observe(result['elapsed'])
+
+
+def track_scraper(scraper_function, batch_scraper):
+    """Wraps a registered batch scraper so each call is timed and exceptions are counted by class."""
+    @functools.wraps(batch_scraper)
+    def wrapper(pools):
+        started = time.monotonic()
+        try:
+            return batch_scraper(pools)
+        except Exception as e:
+            SCRAPER_EXCEPTIONS.labels(scraper_function, type(e).__name__).inc()
+            raise
+        finally:
+            SCRAPER_REQUEST_SECONDS.labels(scraper_function).observe(time.monotonic() - started)
+    return wrapper
+
+
+def track_flush(flush):
+    """Decorator for PriceWriter.flush: records the transaction's latency and the rows it wrote."""
+    @functools.wraps(flush)
+    def wrapper(*args, **kwargs):
+        started = time.monotonic()
+        stored = flush(*args, **kwargs)
+        if stored:
+            DB_FLUSH_SECONDS.observe(time.monotonic() - started)
+            ROWS_WRITTEN.inc(stored)
+        return stored
+    return wrapper
+
+
+def observe_scheduler_lag(lag_seconds):
+    SCHEDULER_LAG_SECONDS.observe(max(lag_seconds, 0))
+
+
+class _ResponseCacheCollector:
+    """Reads ResponseCache.stats() at scrape time, so the cache itself stays free of metrics code."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def collect(self):
+        stats = self.stats()
+        yield GaugeMetricFamily('api_response_cache_entries', "Responses held by the API response cache", value=stats['entries'])
+        for outcome in ('hits', 'misses', 'not_modified'):
+            yield CounterMetricFamily(f'api_response_cache_{outcome}', f"API response cache lookups: {outcome.replace('_', ' ')}", value=stats[outcome])
+
+
+def register_response_cache(cache):
+    """Exports a response_cache.ResponseCache's entry count and hit / miss / 304 counters."""
+    REGISTRY.register(_ResponseCacheCollector(cache.stats))
+
+
+def start_metrics_server(port, addr='0.0.0.0'):
+    """Serves this process's metrics at http://<addr>:<port>/metrics from a background thread."""
+    start_http_server(port, addr=addr)
+
+
+def instrument_app(app):
+    """Times every request of a Flask app per route and adds the /metrics endpoint."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.monotonic()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            # The route pattern (/jobs/<job_id>), not the path, so ids do not each get a series
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            API_REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(time.monotonic() - started)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+
+    return app
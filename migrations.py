@@ -0,0 +1,369 @@
+# migrations.py (Versioned schema changes)
+"""
+Brings prices.db up to the latest schema.
+
+Each migration has a version number and runs exactly once; the version the
+database is at is stored in SQLite's own `PRAGMA user_version`. To change the
+schema, append a new (version, description, statements) entry to MIGRATIONS,
+never edit one that has already shipped.
+
+Usage:
+    python migrations.py            # apply pending migrations
+    python migrations.py --explain  # print the query plan of every API query
+    python migrations.py --vacuum   # rewrite the file to reclaim the space freed by migrations
+"""
+import os
+import sys
+import argparse
+import logging
+
+from db import DB_PATH, connect, API_QUERY_PLANS
+
+# Tables that grow with time; a full scan of one of these is a query plan regression
+HISTORY_TABLES = ('price_history', 'price_ohlc')
+
+MIGRATIONS = [
+    (1, "Create hype_prices and monitored_pools", [
+        '''
+        CREATE TABLE IF NOT EXISTS hype_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME NOT NULL,
+            dex_name TEXT NOT NULL,
+            token_pair TEXT NOT NULL,
+            spot_price REAL NOT NULL,
+            fee_percentage REAL,
+            buy_price REAL,
+            sell_price REAL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS monitored_pools (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dex_name TEXT NOT NULL,
+            scraper_function TEXT NOT NULL,
+            network TEXT NOT NULL,
+            pool_address TEXT NOT NULL,
+            target_token_address TEXT NOT NULL
+        )
+        ''',
+    ]),
+    (2, "Index the API's hot query paths and make pool addresses unique", [
+        # /lastest_data and /data without a filter: ORDER BY timestamp DESC
+        "CREATE INDEX IF NOT EXISTS idx_hype_prices_timestamp ON hype_prices (timestamp)",
+        # /data?dex_name=...: WHERE dex_name = ? ORDER BY timestamp DESC
+        "CREATE INDEX IF NOT EXISTS idx_hype_prices_dex_timestamp ON hype_prices (dex_name, timestamp)",
+        # Older databases could hold the same pool twice; keep the first row before enforcing uniqueness
+        '''
+        DELETE FROM monitored_pools
+        WHERE id NOT IN (SELECT MIN(id) FROM monitored_pools GROUP BY lower(pool_address))
+        ''',
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_monitored_pools_address ON monitored_pools (pool_address)",
+    ]),
+    (3, "Add latest_prices, the current price per (dex_name, token_pair)", [
+        '''
+        CREATE TABLE IF NOT EXISTS latest_prices (
+            dex_name TEXT NOT NULL,
+            token_pair TEXT NOT NULL,
+            price_id INTEGER NOT NULL,
+            timestamp DATETIME NOT NULL,
+            spot_price REAL NOT NULL,
+            fee_percentage REAL,
+            buy_price REAL,
+            sell_price REAL,
+            PRIMARY KEY (dex_name, token_pair)
+        ) WITHOUT ROWID
+        ''',
+        # Seed it from the newest row of every pair already in the history
+        '''
+        INSERT OR REPLACE INTO latest_prices
+            (dex_name, token_pair, price_id, timestamp, spot_price, fee_percentage, buy_price, sell_price)
+        SELECT dex_name, token_pair, id, timestamp, spot_price, fee_percentage, buy_price, sell_price
+        FROM hype_prices
+        WHERE id IN (SELECT MAX(id) FROM hype_prices GROUP BY dex_name, token_pair)
+        ''',
+    ]),
+    (4, "Add price_ohlc, the 1m/5m/1h/1d OHLC rollups (fill with `python rollups.py backfill`)", [
+        # Keyed so /ohlc reads one DEX's buckets in time order straight off the primary key
+        '''
+        CREATE TABLE IF NOT EXISTS price_ohlc (
+            interval TEXT NOT NULL,
+            dex_name TEXT NOT NULL,
+            bucket_start DATETIME NOT NULL,
+            token_pair TEXT NOT NULL,
+            first_timestamp DATETIME NOT NULL,
+            last_timestamp DATETIME NOT NULL,
+            spot_open REAL, spot_high REAL, spot_low REAL, spot_close REAL,
+            buy_open REAL, buy_high REAL, buy_low REAL, buy_close REAL,
+            sell_open REAL, sell_high REAL, sell_low REAL, sell_close REAL,
+            sample_count INTEGER NOT NULL,
+            PRIMARY KEY (interval, dex_name, bucket_start, token_pair)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+    (5, "Add data_generation, bumped every time new prices are committed", [
+        '''
+        CREATE TABLE IF NOT EXISTS data_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        ''',
+        "INSERT OR IGNORE INTO data_generation (id, generation, updated_at) VALUES (1, 0, CAST(strftime('%s', 'now') AS REAL))",
+    ]),
+    (6, "Add per-pool polling intervals for the adaptive scheduler (see pool_scheduler.py)", [
+        # The interval a pool starts from and returns to when its price behaves normally
+        "ALTER TABLE monitored_pools ADD COLUMN base_interval_seconds REAL NOT NULL DEFAULT 60",
+        # Bounds the scheduler may move the interval between
+        "ALTER TABLE monitored_pools ADD COLUMN min_interval_seconds REAL NOT NULL DEFAULT 15",
+        "ALTER TABLE monitored_pools ADD COLUMN max_interval_seconds REAL NOT NULL DEFAULT 600",
+        # Scheduler state: the current interval, when the pool is next due (unix time),
+        # the last price seen and how many polls in a row have failed
+        "ALTER TABLE monitored_pools ADD COLUMN interval_seconds REAL NOT NULL DEFAULT 60",
+        "ALTER TABLE monitored_pools ADD COLUMN next_due_at REAL NOT NULL DEFAULT 0",
+        "ALTER TABLE monitored_pools ADD COLUMN last_spot_price REAL",
+        "ALTER TABLE monitored_pools ADD COLUMN error_streak INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_monitored_pools_next_due ON monitored_pools (next_due_at)",
+    ]),
+    (7, "Add pool_metadata, the static data of each pool (see scraper/metadata_cache.py)", [
+        '''
+        CREATE TABLE IF NOT EXISTS pool_metadata (
+            scraper_function TEXT NOT NULL,
+            network TEXT NOT NULL,
+            pool_address TEXT NOT NULL,
+            target_token_address TEXT NOT NULL,
+            target_side TEXT NOT NULL,
+            pair_name TEXT,
+            fee_percentage REAL,
+            base_token_address TEXT,
+            quote_token_address TEXT,
+            base_decimals INTEGER,
+            quote_decimals INTEGER,
+            base_symbol TEXT,
+            quote_symbol TEXT,
+            kind TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (scraper_function, network, pool_address, target_token_address)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+    (8, "Add scheduler_lease, the SQLite leader lease of the worker daemon (see leader.py)", [
+        '''
+        CREATE TABLE IF NOT EXISTS scheduler_lease (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''',
+        "INSERT OR IGNORE INTO scheduler_lease (id, holder, expires_at) VALUES (1, '', 0)",
+    ]),
+    (9, "Store the history compactly in price_history (then `python migrations.py --vacuum` to shrink the file)", [
+        # Every DEX and token pair name is stored once; history rows refer to them by a small integer
+        "CREATE TABLE IF NOT EXISTS dex (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS pair (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+        "INSERT OR IGNORE INTO dex (name) SELECT DISTINCT dex_name FROM hype_prices",
+        "INSERT OR IGNORE INTO pair (name) SELECT DISTINCT token_pair FROM hype_prices",
+        # ts is Unix time in milliseconds: 8 bytes at most instead of ~26 characters of ISO text
+        '''
+        CREATE TABLE IF NOT EXISTS price_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts INTEGER NOT NULL,
+            dex_id INTEGER NOT NULL REFERENCES dex (id),
+            pair_id INTEGER NOT NULL REFERENCES pair (id),
+            spot_price REAL NOT NULL,
+            fee_percentage REAL,
+            buy_price REAL,
+            sell_price REAL
+        )
+        ''',
+        # Row ids are kept, so /stream clients resume where they left off.
+        # The old timestamps are local time (datetime.now()), hence the 'utc' conversion.
+        '''
+        INSERT INTO price_history (id, ts, dex_id, pair_id, spot_price, fee_percentage, buy_price, sell_price)
+        SELECT h.id, CAST(ROUND((julianday(h.timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER),
+               dex.id, pair.id, h.spot_price, h.fee_percentage, h.buy_price, h.sell_price
+        FROM hype_prices h
+        JOIN dex ON dex.name = h.dex_name
+        JOIN pair ON pair.name = h.token_pair
+        ORDER BY h.id
+        ''',
+        "DROP TABLE hype_prices",
+        "CREATE INDEX IF NOT EXISTS idx_price_history_ts ON price_history (ts)",
+        "CREATE INDEX IF NOT EXISTS idx_price_history_dex_ts ON price_history (dex_id, ts)",
+        # hype_prices lives on as a view with the old columns, so the API queries and
+        # ad-hoc SQL keep working; ts is exposed too so they can sort on the index
+        '''
+        CREATE VIEW IF NOT EXISTS hype_prices AS
+        SELECT price_history.id AS id,
+               price_history.ts AS ts,
+               strftime('%Y-%m-%d %H:%M:%f', price_history.ts / 1000.0, 'unixepoch', 'localtime') AS timestamp,
+               dex.name AS dex_name,
+               pair.name AS token_pair,
+               price_history.spot_price AS spot_price,
+               price_history.fee_percentage AS fee_percentage,
+               price_history.buy_price AS buy_price,
+               price_history.sell_price AS sell_price
+        FROM price_history
+        JOIN dex ON dex.id = price_history.dex_id
+        JOIN pair ON pair.id = price_history.pair_id
+        ''',
+        # latest_prices keeps its names as the key (one row per pair), only the timestamp changes
+        '''
+        CREATE TABLE IF NOT EXISTS latest_prices_compact (
+            dex_name TEXT NOT NULL,
+            token_pair TEXT NOT NULL,
+            price_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            spot_price REAL NOT NULL,
+            fee_percentage REAL,
+            buy_price REAL,
+            sell_price REAL,
+            PRIMARY KEY (dex_name, token_pair)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT INTO latest_prices_compact
+            (dex_name, token_pair, price_id, ts, spot_price, fee_percentage, buy_price, sell_price)
+        SELECT dex_name, token_pair, price_id, CAST(ROUND((julianday(timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER),
+               spot_price, fee_percentage, buy_price, sell_price
+        FROM latest_prices
+        ''',
+        "DROP TABLE latest_prices",
+        "ALTER TABLE latest_prices_compact RENAME TO latest_prices",
+    ]),
+    (10, "Add scrape_jobs, the /run_scraper jobs shared by every API process (see jobs.py)", [
+        # summary and pools are JSON: the pool count per outcome, and each pool's outcome and time
+        '''
+        CREATE TABLE IF NOT EXISTS scrape_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            wall_seconds REAL,
+            error TEXT,
+            summary TEXT,
+            pools TEXT
+        )
+        ''',
+        # At most one job is queued or running at a time; the index also finds that job without a scan
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_scrape_jobs_active
+        ON scrape_jobs ((status IN ('queued', 'running'))) WHERE status IN ('queued', 'running')
+        ''',
+    ]),
+    (11, "Make pool addresses unique regardless of case", [
+        # '0xAB...' and '0xab...' are the same pool (main._scrape_batch keys results by the lower-cased
+        # address); keep the first row, as migration 2 does
+        '''
+        DELETE FROM monitored_pools
+        WHERE id NOT IN (SELECT MIN(id) FROM monitored_pools GROUP BY lower(pool_address))
+        ''',
+        "DROP INDEX IF EXISTS idx_monitored_pools_address",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_monitored_pools_address ON monitored_pools (lower(pool_address))",
+    ]),
+]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path=DB_PATH):
+    """Applies every pending migration, each in its own transaction. Returns the new version."""
+    conn = connect(db_path)
+    # Manage transactions by hand so DDL and the version bump commit (or roll back) together
+    conn.isolation_level = None
+    try:
+        current = get_schema_version(conn)
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            logging.info(f"Applying migration {version}: {description}")
+            conn.execute("BEGIN")
+            try:
+                for statement in statements:
+                    conn.execute(statement)
+                # PRAGMA does not accept parameters; version is always an int from MIGRATIONS
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            current = version
+        return current
+    finally:
+        conn.close()
+
+
+def vacuum(db_path=DB_PATH):
+    """
+    Rewrites the database file without its free pages.
+
+    Migrations that rebuild a table (like 9) leave the old pages free inside the
+    file, so it only shrinks after this. It needs about as much free disk space
+    as the database and blocks writers while it runs, so it is not automatic.
+    """
+    conn = connect(db_path)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def explain_api_queries(db_path=DB_PATH):
+    """
+    Prints the EXPLAIN QUERY PLAN of every query the API runs.
+
+    A full scan of a price table or a temporary B-tree for sorting means an
+    index is not being used, which is reported as a regression.
+
+    Returns:
+        list: The names of the queries whose plan regressed.
+    """
+    conn = connect(db_path)
+    regressions = []
+    try:
+        for name, sql, params in API_QUERY_PLANS:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            details = [row[3] for row in plan]
+            print(f"\n[{name}]")
+            for detail in details:
+                print(f"    {detail}")
+            if any(_is_regression(detail) for detail in details):
+                regressions.append(name)
+                print("    !! REGRESSION: full table scan or temp sort")
+    finally:
+        conn.close()
+    return regressions
+
+
+def _is_regression(detail):
+    if detail.startswith('USE TEMP B-TREE'):
+        return True
+    # "SCAN price_history" is a full scan; "SCAN price_history USING INDEX ..." walks an index in order.
+    # Small tables (latest_prices has one row per pool) are meant to be scanned.
+    words = detail.split()
+    return len(words) >= 2 and words[0] == 'SCAN' and words[1] in HISTORY_TABLES and 'USING' not in detail
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Apply schema migrations to prices.db.")
+    parser.add_argument('--explain', action='store_true', help="print the query plan of every API query and fail on regressions")
+    parser.add_argument('--vacuum', action='store_true', help="rewrite the database file to reclaim free space")
+    args = parser.parse_args()
+
+    version = migrate()
+    print(f"Database is at schema version {version}.")
+
+    if args.vacuum:
+        size_before = os.path.getsize(DB_PATH)
+        vacuum()
+        print(f"Vacuumed: {size_before / 1e6:.1f} MB -> {os.path.getsize(DB_PATH) / 1e6:.1f} MB.")
+
+    if args.explain:
+        regressed = explain_api_queries()
+        if regressed:
+            print(f"\nQuery plan regressions: {', '.join(regressed)}")
+            sys.exit(1)
+        print("\nAll API queries use an index.")
@@ -0,0 +1,200 @@
+# pool_import.py (Bulk pool onboarding)
+"""
+Adds or updates many monitored_pools rows at once.
+
+Every pool is first checked for the required fields and a known
+scraper_function. The pools that pass are then validated with one live scrape
+through main.run_scrape_job, so they are scraped concurrently and batched per
+upstream exactly like a scheduled job (one GeckoTerminal multi-pool request
+per 30 pools, one Multicall per 100 on-chain pools, one Hyperliquid snapshot
+for all of them). Everything valid is upserted in a single transaction keyed
+on lower(pool_address), and each pool gets a line in the report. Addresses are
+compared case-insensitively, so '0xABC...' updates an existing '0xabc...'
+row instead of adding a second one (the unique index is case-insensitive too); a new pool keeps the spelling it was
+imported with, since some upstreams put it in URLs as is.
+
+Usage:
+    python pool_import.py pools.json                 # a JSON list of pool objects
+    python pool_import.py pools.json --dry-run       # validate and report, write nothing
+    python pool_import.py pools.json --no-validate   # skip the live scrape
+"""
+import sys
+import json
+import logging
+import argparse
+
+from db import DB_PATH, connect
+from scraper import SCRAPER_REGISTRY
+
+REQUIRED_FIELDS = ['dex_name', 'scraper_function', 'network', 'pool_address', 'target_token_address']
+
+# The validation scrape must fit in one HTTP request to the API (gunicorn's default worker timeout is 30s)
+VALIDATION_POOL_TIMEOUT_SECONDS = 20
+VALIDATION_JOB_TIMEOUT_SECONDS = 25
+
+# An existing pool whose configuration changes is polled again right away,
+# with a clean error streak, instead of waiting out its old interval
+_UPSERT_SQL = '''
+    INSERT INTO monitored_pools (dex_name, scraper_function, network, pool_address, target_token_address)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (lower(pool_address)) DO UPDATE SET
+        dex_name = excluded.dex_name,
+        scraper_function = excluded.scraper_function,
+        network = excluded.network,
+        target_token_address = excluded.target_token_address,
+        next_due_at = 0,
+        error_streak = 0
+'''
+
+
+def check_pool(pool):
+    """Returns why a pool object cannot be imported, or None if its fields look right."""
+    if not isinstance(pool, dict):
+        return "Expected a JSON object."
+    missing = [field for field in REQUIRED_FIELDS if not isinstance(pool.get(field), str) or not pool[field].strip()]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}."
+    if pool['scraper_function'] not in SCRAPER_REGISTRY:
+        return f"Unknown scraper_function '{pool['scraper_function']}'."
+    return None
+
+
+def validate_pools(pools):
+    """
+    Scrapes every pool once, concurrently and in upstream batches.
+
+    Returns:
+        list: One run_scrape_job result per pool, in the same order.
+    """
+    # Imported here so the CLI's --no-validate path and seed_pools.py never load the scrapers
+    from main import run_scrape_job
+
+    return run_scrape_job(pools, pool_timeout=VALIDATION_POOL_TIMEOUT_SECONDS, job_timeout=VALIDATION_JOB_TIMEOUT_SECONDS)
+
+
+def import_pools(pools, validate=True, dry_run=False, db_path=DB_PATH):
+    """
+    Validates the pools and upserts the valid ones in one transaction.
+
+    Args:
+        pools (list): Pool objects with the REQUIRED_FIELDS.
+        validate (bool): Scrape each pool once and only keep the ones that return a price.
+        dry_run (bool): Do everything but roll the transaction back at the end.
+
+    Returns:
+        dict: 'summary' (pool count per status) and 'results', one entry per
+              input pool in order, with 'pool_address', 'dex_name', 'status'
+              ('added', 'updated', 'unchanged', 'invalid' or 'failed') and,
+              when relevant, 'error' and 'initial_data'.
+    """
+    results = []
+    candidates = []
+    seen = set()
+    for pool in pools:
+        error = check_pool(pool)
+        entry = {
+            'pool_address': pool.get('pool_address') if isinstance(pool, dict) else None,
+            'dex_name': pool.get('dex_name') if isinstance(pool, dict) else None,
+        }
+        if error is None:
+            key = pool['pool_address'].strip().lower()
+            if key in seen:
+                error = "Duplicate of an earlier pool in this import."
+            seen.add(key)
+        if error is not None:
+            entry.update(status='invalid', error=error)
+        else:
+            candidates.append((entry, {field: pool[field].strip() for field in REQUIRED_FIELDS}))
+        results.append(entry)
+
+    if validate and candidates:
+        logging.info(f"Validating {len(candidates)} pools...")
+        checks = validate_pools([pool for _, pool in candidates])
+        valid = []
+        for (entry, pool), check in zip(candidates, checks):
+            if check['status'] == 'ok':
+                entry['initial_data'] = check['data']
+                valid.append((entry, pool))
+            else:
+                entry.update(status='failed', error=check['error'] or "Could not scrape this pool. Check the network, pool address, and target token address.")
+        candidates = valid
+
+    if candidates:
+        _upsert(candidates, dry_run, db_path)
+
+    summary = {}
+    for entry in results:
+        summary[entry['status']] = summary.get(entry['status'], 0) + 1
+    return {'summary': summary, 'results': results}
+
+
+def _upsert(candidates, dry_run, db_path):
+    """Writes the pools in one IMMEDIATE transaction and sets each entry's status from what was there before."""
+    conn = connect(db_path)
+    # BEGIN IMMEDIATE takes the write lock up front, so nothing can change the rows between the read and the upsert
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            addresses = [pool['pool_address'].lower() for _, pool in candidates]
+            existing = {}
+            for i in range(0, len(addresses), 500):
+                chunk = addresses[i:i + 500]
+                # Matched case-insensitively, like the duplicate check in import_pools()
+                for row in conn.execute(
+                        f"SELECT pool_address, dex_name, scraper_function, network, target_token_address "
+                        f"FROM monitored_pools WHERE lower(pool_address) IN ({', '.join('?' for _ in chunk)})", chunk):
+                    existing[row[0].lower()] = row
+
+            changed = []
+            for entry, pool in candidates:
+                before = existing.get(pool['pool_address'].lower())
+                if before is not None:
+                    # The existing row keeps (and the report shows) its stored spelling
+                    pool['pool_address'] = before[0]
+                values = tuple(pool[field] for field in REQUIRED_FIELDS)
+                if before is None:
+                    entry['status'] = 'added'
+                elif before[1:] == values[:3] + values[4:]:
+                    entry['status'] = 'unchanged'
+                    continue
+                else:
+                    entry['status'] = 'updated'
+                changed.append(values)
+
+            conn.executemany(_UPSERT_SQL, changed)
+            conn.execute("ROLLBACK" if dry_run else "COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def print_report(report):
+    for entry in report['results']:
+        line = f"{entry['status']:>9}  {entry['dex_name'] or '?':<24} {entry['pool_address'] or '?'}"
+        if entry.get('error'):
+            line += f"  ({entry['error']})"
+        print(line)
+    print("\n" + ", ".join(f"{count} {status}" for status, count in sorted(report['summary'].items())))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Validate and add or update many monitored pools at once.")
+    parser.add_argument('file', help="JSON file with a list of pools ('-' for stdin)")
+    parser.add_argument('--no-validate', action='store_true', help="skip the live scrape of every pool")
+    parser.add_argument('--dry-run', action='store_true', help="report what would change without writing")
+    args = parser.parse_args()
+
+    with (sys.stdin if args.file == '-' else open(args.file, encoding='utf-8')) as f:
+        pools = json.load(f)
+    if not isinstance(pools, list):
+        parser.error("the file must hold a JSON list of pools")
+
+    report = import_pools(pools, validate=not args.no_validate, dry_run=args.dry_run)
+    print_report(report)
+    if args.dry_run:
+        print("Dry run: nothing was written.")
+    sys.exit(1 if any(entry['status'] in ('invalid', 'failed') for entry in report['results']) else 0)
@@ -0,0 +1,180 @@
+# pool_scheduler.py (Adaptive per-pool polling)
+"""
+Decides which monitored_pools rows to scrape and when.
+
+Instead of scraping every pool once a minute, each row keeps its own
+interval_seconds and next_due_at (added by migration 6). A tick runs
+every TICK_SECONDS, scrapes only the pools that are due and reschedules each
+of them:
+
+- a price that moved more than FAST_MOVE since the last poll halves the
+  interval, a price that barely moved (under SLOW_MOVE) stretches it, and
+  anything in between drifts back towards the pool's base interval;
+- a failed poll doubles the interval per failure in a row, so a broken or
+  throttled upstream is backed off instead of retried every tick;
+- the interval always stays within the row's min/max bounds, and the next due
+  time gets +/- JITTER_FRACTION of random jitter so pools that share an
+  interval do not all fire in the same second.
+"""
+import time
+import random
+import sqlite3
+import logging
+
+from db import DB_PATH, connect
+from main import main as run_scraper_job
+from metrics import observe_scheduler_lag
+
+# How often the scheduler looks for due pools
+TICK_SECONDS = 5
+# Next due time = now + interval * (1 +/- JITTER_FRACTION)
+JITTER_FRACTION = 0.1
+# Relative price change between two polls that counts as fast / slow movement
+FAST_MOVE = 0.005
+SLOW_MOVE = 0.0005
+# How the interval changes for fast-moving, slow-moving and failing pools
+SPEED_UP_FACTOR = 0.5
+SLOW_DOWN_FACTOR = 1.5
+ERROR_BACKOFF_FACTOR = 2
+
+DUE_POOLS_QUERY = "SELECT * FROM monitored_pools WHERE next_due_at <= ? ORDER BY next_due_at"
+
+RESCHEDULE_SQL = '''
+    UPDATE monitored_pools
+    SET interval_seconds = ?, next_due_at = ?, last_spot_price = ?, error_streak = ?
+    WHERE id = ?
+'''
+
+
+def next_interval(pool, result):
+    """
+    Works out a pool's new interval from the outcome of its last poll.
+
+    Args:
+        pool (dict): The monitored_pools row, including its scheduler columns.
+        result (dict): The pool's entry from main.run_scrape_job.
+
+    Returns:
+        tuple: (interval_seconds, last_spot_price, error_streak)
+    """
+    base = pool['base_interval_seconds']
+    low, high = pool['min_interval_seconds'], pool['max_interval_seconds']
+    interval = pool['interval_seconds']
+
+    if result['status'] != 'ok':
+        error_streak = pool['error_streak'] + 1
+        # Every failure in a row doubles the interval, until it reaches the max bound
+        interval = max(interval, base) * ERROR_BACKOFF_FACTOR
+        return min(high, max(low, interval)), pool['last_spot_price'], error_streak
+
+    spot_price = result['data']['spot_price']
+    last_price = pool['last_spot_price']
+    if pool['error_streak']:
+        # First success after failures: start again from the base interval
+        interval = base
+    elif last_price:
+        move = abs(spot_price - last_price) / abs(last_price)
+        if move >= FAST_MOVE:
+            interval *= SPEED_UP_FACTOR
+        elif move <= SLOW_MOVE:
+            interval *= SLOW_DOWN_FACTOR
+        else:
+            # Normal movement: head back to the base interval
+            interval = (interval + base) / 2
+    return min(high, max(low, interval)), spot_price, 0
+
+
+def _jittered(interval):
+    return interval * random.uniform(1 - JITTER_FRACTION, 1 + JITTER_FRACTION)
+
+
+def get_due_pools(now=None):
+    """Returns the monitored_pools rows whose next_due_at has passed, most overdue first."""
+    conn = connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(DUE_POOLS_QUERY, (time.time() if now is None else now,)).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def reschedule(results, now=None):
+    """Stores each polled pool's new interval and next due time in one transaction."""
+    now = time.time() if now is None else now
+    updates = []
+    for result in results:
+        pool = result['pool']
+        interval, last_spot_price, error_streak = next_interval(pool, result)
+        updates.append((interval, now + _jittered(interval), last_spot_price, error_streak, pool['id']))
+
+    conn = connect(DB_PATH)
+    try:
+        with conn:
+            conn.executemany(RESCHEDULE_SQL, updates)
+    finally:
+        conn.close()
+    return updates
+
+
+def _reschedule_logged(results, started):
+    try:
+        reschedule(results, now=started)
+    except Exception as e:
+        # Leaving next_due_at untouched means the pools are simply retried on the next tick
+        logging.error(f"-> Error rescheduling pools: {e}")
+
+
+def run_due_pools():
+    """Scheduler tick: scrapes the pools that are due and reschedules them. Returns the job results."""
+    due_pools = get_due_pools()
+    if not due_pools:
+        return []
+
+    started = time.time()
+    for pool in due_pools:
+        # next_due_at is 0 for pools that have never been scheduled
+        if pool['next_due_at']:
+            observe_scheduler_lag(started - pool['next_due_at'])
+    results = run_scraper_job(pools=due_pools)
+    _reschedule_logged(results, started)
+    return results
+
+
+def run_all_pools():
+    """
+    A manual /run_scraper job: scrapes every pool and reschedules each one as if it had been due,
+    so it is not scraped again until its next interval. Returns the job results.
+    """
+    started = time.time()
+    results = run_scraper_job()
+    _reschedule_logged(results, started)
+    return results
+
+
+def run_tick(job_manager):
+    """
+    One tick of the scheduler leader: the manual job queued through /run_scraper,
+    if any, then the pools that are due. Running both here keeps them from overlapping,
+    and since the manual job reschedules the pools it scraped, none of them is due
+    again in the same tick.
+
+    Args:
+        job_manager (jobs.JobManager): Where manual jobs are queued.
+    """
+    try:
+        job_manager.run_next(run_all_pools)
+    except Exception as e:
+        # The job stays queued and is picked up on the next tick
+        logging.error(f"-> Error running the queued scrape job: {e}")
+    return run_due_pools()
+
+
+if __name__ == "__main__":
+    # Run the scheduler in the foreground, without the API or the leader lock
+    from jobs import JobManager
+
+    job_manager = JobManager()
+    while True:
+        run_tick(job_manager)
+        time.sleep(TICK_SECONDS)
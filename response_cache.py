@@ -0,0 +1,92 @@
+# response_cache.py (Scrape-generation-aware caching for the API)
+"""
+Prices only change when a scrape job commits, so a read endpoint's response is
+valid until the next commit. The writer bumps a generation counter in the same
+transaction as the new rows (see db.get_data_generation); this cache keys every
+response by endpoint + query args and throws it away once the generation moves.
+
+Responses also carry an ETag (the generation) and Last-Modified (when that
+generation was committed), so polling clients that send If-None-Match get an
+empty 304 until there is new data.
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request
+from werkzeug.http import http_date
+
+# Most distinct (endpoint, args) responses kept in memory
+MAX_ENTRIES = 256
+# Bigger bodies (e.g. /data without a limit) are served but not kept
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class ResponseCache:
+    def __init__(self, get_generation, max_entries=MAX_ENTRIES, max_body_bytes=MAX_BODY_BYTES):
+        """
+        Args:
+            get_generation: Callable returning the current (generation, updated_at),
+                            or None if it cannot be read (the cache is then bypassed).
+        """
+        self.get_generation = get_generation
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def cached(self, view):
+        """Decorator for GET views whose output only depends on the query args and the data."""
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current = self.get_generation()
+            if current is None:
+                return view(*args, **kwargs)
+            generation, updated_at = current
+            etag = f'"{generation}"'
+            validators = {'ETag': etag, 'Last-Modified': http_date(updated_at)}
+
+            # 1. The client already has this generation
+            if request.if_none_match.contains(etag.strip('"')):
+                with self._lock:
+                    self.not_modified += 1
+                return Response(status=304, headers=validators)
+
+            # 2. We already rendered this exact request for this generation
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == generation:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    _, body, status, headers = entry
+                    return Response(body, status=status, headers=headers)
+                self.misses += 1
+
+            # 3. Render it and keep it if it is a normal, reasonably sized response
+            response = view(*args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200 and not response.is_streamed:
+                response.headers.update(validators)
+                body = response.get_data()
+                if len(body) <= self.max_body_bytes:
+                    with self._lock:
+                        self._entries[key] = (generation, body, response.status_code, list(response.headers.items()))
+                        self._entries.move_to_end(key)
+                        while len(self._entries) > self.max_entries:
+                            self._entries.popitem(last=False)
+            return response
+
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+            }
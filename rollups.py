@@ -0,0 +1,201 @@
+# rollups.py (OHLC rollups of the price history)
+"""
+Keeps the price_ohlc table: open/high/low/close of the spot, buy and sell
+prices per DEX and token pair, in 1m, 5m, 1h and 1d buckets.
+
+PriceWriter calls update_rollups() inside its insert transaction, so the
+rollups are always in step with hype_prices. Rollups for history that was
+stored before this table existed are built with:
+
+    python rollups.py backfill
+"""
+import sys
+import time
+import logging
+from datetime import datetime
+
+# Interval name -> bucket length in minutes
+INTERVALS = {
+    '1m': 1,
+    '5m': 5,
+    '1h': 60,
+    '1d': 1440,
+}
+
+PRICE_FIELDS = ('spot', 'buy', 'sell')
+
+# Rows read from hype_prices per round trip during a backfill
+BACKFILL_CHUNK_SIZE = 50000
+
+OHLC_QUERY = '''
+    SELECT bucket_start, dex_name, token_pair,
+           spot_open, spot_high, spot_low, spot_close,
+           buy_open, buy_high, buy_low, buy_close,
+           sell_open, sell_high, sell_low, sell_close,
+           sample_count
+    FROM price_ohlc
+    WHERE interval = ? AND dex_name = ? AND bucket_start >= ? AND bucket_start <= ?
+    ORDER BY bucket_start
+'''
+
+# A bucket already in the table is merged with the new one: the earliest sample
+# keeps the open, the latest keeps the close. SQLite's scalar MAX/MIN return NULL
+# if either side is NULL, hence the COALESCEs for the optional buy/sell prices.
+_UPSERT_SQL = '''
+    INSERT INTO price_ohlc (
+        interval, dex_name, bucket_start, token_pair, first_timestamp, last_timestamp,
+        spot_open, spot_high, spot_low, spot_close,
+        buy_open, buy_high, buy_low, buy_close,
+        sell_open, sell_high, sell_low, sell_close,
+        sample_count
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (interval, dex_name, bucket_start, token_pair) DO UPDATE SET
+''' + ',\n'.join(
+    f'''        {field}_open = CASE WHEN excluded.first_timestamp < price_ohlc.first_timestamp
+                           THEN excluded.{field}_open ELSE price_ohlc.{field}_open END,
+        {field}_close = CASE WHEN excluded.last_timestamp >= price_ohlc.last_timestamp
+                            THEN excluded.{field}_close ELSE price_ohlc.{field}_close END,
+        {field}_high = MAX(COALESCE(price_ohlc.{field}_high, excluded.{field}_high), COALESCE(excluded.{field}_high, price_ohlc.{field}_high)),
+        {field}_low = MIN(COALESCE(price_ohlc.{field}_low, excluded.{field}_low), COALESCE(excluded.{field}_low, price_ohlc.{field}_low))'''
+    for field in PRICE_FIELDS
+) + ''',
+        first_timestamp = MIN(price_ohlc.first_timestamp, excluded.first_timestamp),
+        last_timestamp = MAX(price_ohlc.last_timestamp, excluded.last_timestamp),
+        sample_count = price_ohlc.sample_count + excluded.sample_count
+'''
+
+
+def _to_datetime(timestamp):
+    """hype_prices timestamps come back from SQLite as text ('2025-01-01 12:00:00.123456')."""
+    if isinstance(timestamp, datetime):
+        return timestamp
+    return datetime.fromisoformat(timestamp)
+
+
+def bucket_start(timestamp, interval):
+    """Returns the start of the bucket the timestamp falls into, as 'YYYY-MM-DD HH:MM:SS' text."""
+    ts = _to_datetime(timestamp)
+    minutes = INTERVALS[interval]
+    if minutes >= 1440:
+        start = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        minute_of_day = ts.hour * 60 + ts.minute
+        minute_of_day -= minute_of_day % minutes
+        start = ts.replace(hour=minute_of_day // 60, minute=minute_of_day % 60, second=0, microsecond=0)
+    return start.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def finest_interval(span_minutes, max_buckets):
+    """Returns the finest interval that splits span_minutes into at most max_buckets buckets (else the coarsest)."""
+    for interval, minutes in sorted(INTERVALS.items(), key=lambda item: item[1]):
+        if span_minutes / minutes <= max_buckets:
+            return interval
+    return max(INTERVALS, key=INTERVALS.get)
+
+
+def _aggregate(rows):
+    """
+    Folds price rows into OHLC buckets for every interval.
+
+    Args:
+        rows: (timestamp, dex_name, token_pair, spot, fee, buy, sell) tuples,
+              the same shape PriceWriter inserts into hype_prices.
+    """
+    buckets = {}
+    for timestamp, dex_name, token_pair, spot, _fee, buy, sell in rows:
+        ts_text = str(timestamp)
+        prices = {'spot': spot, 'buy': buy, 'sell': sell}
+        for interval in INTERVALS:
+            key = (interval, dex_name, bucket_start(timestamp, interval), token_pair)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {'first': ts_text, 'last': ts_text, 'count': 0}
+                for field in PRICE_FIELDS:
+                    value = prices[field]
+                    bucket[field] = [value, value, value, value]  # open, high, low, close
+            else:
+                for field in PRICE_FIELDS:
+                    value = prices[field]
+                    if value is None:
+                        continue
+                    ohlc = bucket[field]
+                    if ts_text < bucket['first'] or ohlc[0] is None:
+                        ohlc[0] = value
+                    if ts_text >= bucket['last'] or ohlc[3] is None:
+                        ohlc[3] = value
+                    ohlc[1] = value if ohlc[1] is None else max(ohlc[1], value)
+                    ohlc[2] = value if ohlc[2] is None else min(ohlc[2], value)
+                bucket['first'] = min(bucket['first'], ts_text)
+                bucket['last'] = max(bucket['last'], ts_text)
+            bucket['count'] += 1
+    return buckets
+
+
+def update_rollups(conn, rows):
+    """Merges freshly inserted price rows into price_ohlc. Runs inside the caller's transaction."""
+    params = []
+    for (interval, dex_name, start, token_pair), bucket in _aggregate(rows).items():
+        params.append((
+            interval, dex_name, start, token_pair, bucket['first'], bucket['last'],
+            *bucket['spot'], *bucket['buy'], *bucket['sell'],
+            bucket['count'],
+        ))
+    conn.executemany(_UPSERT_SQL, params)
+
+
+def backfill(conn):
+    """
+    Rebuilds price_ohlc from the whole of hype_prices.
+
+    The history is streamed in chunks and every chunk is committed on its own,
+    so memory stays flat and the scraper can keep writing in between. The rows
+    it writes meanwhile are rolled up by PriceWriter itself, so the backfill
+    stops at the newest id that existed when it cleared the table, read in the
+    same transaction as the DELETE.
+
+    Returns:
+        int: The number of history rows that were rolled up.
+    """
+    with conn:
+        # The DELETE opens the transaction and takes the write lock, so no flush can land between it and MAX(id)
+        conn.execute("DELETE FROM price_ohlc")
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM price_history").fetchone()[0]
+
+    total = 0
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, timestamp, dex_name, token_pair, spot_price, fee_percentage, buy_price, sell_price
+            FROM hype_prices
+            WHERE id > ? AND id <= ?
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, max_id, BACKFILL_CHUNK_SIZE)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        with conn:
+            update_rollups(conn, [row[1:] for row in rows])
+        total += len(rows)
+        logging.info(f"-> Rolled up {total} rows (up to id {last_id} of {max_id})")
+
+    # The candles changed under every cached /ohlc response; move the generation so they are rebuilt
+    with conn:
+        conn.execute("UPDATE data_generation SET generation = generation + 1, updated_at = ? WHERE id = 1", (time.time(),))
+    return total
+
+
+if __name__ == "__main__":
+    from db import DB_PATH, connect
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if sys.argv[1:] != ['backfill']:
+        print("Usage: python rollups.py backfill")
+        sys.exit(1)
+
+    conn = connect(DB_PATH)
+    try:
+        count = backfill(conn)
+    finally:
+        conn.close()
+    print(f"Backfilled OHLC rollups from {count} price rows.")
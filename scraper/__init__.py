@@ -9,13 +9,55 @@ from .lighter import scrape as scrape_lighter
 from .geckoterminal import scrape as scrape_geckoterminal
 """
 
-# Add a new line here every time you add a new DEX file
-# from .thruster_finance import scrape as scrape_thruster_finance
+# Scraper modules are imported lazily: nothing below is loaded until a scraper is
+# actually used, so importing `scraper` (and therefore main.py / api.py) stays cheap.
+# The on-chain reader alone would otherwise pull in eth_abi on every start.
+import importlib
 
-from .upheaval_v3_rpc import scrape as scrape_upheaval_v3_rpc
+# Add a new entry here every time you add a new scraper_function (the column in monitored_pools).
+# scraper_function -> (module, batch function, max pools per call)
+# A batch function takes a list of monitored_pools rows and returns a dict mapping each
+# lower-cased pool_address to the standard price dict (or None if that pool failed).
+# The batch sizes mirror geckoterminal_api.MULTI_POOL_LIMIT and v3_pool_reader.MAX_POOLS_PER_CALL,
+# kept here so planning a job does not import the modules.
+SCRAPER_REGISTRY = {
+    'geckoterminal': ('.geckoterminal_api', 'scrape_gecko_terminal_pools', 30),
+    # One spotMetaAndAssetCtxs snapshot serves every Hyperliquid row, however many there are
+    'hyperliquid_native': ('.hyperliquid_native', 'scrape_pools', 1000),
+    'v3_rpc': ('.v3_pool_reader', 'scrape_v3_pools', 100),
+}
 
-from .hyperliquid_native import scrape as scrape_hyperliquid_native
+# Names that used to be imported eagerly here: name -> (module, attribute)
+_LAZY_EXPORTS = {
+    'scrape_upheaval_v3_rpc': ('.upheaval_v3_rpc', 'scrape'),
+    'scrape_hyperliquid_native': ('.hyperliquid_native', 'scrape'),
+    'scrape_gecko_terminal_pool': ('.geckoterminal_api', 'scrape_gecko_terminal_pool'),
+    'scrape_gecko_terminal_pools': ('.geckoterminal_api', 'scrape_gecko_terminal_pools'),
+    'scrape_v3_pools': ('.v3_pool_reader', 'scrape_v3_pools'),
+}
 
 
-# Import the geckoterminal_api scraper
-from .geckoterminal_api import scrape_gecko_terminal_pool
\ No newline at end of file
+def _resolve(module_name, attribute):
+    module = importlib.import_module(module_name, __name__)
+    return getattr(module, attribute)
+
+
+def get_scraper(scraper_function):
+    """
+    Returns (batch function, max pools per call) for a scraper_function value,
+    importing its module on first use.
+
+    Raises:
+        KeyError: If no scraper is registered under that name.
+    """
+    module_name, attribute, batch_size = SCRAPER_REGISTRY[scraper_function]
+    return _resolve(module_name, attribute), batch_size
+
+
+def __getattr__(name):
+    # PEP 562: keeps `from scraper import scrape_gecko_terminal_pool` working, loaded on first access
+    if name in _LAZY_EXPORTS:
+        value = _resolve(*_LAZY_EXPORTS[name])
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
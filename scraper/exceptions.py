@@ -3,3 +3,8 @@
 class ScrapingError(Exception):
     """Custom exception for scraping errors."""
     pass
+
+
+class UpstreamUnavailableError(ScrapingError):
+    """Raised without sending a request: the host's circuit breaker is open or no rate limit token was free in time."""
+    pass
@@ -2,6 +2,17 @@
 
 import requests
 
+from . import http_client
+from . import metadata_cache
+
+API_BASE_URL = "https://api.geckoterminal.com/api/v2"
+
+# The scraper_function value of these pools, which namespaces their metadata_cache entries
+SCRAPER_FUNCTION = 'geckoterminal'
+
+# The multi-pool endpoint accepts at most this many comma-separated addresses
+MULTI_POOL_LIMIT = 30
+
 def scrape_gecko_terminal_pool(network: str, pool_address: str, target_token_address: str):
     """
     Scrapes token price data from the GeckoTerminal API for a specific pool,
@@ -18,69 +29,18 @@ def scrape_gecko_terminal_pool(network: str, pool_address: str, target_token_add
     """
     print(f"-> Starting API scrape for GeckoTerminal (Network: {network}, Pool: {pool_address}, Target: {target_token_address})...")
 
-    url = f"https://api.geckoterminal.com/api/v2/networks/{network}/pools/{pool_address}"
+    url = f"{API_BASE_URL}/networks/{network}/pools/{pool_address}"
     headers = {"accept": "application/json"}
 
     try:
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         response.raise_for_status()
         data = response.json()
-        
-        # 1. Get the relationships and attributes
-        relationships = data['data']['relationships']
-        attributes = data['data']['attributes']
-
-        # 2. Extract the IDs, which contain the addresses
-        base_token_id = relationships['base_token']['data']['id']
-        quote_token_id = relationships['quote_token']['data']['id']
-        
-        # The address is the part of the ID after the underscore
-        base_token_address = base_token_id.split('_')[-1]
-        quote_token_address = quote_token_id.split('_')[-1]
-
-        # 3. Get the prices
-        base_token_price_usd = attributes.get('base_token_price_usd')
-        quote_token_price_usd = attributes.get('quote_token_price_usd')
-        
-        # 4. Determine which price to return by comparing addresses (case-insensitive)
-        spot_price = None
-        
-        if target_token_address.lower() == base_token_address.lower():
-            spot_price = float(base_token_price_usd)
-        elif target_token_address.lower() == quote_token_address.lower():
-            spot_price = float(quote_token_price_usd)
-        else:
-            print(f"   Error: Target token address '{target_token_address}' not found in pool.")
-            return None
-
-        pool_name = attributes.get('name', 'Unknown Pair')
 
-        fee_percentage_str = attributes.get('pool_fee_percentage')
-        fee_percentage = 0.0
-        
-        # Safely convert fee to a float, defaulting to 0 if it's missing or invalid
-        if fee_percentage_str:
-            try:
-                fee_percentage = float(fee_percentage_str)
-            except (ValueError, TypeError):
-                print(f"   Warning: Could not parse fee_percentage: '{fee_percentage_str}'")
-        
-        fee_multiplier = fee_percentage / 100
-        
-        # Calculate effective prices
-        # For a buyer, the effective price is higher. For a seller, it's lower.
-        effective_buy_price = spot_price / (1 - fee_multiplier) if fee_multiplier < 1 else spot_price
-        effective_sell_price = spot_price * (1 - fee_multiplier)
-
-        print(f"   Successfully scraped Price for {pool_name}: Spot=${spot_price:.6f}, Fee={fee_percentage}%")
-
-        return {
-            'spot_price': spot_price,
-            'pool_name': pool_name,
-            'fee_percentage': fee_percentage,
-            'buy_price': effective_buy_price,
-            'sell_price': effective_sell_price
-        }
+        resolved = []
+        price_data = _parse_pool(data['data'], network, pool_address, target_token_address, resolved)
+        metadata_cache.put_many(SCRAPER_FUNCTION, network, resolved)
+        return price_data
 
     except requests.exceptions.HTTPError as http_err:
         print(f"   HTTP error occurred: {http_err} - Check the network ID or Pool Address.")
@@ -88,4 +48,170 @@ def scrape_gecko_terminal_pool(network: str, pool_address: str, target_token_add
         return None
     except Exception as e:
         print(f"   An unexpected error occurred in GeckoTerminal API scraper: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _resolve_metadata(pool_data: dict, pool_address: str, target_token_address: str):
+    """
+    Works out the static part of one GeckoTerminal pool resource (the 'data'
+    object of the single-pool endpoint, or one entry of the multi-pool
+    endpoint): which side the target token is on, the pair name and the fee.
+
+    Returns None if the target token is not one of the pool's two tokens.
+    """
+    # 1. Get the relationships and attributes
+    relationships = pool_data['relationships']
+    attributes = pool_data['attributes']
+
+    # 2. Extract the IDs, which contain the addresses
+    base_token_id = relationships['base_token']['data']['id']
+    quote_token_id = relationships['quote_token']['data']['id']
+
+    # The address is the part of the ID after the underscore
+    base_token_address = base_token_id.split('_')[-1]
+    quote_token_address = quote_token_id.split('_')[-1]
+
+    # 3. Determine which side of the pool the target is on by comparing addresses (case-insensitive)
+    if target_token_address.lower() == base_token_address.lower():
+        target_side = 'base'
+    elif target_token_address.lower() == quote_token_address.lower():
+        target_side = 'quote'
+    else:
+        print(f"   Error: Target token address '{target_token_address}' not found in pool.")
+        return None
+
+    fee_percentage_str = attributes.get('pool_fee_percentage')
+    fee_percentage = 0.0
+
+    # Safely convert fee to a float, defaulting to 0 if it's missing or invalid
+    if fee_percentage_str:
+        try:
+            fee_percentage = float(fee_percentage_str)
+        except (ValueError, TypeError):
+            print(f"   Warning: Could not parse fee_percentage: '{fee_percentage_str}'")
+
+    return {
+        'pool_address': pool_address,
+        'target_token_address': target_token_address,
+        'target_side': target_side,
+        'pair_name': attributes.get('name', 'Unknown Pair'),
+        'fee_percentage': fee_percentage,
+        'base_token_address': base_token_address.lower(),
+        'quote_token_address': quote_token_address.lower(),
+    }
+
+
+def _price_dict(pool_data: dict, metadata: dict):
+    """The hot path: reads the target token's USD price and applies the cached fee."""
+    spot_price = float(pool_data['attributes'][f"{metadata['target_side']}_token_price_usd"])
+    pool_name = metadata['pair_name']
+    fee_percentage = metadata['fee_percentage']
+    fee_multiplier = fee_percentage / 100
+
+    # Calculate effective prices
+    # For a buyer, the effective price is higher. For a seller, it's lower.
+    effective_buy_price = spot_price / (1 - fee_multiplier) if fee_multiplier < 1 else spot_price
+    effective_sell_price = spot_price * (1 - fee_multiplier)
+
+    print(f"   Successfully scraped Price for {pool_name}: Spot=${spot_price:.6f}, Fee={fee_percentage}%")
+
+    return {
+        'spot_price': spot_price,
+        'pool_name': pool_name,
+        'fee_percentage': fee_percentage,
+        'buy_price': effective_buy_price,
+        'sell_price': effective_sell_price
+    }
+
+
+def _parse_pool(pool_data: dict, network: str, pool_address: str, target_token_address: str, resolved: list):
+    """
+    Turns one pool resource into the standard price dict, or None if the target
+    token is not one of the pool's two tokens.
+
+    The static fields come from metadata_cache when possible; metadata that had
+    to be resolved is appended to `resolved` so the caller can store it in one go.
+    """
+    metadata = metadata_cache.get(SCRAPER_FUNCTION, network, pool_address, target_token_address)
+    if metadata is None:
+        metadata = _resolve_metadata(pool_data, pool_address, target_token_address)
+        if metadata is None:
+            return None
+        resolved.append(metadata)
+    return _price_dict(pool_data, metadata)
+
+
+def scrape_gecko_terminal_pools(pools: list):
+    """
+    Scrapes many GeckoTerminal pools with as few HTTP requests as possible.
+
+    The pools are grouped by network and each group is fetched through the
+    multi-pool endpoint, MULTI_POOL_LIMIT addresses per request.
+
+    Args:
+        pools (list): monitored_pools rows (dicts with 'network', 'pool_address'
+                      and 'target_token_address').
+
+    Returns:
+        dict: Maps each lower-cased pool address to the same dict that
+              scrape_gecko_terminal_pool returns, or None if that pool failed.
+    """
+    results = {pool['pool_address'].lower(): None for pool in pools}
+
+    # 1. Group the rows by network, since the endpoint is per network
+    pools_by_network = {}
+    for pool in pools:
+        pools_by_network.setdefault(pool['network'], []).append(pool)
+
+    # 2. One request per network (per chunk of MULTI_POOL_LIMIT addresses)
+    for network, network_pools in pools_by_network.items():
+        for i in range(0, len(network_pools), MULTI_POOL_LIMIT):
+            chunk = network_pools[i:i + MULTI_POOL_LIMIT]
+            results.update(_scrape_multi_chunk(network, chunk))
+
+    return results
+
+
+def _scrape_multi_chunk(network: str, pools: list):
+    """Fetches up to MULTI_POOL_LIMIT pools of one network in a single request."""
+    addresses = ','.join(pool['pool_address'] for pool in pools)
+    print(f"-> Starting batched API scrape for GeckoTerminal (Network: {network}, Pools: {len(pools)})...")
+
+    url = f"{API_BASE_URL}/networks/{network}/pools/multi/{addresses}"
+    headers = {"accept": "application/json"}
+
+    results = {}
+    resolved = []
+    try:
+        response = http_client.get(url, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+
+        # Index the returned pools by address, the order is not guaranteed to match the request
+        returned = {}
+        for pool_data in data.get('data', []):
+            address = pool_data['attributes'].get('address') or pool_data['id'].split('_')[-1]
+            returned[address.lower()] = pool_data
+
+        for pool in pools:
+            address = pool['pool_address'].lower()
+            pool_data = returned.get(address)
+            if pool_data is None:
+                print(f"   Error: Pool '{pool['pool_address']}' was not returned by GeckoTerminal.")
+                results[address] = None
+                continue
+            try:
+                results[address] = _parse_pool(pool_data, network, pool['pool_address'], pool['target_token_address'], resolved)
+            except Exception as e:
+                print(f"   An unexpected error occurred parsing pool '{pool['pool_address']}': {e}")
+                results[address] = None
+
+    except requests.exceptions.HTTPError as http_err:
+        print(f"   HTTP error occurred: {http_err} - Check the network ID or Pool Addresses.")
+        print(f"   Response Body: {response.text}")
+    except Exception as e:
+        print(f"   An unexpected error occurred in GeckoTerminal batch scraper: {e}")
+
+    # Pools seen for the first time (or whose entry expired) are stored in one transaction
+    metadata_cache.put_many(SCRAPER_FUNCTION, network, resolved)
+    return results
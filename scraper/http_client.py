@@ -0,0 +1,244 @@
+# scraper/http_client.py
+
+"""
+Shared HTTP transport for every scraper in this package.
+
+All scrapers go through one requests.Session, so TCP+TLS connections are kept
+alive and reused across requests and across scheduler runs instead of paying
+a fresh handshake every time. urllib3 keeps one connection pool per host.
+
+The module also counts, per host, how many requests were sent and how many new
+connections had to be opened, so the handshake savings can be checked with
+get_connection_stats().
+
+Every request is paced by the host's token bucket and guarded by its circuit
+breaker (see rate_limit.py). Connection errors, timeouts, 429 and 5xx
+responses are retried up to MAX_RETRIES times with exponential backoff and
+full jitter, waiting as long as a Retry-After header asks for. Every upstream
+call made by the scrapers is a read, so POSTs (JSON-RPC, Hyperliquid /info)
+are retried too.
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from . import rate_limit
+from .exceptions import UpstreamUnavailableError
+
+# --- Transport Settings ---
+# Seconds to wait for the TCP/TLS connection to be established
+CONNECT_TIMEOUT_SECONDS = 3.05
+# Seconds to wait for the server to send the response
+READ_TIMEOUT_SECONDS = 10
+# Number of hosts whose connection pools are kept around
+POOL_CONNECTIONS = 10
+# Keep-alive connections kept per host (should be >= the scrape job's worker count)
+POOL_MAXSIZE = 16
+
+# --- Retry Settings ---
+# Retries after the first attempt; kept low so a pool still fits in the scrape job's per-pool deadline
+MAX_RETRIES = 2
+# Backoff before retry n is a random delay in [0, min(BACKOFF_MAX, BACKOFF_BASE * 2**n)]
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8
+# A Retry-After longer than this is not waited for; the response is returned as it is
+RETRY_AFTER_MAX_SECONDS = 15
+# Longest a request waits for a rate limit token before giving up
+RATE_LIMIT_WAIT_SECONDS = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_session = None
+_stats = {}
+
+
+def _record(host, key):
+    """Increments one per-host counter."""
+    with _lock:
+        host_stats = _stats.setdefault(host, {'requests': 0, 'new_connections': 0})
+        host_stats[key] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _record(self.host, 'new_connections')
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _record(self.host, 'new_connections')
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools count every new connection they open."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+
+def _count_response(response, *args, **kwargs):
+    """Session response hook, so every request sent through the session is counted."""
+    _record(urlsplit(response.url).hostname, 'requests')
+
+
+def _build_session():
+    session = requests.Session()
+    session.hooks['response'].append(_count_response)
+    adapter = _PooledAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """Returns the shared session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def get_timeout():
+    """The (connect, read) timeout applied when a caller does not pass one."""
+    return (CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS)
+
+
+def configure(connect_timeout=None, read_timeout=None, pool_maxsize=None):
+    """
+    Changes the transport settings. Changing the pool size rebuilds the session,
+    which closes the current keep-alive connections.
+    """
+    global CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS, POOL_MAXSIZE, _session
+    if connect_timeout is not None:
+        CONNECT_TIMEOUT_SECONDS = connect_timeout
+    if read_timeout is not None:
+        READ_TIMEOUT_SECONDS = read_timeout
+    if pool_maxsize is not None and pool_maxsize != POOL_MAXSIZE:
+        POOL_MAXSIZE = pool_maxsize
+        with _lock:
+            if _session is not None:
+                _session.close()
+            _session = None
+
+
+def _retry_after(response):
+    """Seconds asked for by a Retry-After header (delta-seconds or an HTTP date), or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt):
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def request(method, url, **kwargs):
+    """
+    Sends a request through the shared session, with the default timeout if none is given.
+
+    Retryable failures are retried (see the module docstring). After the last
+    attempt a retryable response is returned like any other, so callers'
+    raise_for_status() still sees it; a connection error or timeout is raised.
+
+    Raises:
+        UpstreamUnavailableError: If the host's circuit breaker is open, or no
+            rate limit token became free within RATE_LIMIT_WAIT_SECONDS.
+    """
+    kwargs.setdefault('timeout', get_timeout())
+    host = urlsplit(url).hostname
+    limiter = rate_limit.get_limiter(host)
+    breaker = rate_limit.get_breaker(host)
+
+    for attempt in range(MAX_RETRIES + 1):
+        last_attempt = attempt == MAX_RETRIES
+        if not limiter.acquire(timeout=RATE_LIMIT_WAIT_SECONDS):
+            raise UpstreamUnavailableError(f"No rate limit token for {host} within {RATE_LIMIT_WAIT_SECONDS}s")
+        # Checked last: in half-open state this claims the single trial request
+        if not breaker.allow():
+            raise UpstreamUnavailableError(f"Circuit breaker for {host} is open")
+
+        try:
+            response = get_session().request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            breaker.record_failure()
+            if last_attempt:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        if response.status_code not in RETRY_STATUSES:
+            # Other 4xx responses are the caller's problem, not a sign the host is down
+            breaker.record_success()
+            return response
+
+        breaker.record_failure()
+        delay = _retry_after(response)
+        if delay is not None:
+            # The host told every caller to back off, not just this thread
+            limiter.pause(delay)
+        if last_attempt or (delay is not None and delay > RETRY_AFTER_MAX_SECONDS):
+            return response
+        response.close()
+        time.sleep(delay if delay is not None else _backoff(attempt))
+    return response
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def get_connection_stats():
+    """
+    Returns per-host transport counters.
+
+    Example: {'api.geckoterminal.com': {'requests': 120, 'new_connections': 2,
+              'reused_connections': 118}}
+    """
+    with _lock:
+        return {
+            host: {
+                'requests': counts['requests'],
+                'new_connections': counts['new_connections'],
+                'reused_connections': max(counts['requests'] - counts['new_connections'], 0),
+            }
+            for host, counts in _stats.items()
+        }
+
+
+def get_limiter_state():
+    """Per-host token bucket and circuit breaker state (see rate_limit.get_state)."""
+    return rate_limit.get_state()
+
+
+def reset_connection_stats():
+    with _lock:
+        _stats.clear()
@@ -1,51 +1,123 @@
 # scrapers/hyperliquid_native.py
 
-import requests
+from . import http_client
 
-def scrape(target_token_symbol="HYPE"):
-    """
-    Scrapes the official Hyperliquid Spot Price using the 'tokenDetails' endpoint.
+INFO_URL = "https://api.hyperliquid.xyz/info"
+
+# Spot pairs are quoted in USDC, which is token index 0 on Hyperliquid
+USDC_TOKEN_INDEX = 0
+
+
+def fetch_spot_snapshot():
     """
-    print(f"-> Starting Native API scrape for Hyperliquid ({target_token_symbol})...")
+    Fetches every Hyperliquid spot token and its USDC market in one request ('spotMetaAndAssetCtxs').
 
-    url = "https://api.hyperliquid.xyz/info"
+    Returns:
+        dict: Maps each lower-cased token id (e.g. HYPE's '0x0d01dc56dcaaca66ad901c959b4011ec')
+              and each upper-cased token name (e.g. 'HYPE') to
+              {'name', 'coin', 'mid_price', 'mark_price'}, where 'coin' is the market's
+              name in the info/WebSocket APIs (e.g. '@107'). Tokens without a USDC market are left out.
+    """
     headers = {"Content-Type": "application/json"}
-    
-    # The HYPE Token Contract Address on HyperEVM
-    # Found via Explorer/Docs
-    hype_token_id = "0x0d01dc56dcaaca66ad901c959b4011ec"
-
-    payload = {
-        "type": "tokenDetails",
-        "tokenId": hype_token_id
+    response = http_client.post(INFO_URL, json={"type": "spotMetaAndAssetCtxs"}, headers=headers)
+    response.raise_for_status()
+    meta, asset_ctxs = response.json()
+
+    # The asset contexts name their market by 'coin', which matches the universe entry's name
+    ctx_by_coin = {ctx['coin']: ctx for ctx in asset_ctxs}
+    tokens_by_index = {token['index']: token for token in meta['tokens']}
+
+    snapshot = {}
+    for market in meta['universe']:
+        base_index, quote_index = market['tokens']
+        ctx = ctx_by_coin.get(market['name'])
+        if quote_index != USDC_TOKEN_INDEX or ctx is None or base_index not in tokens_by_index:
+            continue
+
+        token = tokens_by_index[base_index]
+        entry = {
+            'name': token['name'],
+            'coin': market['name'],
+            'mid_price': float(ctx['midPx']) if ctx.get('midPx') else None,
+            'mark_price': float(ctx['markPx']) if ctx.get('markPx') else None,
+        }
+        # A token can have more than one USDC market; the canonical one wins
+        if market.get('isCanonical') or token['tokenId'].lower() not in snapshot:
+            snapshot[token['tokenId'].lower()] = entry
+            snapshot[token['name'].upper()] = entry
+    return snapshot
+
+
+def _price_dict(entry):
+    # midPx is the best current spot price; markPx covers markets with an empty side of the book
+    spot_price = entry['mid_price'] if entry['mid_price'] is not None else entry['mark_price']
+    if spot_price is None:
+        return None
+
+    # Hyperliquid Spot fees are generally 0 for this type of data check
+    fee_percentage = 0.0
+
+    return {
+        'spot_price': spot_price,
+        'pool_name': f"{entry['name']} / USDC (Native)",
+        'fee_percentage': fee_percentage,
+        'buy_price': spot_price,
+        'sell_price': spot_price
     }
 
+
+def scrape(target_token_symbol="HYPE"):
+    """
+    Scrapes the official Hyperliquid Spot Price of one token.
+    """
+    print(f"-> Starting Native API scrape for Hyperliquid ({target_token_symbol})...")
+
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        # The API returns 'midPx' (Mid Price) and 'markPx' (Mark Price)
-        # We'll use midPx as it usually represents the current spot price best
-        if 'midPx' not in data:
-            print(f"   Error: Price data (midPx) not found in response for {target_token_symbol}")
+        entry = fetch_spot_snapshot().get(target_token_symbol.upper())
+        if entry is None:
+            print(f"   Error: No USDC spot market found for {target_token_symbol}")
             return None
 
-        spot_price = float(data['midPx'])
-        
-        # Hyperliquid Spot fees are generally 0 for this type of data check
-        fee_percentage = 0.0
-
-        print(f"   Successfully scraped Hyperliquid Native Price: ${spot_price:.4f}")
-        
-        return {
-            'spot_price': spot_price,
-            'pool_name': f"{target_token_symbol} / USDC (Native)",
-            'fee_percentage': fee_percentage,
-            'buy_price': spot_price, 
-            'sell_price': spot_price
-        }
+        price_data = _price_dict(entry)
+        if price_data:
+            print(f"   Successfully scraped Hyperliquid Native Price: ${price_data['spot_price']:.4f}")
+        return price_data
 
     except Exception as e:
         print(f"   An unexpected error occurred in Hyperliquid Native scraper: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def scrape_pools(pools: list):
+    """
+    Batch entry point used by the scrape job (see SCRAPER_REGISTRY).
+
+    One 'spotMetaAndAssetCtxs' request serves every Hyperliquid row. Each row's
+    target_token_address holds the Hyperliquid token id (or the token name,
+    e.g. 'HYPE').
+
+    Returns:
+        dict: Maps each lower-cased pool_address to the standard price dict, or None.
+    """
+    print(f"-> Starting Native API snapshot for Hyperliquid ({len(pools)} tokens)...")
+    results = {pool['pool_address'].lower(): None for pool in pools}
+
+    try:
+        snapshot = fetch_spot_snapshot()
+    except Exception as e:
+        print(f"   An unexpected error occurred in Hyperliquid Native scraper: {e}")
+        return results
+
+    for pool in pools:
+        token = pool['target_token_address']
+        entry = snapshot.get(token.lower()) or snapshot.get(token.upper())
+        if entry is None:
+            print(f"   Error: No USDC spot market found for token '{token}'")
+            continue
+
+        price_data = _price_dict(entry)
+        if price_data:
+            print(f"   Successfully scraped Hyperliquid Native Price for {entry['name']}: ${price_data['spot_price']:.4f}")
+        results[pool['pool_address'].lower()] = price_data
+
+    return results
@@ -0,0 +1,206 @@
+# scrapers/hyperliquid_ws.py
+
+"""
+Long-running Hyperliquid ingestion over the WebSocket API.
+
+Minute-level polling misses most Hyperliquid price movement, so this mode
+stays subscribed to the 'allMids' feed (or one 'l2Book' feed per token) and
+records every Hyperliquid row of monitored_pools continuously:
+
+- ticks are coalesced to one sample per token per RESOLUTION_SECONDS (the
+  last mid of each window), so a busy book does not turn into a row per tick;
+- each window's samples are written to price_history in one transaction
+  through db.PriceWriter, with the same dex_name / token_pair as the REST
+  scraper, so latest_prices and the OHLC rollups stay consistent;
+- a dropped connection is retried with exponential backoff and jitter.
+
+Usage (from the project root):
+    python -m scraper.hyperliquid_ws --resolution 5 --feed allMids
+"""
+
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+
+import websockets
+
+from .hyperliquid_native import fetch_spot_snapshot, _price_dict
+
+WS_URL = "wss://api.hyperliquid.xyz/ws"
+
+# --- Ingestion Settings ---
+# One sample per token is kept per window of this many seconds
+RESOLUTION_SECONDS = 5
+# Reconnect backoff: starts at the minimum, doubles per failed attempt, capped at the maximum
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 60
+# allMids carries every market, so allow larger frames than the websockets default
+MAX_FRAME_BYTES = 8 * 1024 * 1024
+
+
+class TickCoalescer:
+    """Keeps the last price per coin inside the current time window."""
+
+    def __init__(self, resolution_seconds=RESOLUTION_SECONDS):
+        self.resolution_seconds = resolution_seconds
+        self._window = None
+        self._latest = {}
+
+    def _window_of(self, ts):
+        return int(ts // self.resolution_seconds)
+
+    def add(self, coin, price, ts):
+        """
+        Records a tick. Returns the previous window's samples if this tick starts a
+        new window, otherwise an empty list.
+        """
+        window = self._window_of(ts)
+        completed = []
+        if self._window is not None and window > self._window:
+            completed = self.drain()
+        self._window = window
+        self._latest[coin] = (price, ts)
+        return completed
+
+    def drain(self):
+        """Returns and clears the current window's samples as (coin, price, ts) tuples."""
+        samples = [(coin, price, ts) for coin, (price, ts) in self._latest.items()]
+        self._latest = {}
+        return samples
+
+
+def _mid_from_book(levels):
+    """Mid price from an l2Book snapshot: levels = [bids, asks], best level first."""
+    bids, asks = levels
+    if not bids or not asks:
+        return None
+    return (float(bids[0]['px']) + float(asks[0]['px'])) / 2
+
+
+def parse_message(message, coins):
+    """
+    Extracts (coin, mid price) ticks for the tracked coins from one WebSocket message.
+
+    Handles both {'channel': 'allMids', 'data': {'mids': {...}}} and
+    {'channel': 'l2Book', 'data': {'coin': ..., 'levels': [...]}}; anything
+    else (subscription acks, pongs) yields nothing.
+    """
+    payload = json.loads(message)
+    channel = payload.get('channel')
+    data = payload.get('data') or {}
+
+    if channel == 'allMids':
+        mids = data.get('mids', {})
+        return [(coin, float(mids[coin])) for coin in coins if coin in mids]
+    if channel == 'l2Book' and data.get('coin') in coins:
+        mid = _mid_from_book(data.get('levels', [[], []]))
+        return [(data['coin'], mid)] if mid is not None else []
+    return []
+
+
+def _subscriptions(coins, feed):
+    if feed == 'allMids':
+        return [{"method": "subscribe", "subscription": {"type": "allMids"}}]
+    return [{"method": "subscribe", "subscription": {"type": "l2Book", "coin": coin}} for coin in coins]
+
+
+async def stream_ticks(coins, feed='allMids', url=WS_URL):
+    """
+    Yields (coin, mid price, unix time the frame arrived) for the tracked coins, forever.
+
+    Reconnects with exponential backoff and full jitter whenever the connection
+    drops; the backoff resets once a connection delivers data again. A frame
+    that cannot be parsed is logged and skipped.
+    """
+    attempt = 0
+    while True:
+        try:
+            async with websockets.connect(url, max_size=MAX_FRAME_BYTES) as ws:
+                for subscription in _subscriptions(coins, feed):
+                    await ws.send(json.dumps(subscription))
+                logging.info(f"Subscribed to Hyperliquid {feed} for {len(coins)} tokens")
+
+                async for message in ws:
+                    attempt = 0
+                    received = time.time()
+                    try:
+                        ticks = parse_message(message, coins)
+                    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                        # One malformed frame must not end the stream
+                        logging.warning(f"Skipping a malformed Hyperliquid frame ({type(e).__name__}: {e}): {message[:200]!r}")
+                        continue
+                    for coin, price in ticks:
+                        yield coin, price, received
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            logging.warning(f"Hyperliquid WebSocket disconnected: {e}")
+
+        delay = random.uniform(0, min(RECONNECT_MAX_SECONDS, RECONNECT_MIN_SECONDS * 2 ** attempt))
+        attempt += 1
+        logging.info(f"Reconnecting to the Hyperliquid WebSocket in {delay:.1f}s...")
+        await asyncio.sleep(delay)
+
+
+async def ingest(pools, writer, resolution_seconds=RESOLUTION_SECONDS, feed='allMids', url=WS_URL):
+    """
+    Streams prices for the given Hyperliquid monitored_pools rows into the database.
+
+    Args:
+        pools (list): monitored_pools rows with scraper_function 'hyperliquid_native'.
+        writer: A db.PriceWriter; it is flushed once per completed window.
+    """
+    # Resolve each row's token id to its market ('@107') once, over REST
+    snapshot = fetch_spot_snapshot()
+    rows_by_coin = {}
+    for pool in pools:
+        token = pool['target_token_address']
+        entry = snapshot.get(token.lower()) or snapshot.get(token.upper())
+        if entry is None:
+            logging.error(f"No USDC spot market found for token '{token}', skipping {pool['dex_name']}")
+            continue
+        rows_by_coin.setdefault(entry['coin'], []).append((pool, entry))
+
+    if not rows_by_coin:
+        logging.warning("No Hyperliquid pools to stream.")
+        return
+
+    coalescer = TickCoalescer(resolution_seconds)
+    async for coin, price, ts in stream_ticks(set(rows_by_coin), feed=feed, url=url):
+        samples = coalescer.add(coin, price, ts)
+        if samples:
+            _store(writer, samples, rows_by_coin)
+
+
+def _store(writer, samples, rows_by_coin):
+    """Writes one window of samples in a single transaction."""
+    for coin, price, ts in samples:
+        for pool, entry in rows_by_coin[coin]:
+            price_data = _price_dict(dict(entry, mid_price=price))
+            writer.add(pool['dex_name'], price_data['pool_name'], price_data, timestamp=datetime.fromtimestamp(ts))
+    try:
+        stored = writer.flush()
+        logging.info(f"-> Stored {stored} streamed Hyperliquid prices")
+    except Exception as e:
+        logging.error(f"-> Error storing streamed prices: {e}")
+
+
+if __name__ == "__main__":
+    # The database helpers live at the project root, next to main.py
+    from db import get_writer
+    from main import getting_pools_to_scrape
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Stream Hyperliquid prices into prices.db over the WebSocket API.")
+    parser.add_argument('--resolution', type=float, default=RESOLUTION_SECONDS, help="seconds per stored sample (default: %(default)s)")
+    parser.add_argument('--feed', choices=['allMids', 'l2Book'], default='allMids', help="WebSocket feed to subscribe to")
+    parser.add_argument('--url', default=WS_URL, help="WebSocket endpoint (e.g. a local replay server)")
+    args = parser.parse_args()
+
+    hyperliquid_pools = [pool for pool in getting_pools_to_scrape() if pool['scraper_function'] == 'hyperliquid_native']
+    try:
+        asyncio.run(ingest(hyperliquid_pools, get_writer(), resolution_seconds=args.resolution, feed=args.feed, url=args.url))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,138 @@
+# scraper/metadata_cache.py
+
+"""
+Cache of the static part of every pool: which side of the pool the target
+token is on, the pair name, the fee and the tokens' addresses, decimals and
+symbols.
+
+These almost never change, so a scraper resolves them once and afterwards
+only extracts the price on each poll. Entries live in memory and in the
+pool_metadata table (migration 7), so a restart does not have to resolve
+them again; an entry older than TTL_SECONDS is treated as missing and gets
+resolved (and stored) afresh.
+
+Entries are keyed by (scraper_function, network, pool_address,
+target_token_address). On-chain readers use their RPC endpoint as the
+network, since that is what identifies the chain to them.
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+
+# Entries older than this are resolved again, in case a pool's fee or name changed
+TTL_SECONDS = 6 * 60 * 60
+
+# Columns of pool_metadata besides the key and updated_at
+FIELDS = (
+    'target_side',          # 'base' or 'quote' (token0 / token1 for on-chain pools)
+    'pair_name',
+    'fee_percentage',       # None where the fee is read on every poll (e.g. Algebra's dynamic fee)
+    'base_token_address',
+    'quote_token_address',
+    'base_decimals',
+    'quote_decimals',
+    'base_symbol',
+    'quote_symbol',
+    'kind',                 # e.g. 'v3' or 'algebra' for on-chain pools
+)
+KEY_FIELDS = ('scraper_function', 'network', 'pool_address', 'target_token_address')
+
+_UPSERT_SQL = f'''
+    INSERT INTO pool_metadata ({', '.join(KEY_FIELDS + FIELDS)}, updated_at)
+    VALUES ({', '.join('?' for _ in KEY_FIELDS + FIELDS)}, ?)
+    ON CONFLICT ({', '.join(KEY_FIELDS)}) DO UPDATE SET
+        {', '.join(f'{field} = excluded.{field}' for field in FIELDS)},
+        updated_at = excluded.updated_at
+'''
+
+_lock = threading.Lock()
+_entries = {}
+_loaded = False
+
+
+def _key(scraper_function, network, pool_address, target_token_address):
+    return (scraper_function, network, pool_address.lower(), target_token_address.lower())
+
+
+def _connect():
+    # The database helpers live at the project root, next to main.py
+    from db import DB_PATH, connect
+    return connect(DB_PATH)
+
+
+def _load():
+    """Reads every persisted entry into memory, once per process."""
+    global _loaded
+    with _lock:
+        if _loaded:
+            return
+        _loaded = True
+    try:
+        conn = _connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"SELECT {', '.join(KEY_FIELDS + FIELDS)}, updated_at FROM pool_metadata").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        # An un-migrated database only means every pool gets resolved from the upstream
+        logging.warning(f"Could not load pool_metadata: {e}")
+        return
+    with _lock:
+        for row in rows:
+            _entries.setdefault(tuple(row[field] for field in KEY_FIELDS), dict(row))
+
+
+def get(scraper_function, network, pool_address, target_token_address):
+    """Returns the pool's cached metadata (a dict with FIELDS), or None if missing or expired."""
+    _load()
+    with _lock:
+        entry = _entries.get(_key(scraper_function, network, pool_address, target_token_address))
+    if entry is None or time.time() - entry['updated_at'] > TTL_SECONDS:
+        return None
+    return entry
+
+
+def put_many(scraper_function, network, entries):
+    """
+    Stores freshly resolved metadata, in memory and in one SQLite transaction.
+
+    Args:
+        entries (list): dicts with 'pool_address', 'target_token_address' and
+                        any of FIELDS (missing fields are stored as NULL).
+    """
+    if not entries:
+        return
+    now = time.time()
+    rows = []
+    with _lock:
+        for entry in entries:
+            key = _key(scraper_function, network, entry['pool_address'], entry['target_token_address'])
+            stored = dict(zip(KEY_FIELDS, key), updated_at=now, **{field: entry.get(field) for field in FIELDS})
+            _entries[key] = stored
+            rows.append(key + tuple(stored[field] for field in FIELDS) + (now,))
+
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.executemany(_UPSERT_SQL, rows)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        # Still cached in memory; it is persisted again the next time it is resolved
+        logging.warning(f"Could not persist pool_metadata: {e}")
+
+
+def put(scraper_function, network, entry):
+    put_many(scraper_function, network, [entry])
+
+
+def clear():
+    """Forgets the in-memory entries (the next get() reloads them from SQLite)."""
+    global _loaded
+    with _lock:
+        _entries.clear()
+        _loaded = False
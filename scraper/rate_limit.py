@@ -0,0 +1,182 @@
+# scraper/rate_limit.py
+
+"""
+Per-host request pacing and failure isolation, shared by every scraper.
+
+Each upstream host gets:
+
+- a token bucket sized to the provider's quota (HOST_LIMITS), so the scrape
+  job's worker threads together never send more than the host allows and a
+  burst waits for a token instead of being answered with 429;
+- a circuit breaker that opens after BREAKER_FAILURE_THRESHOLD failures in a
+  row. While open, requests to the host fail immediately instead of
+  hammering it; after BREAKER_RESET_SECONDS one trial request is let through
+  and closes the breaker again if it succeeds.
+
+http_client.request() goes through both; get_state() reports them.
+"""
+
+import time
+import threading
+
+# --- Provider Quotas ---
+# host -> (requests per second, burst size)
+# GeckoTerminal's public API allows 30 calls per minute.
+HOST_LIMITS = {
+    'api.geckoterminal.com': (0.5, 5),
+    'api.hyperliquid.xyz': (10, 20),
+}
+# Hosts not listed above (e.g. other RPC endpoints)
+DEFAULT_LIMIT = (10, 10)
+
+# --- Circuit Breaker Settings ---
+# Failures in a row that open the breaker
+BREAKER_FAILURE_THRESHOLD = 5
+# Seconds the breaker stays open before a trial request is allowed
+BREAKER_RESET_SECONDS = 30
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        # Nothing is handed out before this (set from a Retry-After header)
+        self._paused_until = 0.0
+        self._waited = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Takes one token, waiting for it if needed.
+
+        Returns:
+            bool: False if no token became available within `timeout` seconds.
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._waited += now - started
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hands out no tokens for the next `seconds` (the host asked us to back off)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+    def state(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'rate_per_second': self.rate,
+                'capacity': self.capacity,
+                'tokens': round(self._tokens, 2),
+                'paused_for_seconds': round(max(self._paused_until - now, 0), 2),
+                'total_wait_seconds': round(self._waited, 2),
+            }
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` failures in a row -> half-open after `reset_seconds`."""
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a request may be sent now. In half-open state only one trial request is allowed."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                # (Re)open: a failed trial request restarts the wait
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                state = 'closed'
+            elif time.monotonic() - self._opened_at < self.reset_seconds:
+                state = 'open'
+            else:
+                state = 'half_open'
+            return {'state': state, 'consecutive_failures': self._failures}
+
+
+_lock = threading.Lock()
+_limiters = {}
+_breakers = {}
+
+
+def get_limiter(host):
+    """Returns the host's token bucket, creating it from HOST_LIMITS on first use."""
+    with _lock:
+        if host not in _limiters:
+            _limiters[host] = TokenBucket(*HOST_LIMITS.get(host, DEFAULT_LIMIT))
+        return _limiters[host]
+
+
+def get_breaker(host):
+    with _lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+def get_state():
+    """
+    Returns the limiter and breaker state of every host used so far.
+
+    Example: {'api.geckoterminal.com': {'limiter': {'tokens': 3.5, ...},
+              'breaker': {'state': 'closed', 'consecutive_failures': 0}}}
+    """
+    with _lock:
+        hosts = sorted(set(_limiters) | set(_breakers))
+    return {
+        host: {'limiter': get_limiter(host).state(), 'breaker': get_breaker(host).state()}
+        for host in hosts
+    }
+
+
+def reset():
+    """Forgets every limiter and breaker (e.g. after changing HOST_LIMITS)."""
+    with _lock:
+        _limiters.clear()
+        _breakers.clear()
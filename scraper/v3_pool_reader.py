@@ -0,0 +1,338 @@
+# scraper/v3_pool_reader.py
+
+"""
+Reads Uniswap V3 and Algebra style pools straight from the chain.
+
+Every call for every pool is packed into a single Multicall3 `aggregate3`
+eth_call, so reading 50 pools costs one JSON-RPC request instead of 100+.
+Static pool data (tokens, decimals, symbols, whether the pool is V3 or
+Algebra, and a V3 pool's fixed fee) is read once and cached, in memory and
+in metadata_cache; after that a poll only reads the price state (slot0 /
+globalState and liquidity).
+"""
+
+import threading
+
+from eth_abi import encode, decode
+from eth_utils import keccak, to_checksum_address
+
+from . import http_client
+from . import metadata_cache
+from .exceptions import ScrapingError
+
+# The scraper_function value of these pools, which namespaces their metadata_cache entries
+SCRAPER_FUNCTION = 'v3_rpc'
+
+# Multicall3 is deployed at the same address on every EVM chain
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# network column in monitored_pools -> JSON-RPC endpoint
+RPC_URLS = {
+    'hyperevm': "https://api.hyperliquid.xyz/evm",
+}
+
+# Pools per eth_call; keeps the multicall well under the node's gas cap for eth_call
+MAX_POOLS_PER_CALL = 100
+
+
+def _selector(signature):
+    return keccak(text=signature)[:4]
+
+
+AGGREGATE3 = _selector("aggregate3((address,bool,bytes)[])")
+SLOT0 = _selector("slot0()")              # Uniswap V3: (sqrtPriceX96, tick, ...)
+GLOBAL_STATE = _selector("globalState()")  # Algebra: (price, tick, fee, ...)
+LIQUIDITY = _selector("liquidity()")
+FEE = _selector("fee()")
+TOKEN0 = _selector("token0()")
+TOKEN1 = _selector("token1()")
+DECIMALS = _selector("decimals()")
+SYMBOL = _selector("symbol()")
+
+# Static metadata, keyed by (rpc_url, lower-cased address)
+_pool_metadata = {}
+_token_metadata = {}
+_cache_lock = threading.Lock()
+
+
+def _word(data, index):
+    """Reads the index-th 32-byte word of ABI-encoded return data as an unsigned int."""
+    return int.from_bytes(data[32 * index:32 * (index + 1)], 'big')
+
+
+def _decode_symbol(data):
+    """symbol() is a string on most tokens, but a bytes32 on some old ones."""
+    try:
+        return decode(['string'], data)[0]
+    except Exception:
+        return data[:32].rstrip(b'\x00').decode('utf-8', errors='ignore') or '?'
+
+
+def multicall(rpc_url, calls, block='latest'):
+    """
+    Runs many contract calls in one eth_call through Multicall3.
+
+    Args:
+        calls (list): (target address, calldata bytes) tuples. Each call may fail
+                      on its own without failing the batch.
+
+    Returns:
+        list: The return data (bytes) of each call, or None where the call reverted.
+    """
+    payload = encode(
+        ['(address,bool,bytes)[]'],
+        [[(to_checksum_address(target), True, calldata) for target, calldata in calls]]
+    )
+    request = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "eth_call",
+        "params": [{"to": MULTICALL3_ADDRESS, "data": "0x" + (AGGREGATE3 + payload).hex()}, block],
+    }
+    response = http_client.post(rpc_url, json=request)
+    response.raise_for_status()
+    body = response.json()
+    if 'error' in body:
+        raise ScrapingError(f"eth_call failed: {body['error']}")
+
+    results = decode(['(bool,bytes)[]'], bytes.fromhex(body['result'][2:]))[0]
+    return [data if success and data else None for success, data in results]
+
+
+def _seed_from_cache(rpc_url, addresses, targets):
+    """Fills the in-memory caches from metadata_cache (e.g. after a restart). Returns the addresses still missing."""
+    missing = []
+    entries = {}
+    for address in addresses:
+        entry = metadata_cache.get(SCRAPER_FUNCTION, rpc_url, address, targets[address])
+        if entry is None or entry['kind'] is None:
+            missing.append(address)
+        else:
+            entries[address] = entry
+
+    with _cache_lock:
+        for address, entry in entries.items():
+            token0, token1 = entry['base_token_address'], entry['quote_token_address']
+            _pool_metadata[(rpc_url, address)] = {
+                'kind': entry['kind'],
+                'token0': token0,
+                'token1': token1,
+                # fee() of a V3 pool never changes; Algebra's fee is dynamic and read on every poll
+                'fee_units': round(entry['fee_percentage'] * 10_000) if entry['kind'] == 'v3' else None,
+            }
+            _token_metadata.setdefault((rpc_url, token0), {'decimals': entry['base_decimals'], 'symbol': entry['base_symbol']})
+            _token_metadata.setdefault((rpc_url, token1), {'decimals': entry['quote_decimals'], 'symbol': entry['quote_symbol']})
+    return missing
+
+
+def _cache_entry(address, target, meta, token0, token1):
+    """The metadata_cache entry of one pool, or None if the target is not one of its tokens."""
+    if target == meta['token0']:
+        target_side, pair_name = 'base', f"{token0['symbol']} / {token1['symbol']}"
+    elif target == meta['token1']:
+        target_side, pair_name = 'quote', f"{token1['symbol']} / {token0['symbol']}"
+    else:
+        return None
+    return {
+        'pool_address': address,
+        'target_token_address': target,
+        'target_side': target_side,
+        'pair_name': pair_name,
+        'fee_percentage': meta['fee_units'] / 10_000 if meta['fee_units'] is not None else None,
+        'base_token_address': meta['token0'],
+        'quote_token_address': meta['token1'],
+        'base_decimals': token0['decimals'],
+        'quote_decimals': token1['decimals'],
+        'base_symbol': token0['symbol'],
+        'quote_symbol': token1['symbol'],
+        'kind': meta['kind'],
+    }
+
+
+def _load_metadata(rpc_url, pools, targets):
+    """
+    Makes sure the static data of the given pools is cached, reading it from
+    metadata_cache or, for pools not seen before, from the chain (at most two eth_calls).
+
+    Round 1 asks every new pool for token0/token1/fee and both slot0() and
+    globalState(); whichever of the last two answers tells V3 and Algebra apart.
+    Round 2 reads decimals and symbol of every token that is not cached yet.
+    """
+    with _cache_lock:
+        missing = [address for address in pools if (rpc_url, address) not in _pool_metadata]
+    if missing:
+        missing = _seed_from_cache(rpc_url, missing, targets)
+    if not missing:
+        return
+
+    calls = []
+    for address in missing:
+        calls += [(address, TOKEN0), (address, TOKEN1), (address, FEE), (address, SLOT0), (address, GLOBAL_STATE)]
+    results = multicall(rpc_url, calls)
+
+    new_pools = {}
+    for i, address in enumerate(missing):
+        token0, token1, fee, slot0, global_state = results[5 * i:5 * i + 5]
+        if token0 is None or token1 is None or (slot0 is None and global_state is None):
+            print(f"   Error: {address} does not look like a V3 or Algebra pool.")
+            continue
+        kind = 'v3' if slot0 is not None else 'algebra'
+        if kind == 'v3' and fee is None:
+            print(f"   Error: Could not read fee() of pool {address}.")
+            continue
+        new_pools[address] = {
+            'kind': kind,
+            # An address is returned as the last 20 bytes of a 32-byte word
+            'token0': '0x' + token0[12:32].hex(),
+            'token1': '0x' + token1[12:32].hex(),
+            'fee_units': _word(fee, 0) if kind == 'v3' else None,
+        }
+
+    with _cache_lock:
+        tokens = {t for meta in new_pools.values() for t in (meta['token0'], meta['token1'])}
+        tokens = sorted(t for t in tokens if (rpc_url, t) not in _token_metadata)
+
+    if tokens:
+        calls = []
+        for token in tokens:
+            calls += [(token, DECIMALS), (token, SYMBOL)]
+        results = multicall(rpc_url, calls)
+        with _cache_lock:
+            for i, token in enumerate(tokens):
+                decimals, symbol = results[2 * i], results[2 * i + 1]
+                if decimals is None:
+                    print(f"   Error: Could not read decimals() of token {token}.")
+                    continue
+                _token_metadata[(rpc_url, token)] = {
+                    'decimals': _word(decimals, 0),
+                    'symbol': _decode_symbol(symbol) if symbol else '?',
+                }
+
+    entries = []
+    with _cache_lock:
+        for address, meta in new_pools.items():
+            token0 = _token_metadata.get((rpc_url, meta['token0']))
+            token1 = _token_metadata.get((rpc_url, meta['token1']))
+            if token0 is None or token1 is None:
+                continue
+            _pool_metadata[(rpc_url, address)] = meta
+            entry = _cache_entry(address, targets[address], meta, token0, token1)
+            if entry is not None:
+                entries.append(entry)
+    # Persisted so the next process skips both rounds
+    metadata_cache.put_many(SCRAPER_FUNCTION, rpc_url, entries)
+
+
+def _price_dict(meta, token0, token1, target, sqrt_price_x96, fee_units, liquidity):
+    """Turns raw pool state into the standard scraper dict for the target token."""
+    # price of token0 in token1 = (sqrtPriceX96 / 2**96)**2, adjusted for the token decimals
+    price0_in_1 = (sqrt_price_x96 / 2**96) ** 2 * 10 ** (token0['decimals'] - token1['decimals'])
+
+    if target == meta['token0']:
+        spot_price = price0_in_1
+        pool_name = f"{token0['symbol']} / {token1['symbol']}"
+    elif target == meta['token1']:
+        spot_price = 1 / price0_in_1
+        pool_name = f"{token1['symbol']} / {token0['symbol']}"
+    else:
+        print(f"   Error: Target token address '{target}' not found in pool.")
+        return None
+
+    # V3 and Algebra fees are both in hundredths of a bip (3000 = 0.3%)
+    fee_percentage = fee_units / 10_000
+    fee_multiplier = fee_percentage / 100
+
+    return {
+        'spot_price': spot_price,
+        'pool_name': pool_name,
+        'fee_percentage': fee_percentage,
+        'buy_price': spot_price / (1 - fee_multiplier) if fee_multiplier < 1 else spot_price,
+        'sell_price': spot_price * (1 - fee_multiplier),
+        'liquidity': liquidity,
+    }
+
+
+def read_pools(rpc_url, pools):
+    """
+    Reads the current price of many V3/Algebra pools on one chain.
+
+    Args:
+        rpc_url (str): JSON-RPC endpoint of the chain.
+        pools (list): dicts with 'pool_address' and 'target_token_address'.
+
+    Returns:
+        dict: Maps each lower-cased pool address to the standard price dict
+              ('spot_price' is the target token priced in the pool's other
+              token), or None if that pool could not be read.
+    """
+    results = {pool['pool_address'].lower(): None for pool in pools}
+    targets = {pool['pool_address'].lower(): pool['target_token_address'].lower() for pool in pools}
+    addresses = list(results)
+    print(f"-> Starting Multicall RPC read of {len(addresses)} V3/Algebra pools...")
+
+    for start in range(0, len(addresses), MAX_POOLS_PER_CALL):
+        chunk = addresses[start:start + MAX_POOLS_PER_CALL]
+        _load_metadata(rpc_url, chunk, targets)
+
+        with _cache_lock:
+            readable = [(address, _pool_metadata[(rpc_url, address)]) for address in chunk if (rpc_url, address) in _pool_metadata]
+        if not readable:
+            continue
+
+        # The hot path: one eth_call with just the price state of every pool
+        calls = []
+        for address, meta in readable:
+            calls += [(address, SLOT0 if meta['kind'] == 'v3' else GLOBAL_STATE), (address, LIQUIDITY)]
+        state = multicall(rpc_url, calls)
+
+        for i, (address, meta) in enumerate(readable):
+            slot0, liquidity = state[2 * i:2 * i + 2]
+            if meta['kind'] == 'v3':
+                fee_units = meta['fee_units']
+            else:
+                # Algebra keeps the (dynamic) fee in globalState, right after price and tick
+                fee_units = _word(slot0, 2) if slot0 else None
+
+            if slot0 is None or liquidity is None or fee_units is None:
+                print(f"   Error: Could not read the state of pool {address}.")
+                continue
+            if _word(liquidity, 0) == 0:
+                print(f"   Error: Pool {address} has no liquidity.")
+                continue
+
+            with _cache_lock:
+                token0 = _token_metadata[(rpc_url, meta['token0'])]
+                token1 = _token_metadata[(rpc_url, meta['token1'])]
+            price = _price_dict(meta, token0, token1, targets[address], _word(slot0, 0), fee_units, _word(liquidity, 0))
+            if price:
+                print(f"   Successfully read {price['pool_name']} via RPC: Spot={price['spot_price']:.6f}, Fee={price['fee_percentage']}%")
+            results[address] = price
+
+    return results
+
+
+def scrape_v3_pools(pools):
+    """
+    Batch scraper for monitored_pools rows with scraper_function 'v3_rpc'.
+    Rows are grouped by network, and each network costs one eth_call per poll.
+
+    Returns:
+        dict: Maps each lower-cased pool address to a price dict, or None if it failed.
+    """
+    results = {}
+    pools_by_network = {}
+    for pool in pools:
+        pools_by_network.setdefault(pool['network'], []).append(pool)
+
+    for network, network_pools in pools_by_network.items():
+        rpc_url = RPC_URLS.get(network)
+        if rpc_url is None:
+            print(f"   Error: No RPC endpoint configured for network '{network}'.")
+            results.update({pool['pool_address'].lower(): None for pool in network_pools})
+            continue
+        try:
+            results.update(read_pools(rpc_url, network_pools))
+        except Exception as e:
+            print(f"   An unexpected error occurred in the V3 RPC reader ({network}): {e}")
+            results.update({pool['pool_address'].lower(): None for pool in network_pools})
+    return results
@@ -1,5 +1,8 @@
 # seed_pools.py
-import sqlite3
+import argparse
+
+# Writes to db.DB_PATH through the same upsert as the bulk import endpoint
+from pool_import import import_pools, print_report
 
 # --- List of pools to scrape from GeckoTerminal ---
 """
@@ -62,29 +65,16 @@ pools_to_scrape = [
 
 ]
 
-def seed_pools():
-    """Function to seed the monitored_pools table with predefined pools."""
-    conn = sqlite3.connect('prices.db')
-    cursor = conn.cursor()
-
-    # Clear existing config to avoid duplicates (optional)
-    cursor.execute('DELETE FROM monitored_pools')
-
-    for pool in pools_to_scrape:
-        cursor.execute('''
-        INSERT INTO monitored_pools (dex_name, scraper_function, network, pool_address, target_token_address)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (
-            pool['dex_name'],
-            pool['scraper_function'],
-            pool['network'],
-            pool['pool_address'],
-            pool['target_token_address']
-        ))
-
-    conn.commit()
-    conn.close()
+def seed_pools(validate=False):
+    """
+    Adds the predefined pools to monitored_pools, or updates them if already there.
+    Pools added some other way (e.g. through /add_scrap_pool) are left alone.
+    """
+    report = import_pools(pools_to_scrape, validate=validate)
+    print_report(report)
     print("Monitored pools seeded successfully.")
 
 if __name__ == "__main__":
-    seed_pools()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed monitored_pools with the predefined pools.")
+    parser.add_argument('--validate', action='store_true', help="scrape every pool once and skip the ones that fail")
+    seed_pools(validate=parser.parse_args().validate)
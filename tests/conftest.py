@@ -0,0 +1,46 @@
+# tests/conftest.py
+"""
+Shared fixtures: the project root and benchmarks/ on sys.path, a scratch
+database with every migration applied, and a test client of the API.
+"""
+import os
+import sys
+from collections import OrderedDict
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [PROJECT_DIR, os.path.join(PROJECT_DIR, 'benchmarks')]
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A migrated scratch prices.db that db.DB_PATH (and so every helper reading it at call time) points at."""
+    import db
+    import migrations
+
+    path = str(tmp_path / 'prices.db')
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    migrations.migrate(path)
+    return path
+
+
+@pytest.fixture(scope='session')
+def api_module(tmp_path_factory):
+    """api.py, imported from a scratch directory so its log file is not written into the project."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('api'))
+    try:
+        import api
+    finally:
+        os.chdir(cwd)
+    return api
+
+
+@pytest.fixture
+def api_client(api_module, db_path, monkeypatch):
+    """A Flask test client of the API, reading the scratch database."""
+    monkeypatch.setattr(api_module, 'DB_PATH', db_path)
+    # Every scratch database starts at the same generation, so cached responses must not carry over
+    monkeypatch.setattr(api_module.response_cache, '_entries', OrderedDict())
+    return api_module.app.test_client()
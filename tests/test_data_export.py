@@ -0,0 +1,34 @@
+# tests/test_data_export.py
+"""/data?format=ndjson|csv: streamed rows carry their cursor, so an export can be resumed."""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from db import PriceWriter
+
+
+def _seed(db_path, count=10):
+    writer = PriceWriter(db_path=db_path)
+    for minute in range(count):
+        writer.add('Project X', 'WHYPE/USDT', {'spot_price': 100.0 + minute, 'fee_percentage': 0.3},
+                   timestamp=datetime(2025, 1, 1) + timedelta(minutes=minute))
+    writer.flush()
+
+
+def test_ndjson_export_resumes_from_the_last_row_received(api_client, db_path):
+    _seed(db_path)
+    rows = [json.loads(line) for line in api_client.get('/data?format=ndjson').get_data(as_text=True).splitlines()]
+    assert len(rows) == 10
+
+    # Pretend the connection dropped after 4 rows
+    last = rows[3]
+    resumed = api_client.get(f"/data?format=ndjson&before={last['ts']},{last['id']}").get_data(as_text=True)
+    assert [json.loads(line) for line in resumed.splitlines()] == rows[4:]
+
+
+def test_csv_export_has_the_cursor_columns(api_client, db_path):
+    _seed(db_path, count=2)
+    rows = list(csv.DictReader(io.StringIO(api_client.get('/data?format=csv').get_data(as_text=True))))
+    assert list(rows[0])[-2:] == ['id', 'ts']
+    assert int(rows[0]['ts']) > int(rows[1]['ts'])
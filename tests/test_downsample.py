@@ -0,0 +1,86 @@
+# tests/test_downsample.py
+"""
+/data?max_points: LTTB over raw rows read in chunks, and over the OHLC rollups
+once the range holds more than MAX_DOWNSAMPLE_ROWS rows.
+"""
+import sqlite3
+from datetime import datetime, timedelta
+
+from db import PriceWriter
+from downsample import downsample_ids, fetch_records
+
+START = datetime(2025, 1, 1)
+MINUTES = 180
+DEXES = ['Project X', 'Upheaval']
+
+
+def _seed(db_path):
+    writer = PriceWriter(db_path=db_path)
+    for minute in range(MINUTES):
+        for offset, dex_name in enumerate(DEXES):
+            spot = 100.0 + offset + (50.0 if minute == 90 else 0.0)
+            writer.add(dex_name, 'WHYPE/USDT', {'spot_price': spot, 'fee_percentage': 0.3},
+                       timestamp=START + timedelta(minutes=minute))
+    writer.flush()
+
+
+def test_fetch_records_reads_in_chunks_up_to_count():
+    conn = sqlite3.connect(':memory:')
+    rows = [(i, 1000 * i, i % 2, 1, float(i)) for i in range(10)]
+    query = "SELECT * FROM (VALUES " + ', '.join(str(row) for row in rows) + ")"
+
+    records = fetch_records(conn.execute(query), 10, chunk_size=3)
+    assert records['id'].tolist() == list(range(10))
+    assert records['spot'].tolist() == [float(i) for i in range(10)]
+
+    # Rows past count (e.g. stored after the COUNT) are not read
+    assert len(fetch_records(conn.execute(query), 4, chunk_size=3)) == 4
+
+
+def test_downsample_ids_keeps_the_ends_and_the_spike_of_every_series():
+    conn = sqlite3.connect(':memory:')
+    spots = [1.0] * 50
+    spots[20] = 9.0
+    query = "SELECT * FROM (VALUES " + ', '.join(
+        str((2 * i + dex_id, 1000 * i, dex_id, 1, spot)) for i, spot in enumerate(spots) for dex_id in (0, 1)) + ")"
+    records = fetch_records(conn.execute(query), 100)
+
+    kept = downsample_ids(records, 5)
+    for dex_id in (0, 1):
+        series = sorted(i for i in kept if i % 2 == dex_id)
+        assert len(series) == 5
+        assert series[0] == dex_id and series[-1] == 98 + dex_id
+        assert 40 + dex_id in series
+
+
+def test_raw_rows_below_the_cap(api_client, db_path):
+    _seed(db_path)
+    response = api_client.get('/data?max_points=10')
+    assert response.status_code == 200
+    assert response.headers['X-Downsample-Source'] == 'raw'
+
+    rows = response.get_json()
+    for dex_name in DEXES:
+        series = [row for row in rows if row['dex_name'] == dex_name]
+        assert len(series) == 10
+        assert max(row['spot_price'] for row in series) >= 150.0
+    assert [row['timestamp'] for row in rows] == sorted((row['timestamp'] for row in rows), reverse=True)
+
+
+def test_rollups_above_the_cap(api_module, api_client, db_path, monkeypatch):
+    _seed(db_path)
+    monkeypatch.setattr(api_module, 'MAX_DOWNSAMPLE_ROWS', 100)
+
+    # 180 minutes, 4 buckets per point: 5m is the finest interval with at most 40 buckets
+    response = api_client.get('/data?max_points=10')
+    assert response.status_code == 200
+    assert response.headers['X-Downsample-Source'] == 'ohlc-5m'
+
+    rows = response.get_json()
+    for offset, dex_name in enumerate(DEXES):
+        series = [row for row in rows if row['dex_name'] == dex_name]
+        assert len(series) == 10
+        assert all(row['fee_percentage'] == 0.3 for row in series)
+        # The close of the last bucket is the last price written
+        assert series[0]['spot_price'] == 100.0 + offset
+        assert series[0]['timestamp'] == '2025-01-01 02:59:00.000'
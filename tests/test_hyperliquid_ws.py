@@ -0,0 +1,169 @@
+# tests/test_hyperliquid_ws.py
+"""
+ingest() against a local websockets replay server that plays recorded allMids
+and l2Book frames (tests/fixtures/hyperliquid_ws_frames.json), one list of
+frames per connection, closing the connection after every list but the last.
+The REST token lookup is answered by benchmarks/stub_upstreams.py.
+"""
+import os
+import json
+import asyncio
+
+import pytest
+import websockets
+
+from db import PriceWriter, connect
+from scraper import hyperliquid_native, hyperliquid_ws, rate_limit
+from stub_upstreams import UpstreamStub
+
+FRAMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'hyperliquid_ws_frames.json')
+
+# The stub's Hyperliquid pools 0 and 1 trade as markets '@1' and '@2'
+POOL_COUNT = 2
+
+
+@pytest.fixture(scope='module')
+def stub():
+    stub = UpstreamStub({'hyperliquid_native': POOL_COUNT}).start()
+    rate_limit.HOST_LIMITS['127.0.0.1'] = (1e6, 1e6)
+    rate_limit.reset()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def frames():
+    with open(FRAMES_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(autouse=True)
+def local_upstreams(stub, monkeypatch):
+    monkeypatch.setattr(hyperliquid_native, 'INFO_URL', f"{stub.base_url}/hyperliquid/info")
+    monkeypatch.setattr(hyperliquid_ws, 'RECONNECT_MIN_SECONDS', 0.01)
+
+
+class FrameClock:
+    """Stands in for the time module: each received frame is stamped with its recorded time."""
+
+    def __init__(self, connections):
+        self._times = iter([entry['t'] for frames in connections for entry in frames])
+
+    def time(self):
+        return next(self._times)
+
+
+class RecordingWriter(PriceWriter):
+    """A PriceWriter that remembers which (dex_name, spot_price) records each flush wrote."""
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.flushes = []
+        self._pending = []
+
+    def add(self, dex_name, token_pair, data, timestamp=None):
+        self._pending.append((dex_name, data['spot_price']))
+        super().add(dex_name, token_pair, data, timestamp=timestamp)
+
+    def flush(self):
+        written = super().flush()
+        self.flushes.append(sorted(self._pending))
+        self._pending = []
+        return written
+
+
+async def _replay(connections, writer, pools, feed, expected_flushes):
+    """Serves one list of frames per connection and runs ingest() until it flushed expected_flushes times."""
+    subscriptions = []
+
+    async def handler(ws):
+        index = len(subscriptions)
+        subscriptions.append([])
+        for _ in hyperliquid_ws._subscriptions({pool['coin'] for pool in pools}, feed):
+            subscriptions[index].append(json.loads(await ws.recv()))
+        for entry in connections[index]:
+            frame = entry['frame']
+            await ws.send(frame if isinstance(frame, str) else json.dumps(frame))
+        if index < len(connections) - 1:
+            await ws.close()
+        else:
+            await ws.wait_closed()
+
+    async with websockets.serve(handler, '127.0.0.1', 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        task = asyncio.create_task(hyperliquid_ws.ingest(
+            pools, writer, resolution_seconds=1, feed=feed, url=f"ws://127.0.0.1:{port}"))
+
+        async def flushed():
+            while len(writer.flushes) < expected_flushes:
+                if task.done():
+                    task.result()
+                await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.wait_for(flushed(), timeout=10)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    return subscriptions
+
+
+def _pools(stub):
+    pools = stub.pools()
+    for i, pool in enumerate(pools):
+        pool['coin'] = f"@{i + 1}"
+    return pools
+
+
+def test_allmids_are_coalesced_per_window_and_survive_a_reconnect(stub, frames, db_path, monkeypatch):
+    connections = frames['allMids']
+    monkeypatch.setattr(hyperliquid_ws, 'time', FrameClock(connections))
+    writer = RecordingWriter(db_path)
+    pools = _pools(stub)
+
+    subscriptions = asyncio.run(_replay(connections, writer, pools, 'allMids', expected_flushes=2))
+
+    # The server closed the first connection; the client subscribed again on a second one
+    assert subscriptions == [[{'method': 'subscribe', 'subscription': {'type': 'allMids'}}]] * 2
+    # One bulk flush per completed one-second window, holding the last mid of each token.
+    # The truncated frame and the unparseable price were skipped without ending the stream.
+    assert writer.flushes == [
+        [('Hyperliquid 0', 11.0), ('Hyperliquid 1', 21.0)],
+        [('Hyperliquid 0', 13.0), ('Hyperliquid 1', 23.0)],
+    ]
+    writer.close()
+
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT dex_name, token_pair, spot_price FROM hype_prices ORDER BY ts, dex_name").fetchall()
+    finally:
+        conn.close()
+    assert rows == [
+        ('Hyperliquid 0', 'TKN1 / USDC (Native)', 11.0),
+        ('Hyperliquid 1', 'TKN2 / USDC (Native)', 21.0),
+        ('Hyperliquid 0', 'TKN1 / USDC (Native)', 13.0),
+        ('Hyperliquid 1', 'TKN2 / USDC (Native)', 23.0),
+    ]
+
+
+def test_l2book_mids_are_coalesced_and_bad_books_skipped(stub, frames, db_path, monkeypatch):
+    connections = frames['l2Book']
+    monkeypatch.setattr(hyperliquid_ws, 'time', FrameClock(connections))
+    writer = RecordingWriter(db_path)
+    pools = _pools(stub)
+
+    subscriptions = asyncio.run(_replay(connections, writer, pools, 'l2Book', expected_flushes=1))
+    writer.close()
+
+    assert sorted(s['subscription']['coin'] for s in subscriptions[0]) == ['@1', '@2']
+    # '@1': the one-sided book and the level without a price are skipped, the later book wins
+    assert writer.flushes == [[('Hyperliquid 0', 11.0), ('Hyperliquid 1', 20.0)]]
+
+
+def test_parse_message_raises_on_malformed_frames():
+    with pytest.raises(ValueError):
+        hyperliquid_ws.parse_message('{"channel": "allMids", "data": ', {'@1'})
+    with pytest.raises(ValueError):
+        hyperliquid_ws.parse_message('{"channel": "allMids", "data": {"mids": {"@1": "x"}}}', {'@1'})
+    assert hyperliquid_ws.parse_message('{"channel": "pong"}', {'@1'}) == []
@@ -0,0 +1,106 @@
+# tests/test_jobs.py
+"""
+JobManager against a scratch database. Separate managers on the same file stand
+in for two gunicorn workers of the API and for the scheduler leader.
+"""
+import time
+
+import jobs
+import pool_scheduler
+from db import connect
+from jobs import JobManager
+from pool_import import import_pools
+
+RESULTS = [
+    {'pool': {'dex_name': 'Project X', 'pool_address': '0x01'}, 'status': 'ok', 'error': None, 'elapsed': 0.1234},
+    {'pool': {'dex_name': 'Upheaval', 'pool_address': '0x02'}, 'status': 'timeout', 'error': 'Timed out', 'elapsed': None},
+]
+
+
+def test_jobs_are_shared_and_deduplicated_across_processes(db_path):
+    api_worker, other_api_worker, leader = (JobManager(db_path=db_path) for _ in range(3))
+    job, created = api_worker.submit()
+    assert created and job['status'] == 'queued'
+
+    # Another API worker sees the queued job instead of queueing a second one
+    again, created = other_api_worker.submit()
+    assert not created and again['id'] == job['id']
+    assert other_api_worker.get(job['id'])['status'] == 'queued'
+
+    # Nothing was scraped until the leader picked the job up
+    assert leader.run_next(lambda: RESULTS) == job['id']
+    finished = other_api_worker.get(job['id'])
+    assert finished['status'] == 'succeeded'
+    assert finished['started_at'] is not None and finished['finished_at'] is not None
+    assert finished['summary'] == {'pools': 2, 'ok': 1, 'failed': 0, 'error': 0, 'timeout': 1}
+    assert finished['pools'][0] == {'dex_name': 'Project X', 'pool_address': '0x01', 'status': 'ok', 'error': None, 'elapsed': 0.123}
+    assert leader.run_next(lambda: RESULTS) is None
+
+    # Once it finished, the next trigger queues a new job
+    job, created = api_worker.submit()
+    assert created and job['id'] != finished['id']
+
+
+def test_failed_job_records_the_error(db_path):
+    def job_fn():
+        raise RuntimeError("upstream down")
+
+    manager = JobManager(db_path=db_path)
+    job, _ = manager.submit()
+    manager.run_next(job_fn)
+    finished = manager.get(job['id'])
+    assert finished['status'] == 'failed'
+    assert finished['error'] == "upstream down"
+    assert finished['pools'] == [] and finished['summary'] is None
+
+
+def test_abandoned_job_stops_blocking_new_ones(db_path):
+    conn = connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO scrape_jobs (id, status, created_at) VALUES ('dead', 'running', ?)",
+                     (time.time() - jobs.STALE_JOB_SECONDS - 1,))
+    conn.close()
+
+    manager = JobManager(db_path=db_path)
+    job, created = manager.submit()
+    assert created and job['id'] != 'dead'
+    assert manager.get('dead')['status'] == 'failed'
+
+
+def test_only_the_newest_finished_jobs_are_kept(db_path):
+    manager = JobManager(db_path=db_path, max_finished=2)
+    ids = []
+    for _ in range(4):
+        job, _ = manager.submit()
+        manager.run_next(lambda: RESULTS)
+        ids.append(job['id'])
+    # Old jobs are deleted when a new one is queued, so the 2 kept are the ones before the last
+    assert [manager.get(job_id) is not None for job_id in ids] == [False, True, True, True]
+
+
+def test_tick_reschedules_the_manual_job_pools_instead_of_scraping_them_again(db_path, monkeypatch):
+    import_pools([dict(pool, scraper_function='geckoterminal', network='hyperevm', target_token_address='0x55')
+                  for pool in (RESULTS[0]['pool'], RESULTS[1]['pool'])], validate=False, db_path=db_path)
+    monkeypatch.setattr(pool_scheduler, 'DB_PATH', db_path)
+
+    calls = []
+
+    def scrape(pools=None):
+        calls.append('due pools' if pools is not None else 'manual job')
+        # The manual job scrapes every pool, which are all due here too (next_due_at = 0)
+        pools = pool_scheduler.get_due_pools(now=float('inf')) if pools is None else pools
+        return [{'pool': pool, 'status': 'ok', 'data': {'spot_price': 1.0}, 'error': None, 'elapsed': 0.1} for pool in pools]
+
+    monkeypatch.setattr(pool_scheduler, 'run_scraper_job', scrape)
+
+    manager = JobManager(db_path=db_path)
+    job, _ = manager.submit()
+    before = time.time()
+    pool_scheduler.run_tick(manager)
+    assert calls == ['manual job']
+    assert manager.get(job['id'])['status'] == 'succeeded'
+    assert all(pool['next_due_at'] > before for pool in pool_scheduler.get_due_pools(now=float('inf')))
+
+    # Without a queued job, the tick only scrapes what is due
+    pool_scheduler.run_tick(manager)
+    assert calls == ['manual job']
@@ -0,0 +1,74 @@
+# tests/test_pool_import.py
+import sqlite3
+
+import pytest
+
+from db import connect
+from pool_import import import_pools
+
+POOL = {
+    'dex_name': 'Project X',
+    'scraper_function': 'geckoterminal',
+    'network': 'hyperevm',
+    'pool_address': '0xabcdef0000000000000000000000000000000001',
+    'target_token_address': '0x5555555555555555555555555555555555555555',
+}
+
+
+def _stored(db_path):
+    conn = connect(db_path)
+    try:
+        return conn.execute("SELECT pool_address, dex_name FROM monitored_pools").fetchall()
+    finally:
+        conn.close()
+
+
+def test_address_in_another_case_updates_the_existing_row(db_path):
+    assert import_pools([POOL], validate=False, db_path=db_path)['summary'] == {'added': 1}
+
+    upper = dict(POOL, pool_address=POOL['pool_address'].upper().replace('0X', '0x'))
+    report = import_pools([upper], validate=False, db_path=db_path)
+    assert report['summary'] == {'unchanged': 1}
+
+    report = import_pools([dict(upper, dex_name='Project Y')], validate=False, db_path=db_path)
+    assert report['summary'] == {'updated': 1}
+    assert _stored(db_path) == [(POOL['pool_address'], 'Project Y')]
+
+
+def test_duplicates_in_one_import_differ_only_in_case(db_path):
+    upper = dict(POOL, pool_address=POOL['pool_address'].upper())
+    report = import_pools([POOL, upper], validate=False, db_path=db_path)
+    assert [entry['status'] for entry in report['results']] == ['added', 'invalid']
+    assert len(_stored(db_path)) == 1
+
+
+def test_add_scrap_pool_rejects_an_address_in_another_case(api_client, db_path):
+    import_pools([POOL], validate=False, db_path=db_path)
+    # The duplicate check runs before the validation scrape, so nothing is fetched
+    response = api_client.post('/add_scrap_pool', json=dict(POOL, pool_address=POOL['pool_address'].upper()))
+    assert response.status_code == 409
+    assert len(_stored(db_path)) == 1
+
+
+def test_migration_keeps_one_row_per_case_folded_address(db_path):
+    import migrations
+
+    conn = connect(db_path)
+    with conn:
+        # A database from before migration 11, with both spellings of one pool
+        conn.execute("DROP INDEX idx_monitored_pools_address")
+        for address in (POOL['pool_address'], POOL['pool_address'].upper()):
+            conn.execute("INSERT INTO monitored_pools (dex_name, scraper_function, network, pool_address, target_token_address) "
+                         "VALUES (?, ?, ?, ?, ?)", ('Project X', 'geckoterminal', 'hyperevm', address, POOL['target_token_address']))
+    conn.execute("PRAGMA user_version = 10")
+    conn.close()
+
+    assert migrations.migrate(db_path) == 11
+    assert _stored(db_path) == [(POOL['pool_address'], 'Project X')]
+    conn = connect(db_path)
+    try:
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO monitored_pools (dex_name, scraper_function, network, pool_address, target_token_address) "
+                         "VALUES ('Project Y', 'geckoterminal', 'hyperevm', ?, '0x0')", (POOL['pool_address'].upper(),))
+    finally:
+        conn.close()
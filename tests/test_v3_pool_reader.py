@@ -0,0 +1,123 @@
+# tests/test_v3_pool_reader.py
+"""
+The Multicall reader against the stub JSON-RPC node of benchmarks/stub_upstreams.py,
+which answers aggregate3 per sub-call (even pools are Uniswap V3, odd ones Algebra).
+"""
+import pytest
+
+from scraper import metadata_cache, rate_limit, v3_pool_reader
+from stub_upstreams import UpstreamStub, RPC_TOKEN0, RPC_TOKEN1
+
+POOL_COUNT = 6
+
+
+@pytest.fixture(scope='module')
+def stub():
+    stub = UpstreamStub({'v3_rpc': POOL_COUNT}).start()
+    v3_pool_reader.RPC_URLS['replay'] = f"{stub.base_url}/rpc"
+    rate_limit.HOST_LIMITS['127.0.0.1'] = (1e6, 1e6)
+    rate_limit.reset()
+    yield stub
+    stub.stop()
+    del v3_pool_reader.RPC_URLS['replay']
+
+
+@pytest.fixture(autouse=True)
+def fresh_process(stub, db_path):
+    """Every test starts like a new process: empty caches, default fees, no requests counted."""
+    _forget_metadata()
+    stub.algebra_fee = 500
+    stub.reset_counts()
+    yield
+    _forget_metadata()
+
+
+def _forget_metadata():
+    v3_pool_reader._pool_metadata.clear()
+    v3_pool_reader._token_metadata.clear()
+    metadata_cache.clear()
+
+
+def _rpc_requests(stub):
+    return stub.counts.get('rpc', 0)
+
+
+def test_steady_state_poll_is_one_eth_call(stub):
+    pools = stub.pools()
+    first = v3_pool_reader.scrape_v3_pools(pools)
+    assert all(price is not None for price in first.values())
+    # Pool metadata, token metadata and the price state
+    assert _rpc_requests(stub) == 3
+
+    stub.reset_counts()
+    second = v3_pool_reader.scrape_v3_pools(pools)
+    assert _rpc_requests(stub) == 1
+    assert set(second) == {pool['pool_address'] for pool in pools}
+    assert all(price is not None for price in second.values())
+
+
+def test_detects_v3_and_algebra_and_reads_the_dynamic_fee(stub):
+    pools = stub.pools()
+    rpc_url = v3_pool_reader.RPC_URLS['replay']
+    results = v3_pool_reader.scrape_v3_pools(pools)
+
+    for i, pool in enumerate(pools):
+        address = pool['pool_address']
+        kind = v3_pool_reader._pool_metadata[(rpc_url, address)]['kind']
+        assert kind == ('algebra' if i % 2 else 'v3')
+        assert results[address]['fee_percentage'] == (0.05 if i % 2 else 0.3)
+        assert results[address]['pool_name'] == f"{RPC_TOKEN0[2]} / {RPC_TOKEN1[2]}"
+
+    # Algebra's fee is read from globalState() on every poll; V3's fee() is cached
+    stub.algebra_fee = 100
+    results = v3_pool_reader.scrape_v3_pools(pools)
+    for i, pool in enumerate(pools):
+        assert results[pool['pool_address']]['fee_percentage'] == (0.01 if i % 2 else 0.3)
+
+
+def test_reverted_sub_call_is_none(stub):
+    rpc_url = v3_pool_reader.RPC_URLS['replay']
+    pool = stub.pools()[0]['pool_address']
+    not_a_pool = '0x' + '11' * 20
+
+    liquidity, reverted = v3_pool_reader.multicall(
+        rpc_url, [(pool, v3_pool_reader.LIQUIDITY), (not_a_pool, v3_pool_reader.LIQUIDITY)])
+    assert v3_pool_reader._word(liquidity, 0) == 10 ** 21
+    assert reverted is None
+
+
+def test_pool_that_is_not_a_pool_is_none_without_failing_the_batch(stub):
+    pools = stub.pools()[:2] + [dict(stub.pools()[0], pool_address='0x' + '11' * 20)]
+    results = v3_pool_reader.scrape_v3_pools(pools)
+    assert results['0x' + '11' * 20] is None
+    assert all(results[pool['pool_address']] is not None for pool in pools[:2])
+
+
+def test_target_token_not_in_pool_is_none(stub):
+    pools = stub.pools()[:2]
+    pools[1] = dict(pools[1], target_token_address='0x' + '22' * 20)
+    results = v3_pool_reader.scrape_v3_pools(pools)
+    assert results[pools[0]['pool_address']] is not None
+    assert results[pools[1]['pool_address']] is None
+
+
+def test_target_token_can_be_either_side(stub):
+    pool = dict(stub.pools()[0], target_token_address=RPC_TOKEN1[0])
+    price = v3_pool_reader.scrape_v3_pools([pool])[pool['pool_address']]
+    assert price['pool_name'] == f"{RPC_TOKEN1[2]} / {RPC_TOKEN0[2]}"
+    # About 1 / 30 of the WHYPE price the stub starts from
+    assert 0 < price['spot_price'] < 1
+
+
+def test_metadata_read_is_skipped_after_a_restart(stub):
+    pools = stub.pools()
+    v3_pool_reader.scrape_v3_pools(pools)
+
+    # A new process: nothing in memory, but pool_metadata holds every pool
+    _forget_metadata()
+    stub.reset_counts()
+    results = v3_pool_reader.scrape_v3_pools(pools)
+    assert _rpc_requests(stub) == 1
+    assert all(price is not None for price in results.values())
+    for i, pool in enumerate(pools):
+        assert results[pool['pool_address']]['fee_percentage'] == (0.05 if i % 2 else 0.3)
@@ -0,0 +1,97 @@
+# worker.py (The scraper daemon)
+"""
+Standalone scheduler process: scrapes the pools as they fall due, forever.
+
+Run exactly this (e.g. under systemd or supervisord) next to the API:
+
+    python worker.py                       # flock() leader lock next to prices.db
+    python worker.py --lock sqlite         # lease row in the database instead
+    python worker.py --metrics-port 9200   # Prometheus metrics on another port (0 = off)
+
+Only the process holding the leader lock schedules anything. A second copy
+started by mistake (or a hot standby) just waits, and takes over when the
+leader exits or, with --lock sqlite, stops renewing its lease. The leader also
+runs the jobs queued through the API's POST /run_scraper (see jobs.py), so the
+API processes never scrape; they only serve reads and can be scaled out freely.
+
+The scrape, flush and scheduler metrics are recorded here, so the worker
+serves them itself at http://<host>:<metrics-port>/metrics.
+"""
+import time
+import signal
+import logging
+import argparse
+
+import migrations
+from jobs import JobManager
+from leader import make_lock
+from metrics import start_metrics_server
+from pool_scheduler import run_tick, TICK_SECONDS
+
+# How often a standby worker tries to become the leader
+STANDBY_RETRY_SECONDS = 10
+
+# Port of the worker's Prometheus exporter (the API serves its own metrics at /metrics)
+METRICS_PORT = 9101
+
+_stopping = False
+
+
+def _request_stop(signum, frame):
+    global _stopping
+    logging.info(f"Received signal {signum}, stopping after the current tick...")
+    _stopping = True
+
+
+def _sleep(seconds):
+    """Sleeps in short steps so a stop request is noticed quickly."""
+    deadline = time.monotonic() + seconds
+    while not _stopping and time.monotonic() < deadline:
+        time.sleep(min(0.5, deadline - time.monotonic()))
+
+
+def run(lock, tick_seconds=TICK_SECONDS):
+    """Waits for leadership, then runs the scheduler until stopped or leadership is lost."""
+    job_manager = JobManager()
+    while not _stopping:
+        if not lock.acquire():
+            logging.info(f"Another worker is the leader; retrying in {STANDBY_RETRY_SECONDS}s")
+            _sleep(STANDBY_RETRY_SECONDS)
+            continue
+
+        logging.info("--- Became the scheduler leader ---")
+        try:
+            while not _stopping:
+                started = time.monotonic()
+                try:
+                    run_tick(job_manager)
+                except Exception as e:
+                    # A bad tick must not kill the daemon; the pools stay due and are retried
+                    logging.error(f"Scheduler tick failed: {e}")
+                if not lock.renew():
+                    logging.warning("--- Lost the scheduler leadership ---")
+                    break
+                _sleep(tick_seconds - (time.monotonic() - started))
+        finally:
+            lock.release()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run the scrape scheduler as a single-leader daemon.")
+    parser.add_argument('--lock', choices=['file', 'sqlite'], default='file', help="leader lock to use (default: %(default)s)")
+    parser.add_argument('--tick', type=float, default=TICK_SECONDS, help="seconds between scheduler ticks (default: %(default)s)")
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT, help="port of the Prometheus exporter, 0 to disable (default: %(default)s)")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    # The worker owns the schema; the API only reads it
+    migrations.migrate()
+    if args.metrics_port:
+        # Standbys serve it too, so the scrape target stays up across a failover
+        start_metrics_server(args.metrics_port)
+        logging.info(f"Serving metrics on port {args.metrics_port}")
+    run(make_lock(args.lock), tick_seconds=args.tick)
+    logging.info("--- Worker stopped ---")